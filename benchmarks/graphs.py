@@ -0,0 +1,132 @@
+"""
+Synthetic object graphs used by the benchmarks.
+Each generator return the root of the graph and the number of complex objects it contain.
+"""
+import sys
+
+# The maximum depth of the deep graph.
+# yaml use recursion and hit the default recursion limit at around 200 nested objects.
+MAX_DEPTH = 100
+
+# Note that we need to define the classes used in the benchmarks in the global module scope
+# for them to be accessible by libSerialization.
+
+
+class Node(object):
+    pass
+
+
+class Leaf(Node):
+    pass
+
+
+class Shared(object):
+    pass
+
+
+def _get_generated_class(i):
+    """
+    Resolve one of the classes generated for the 'classes' graph.
+    The classes are added to this module so they can be resolved when importing.
+    """
+    name = 'Generated{0}'.format(i)
+    module = sys.modules[__name__]
+    cls = getattr(module, name, None)
+    if cls is None:
+        cls = type(name, (Node,), {'__module__': __name__})
+        setattr(module, name, cls)
+    return cls
+
+
+def _create_node(cls, i):
+    node = cls()
+    node.name = 'node{0}'.format(i)
+    node.index = i
+    node.weight = i * 0.5
+    node.enabled = bool(i % 2)
+    return node
+
+
+def create_wide(size):
+    """
+    A root with a lot of direct children.
+    """
+    root = _create_node(Node, 0)
+    root.children = [_create_node(Leaf, i) for i in range(size)]
+    return root, size + 1
+
+
+def create_deep(size):
+    """
+    A chain of nested objects.
+    The chain is never deeper than MAX_DEPTH.
+    """
+    size = min(size, MAX_DEPTH)
+    root = node = _create_node(Node, 0)
+    for i in range(size):
+        node.child = _create_node(Node, i)
+        node = node.child
+    return root, size + 1
+
+
+def create_cyclic(size):
+    """
+    Children that reference their parent and their first sibling.
+    Note that the cycles are kept short since json and yaml use recursion.
+    """
+    root = _create_node(Node, 0)
+    root.children = [_create_node(Leaf, i) for i in range(size)]
+    for child in root.children:
+        child.parent = root
+        child.first = root.children[0]
+    return root, size + 1
+
+
+def create_shared(size):
+    """
+    Children that all reference the same small pool of objects.
+    """
+    pool = [_create_node(Shared, i) for i in range(10)]
+    root = _create_node(Node, 0)
+    root.children = []
+    for i in range(size):
+        child = _create_node(Leaf, i)
+        child.shared = [pool[i % 10], pool[(i + 1) % 10]]
+        root.children.append(child)
+    return root, size + 11
+
+
+def create_lists(size):
+    """
+    A few objects holding large lists of basic values.
+    """
+    root = _create_node(Node, 0)
+    root.children = []
+    for i in range(max(1, size // 100)):
+        child = _create_node(Leaf, i)
+        child.floats = [j * 0.1 for j in range(100)]
+        child.ints = list(range(100))
+        child.names = ['name{0}'.format(j) for j in range(100)]
+        child.matrix = [[float(j == k) for k in range(4)] for j in range(4)]
+        root.children.append(child)
+    return root, len(root.children) + 1
+
+
+def create_classes(size):
+    """
+    Children that each use a different class.
+    """
+    root = _create_node(Node, 0)
+    root.children = [_create_node(_get_generated_class(i % 500), i) for i in range(size)]
+    return root, size + 1
+
+
+# The deep graph is smaller since yaml use recursion and would hit the recursion limit (see MAX_DEPTH).
+GRAPHS = (
+    ('wide', create_wide, 1.0),
+    ('deep', create_deep, 0.1),
+    ('cyclic', create_cyclic, 1.0),
+    ('shared', create_shared, 1.0),
+    ('lists', create_lists, 1.0),
+    ('classes', create_classes, 1.0),
+)
@@ -0,0 +1,236 @@
+"""
+Benchmark the serializers using synthetic object graphs, Maya is not needed.
+
+Usage:
+python benchmarks/run.py --output results.json
+python benchmarks/run.py --output results.json --baseline baseline.json --threshold 0.15
+
+The results contain the latency percentiles, the throughput (in objects per second) and the peak memory of each case.
+When a baseline is provided, the cases that are slower (or use more memory) than the threshold are reported
+and the exit code is 1.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import timeit
+import platform
+import argparse
+
+path_module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, path_module_dir)
+
+import libSerialization
+import graphs
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+def _get_operations(graph, cyclic):
+    """
+    Resolve the operations to benchmark for a graph.
+    Each operation is a function without arguments. The inputs of the import operations are prepared beforehand.
+    """
+    # json.dumps don't support cyclic containers, the cyclic graphs need to preserve the references.
+    json_kwargs = {'references': True} if cyclic else {}
+
+    data_dict = libSerialization.export_dict(graph)
+    data_json = libSerialization.export_json(graph, **json_kwargs)
+    operations = [
+        ('export_dict', lambda: libSerialization.export_dict(graph)),
+        ('import_dict', lambda: libSerialization.import_dict(data_dict)),
+        ('export_json', lambda: libSerialization.export_json(graph, **json_kwargs)),
+        ('import_json', lambda: libSerialization.import_json(data_json)),
+    ]
+
+    if yaml is not None:
+        data_yaml = libSerialization.export_yaml(graph)
+        operations.extend((
+            ('export_yaml', lambda: libSerialization.export_yaml(graph)),
+            ('import_yaml', lambda: libSerialization.import_yaml(data_yaml)),
+        ))
+
+    return operations
+
+
+def _get_percentile(values, percentile):
+    values = sorted(values)
+    index = int(round((len(values) - 1) * percentile / 100.0))
+    return values[index]
+
+
+def measure_peak_memory(fn):
+    """
+    Measure the peak memory used while calling a function.
+    :return: The peak memory in bytes or None if it cannot be measured.
+    """
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            fn()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # Fallback on the peak resident memory, since it never decrease, the function is called in a forked process.
+    if resource is not None and hasattr(os, 'fork'):
+        fd_read, fd_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                fn()
+                after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                os.write(fd_write, str(after - before).encode('ascii'))
+            finally:
+                os._exit(0)
+
+        os.close(fd_write)
+        result = os.read(fd_read, 64)
+        os.close(fd_read)
+        os.waitpid(pid, 0)
+        if not result:
+            return None
+        # ru_maxrss is in kilobytes on linux and in bytes on osx.
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return int(result) * scale
+
+    return None
+
+
+def measure(fn, num_objects, repeat):
+    """
+    Measure the latency and the peak memory of a function.
+    """
+    timer = timeit.default_timer
+    times = []
+    for _ in range(repeat):
+        start = timer()
+        fn()
+        times.append(timer() - start)
+
+    median = _get_percentile(times, 50)
+    return {
+        'repeat': repeat,
+        'objects': num_objects,
+        'min': min(times),
+        'mean': sum(times) / len(times),
+        'p50': median,
+        'p90': _get_percentile(times, 90),
+        'p99': _get_percentile(times, 99),
+        'throughput': num_objects / median if median else None,
+        'peak_memory': measure_peak_memory(fn),
+    }
+
+
+def run(size=2000, repeat=10, names=None, log=None):
+    """
+    Run every benchmark.
+    :param size: The approximative number of objects in each graph.
+    :param repeat: The number of time each operation is measured.
+    :param names: If provided, only the graphs with these names are used.
+    :param log: A function called with a message after each case.
+    :return: A dict containing the results by case name.
+    """
+    results = {}
+    for name, fn_create, size_ratio in graphs.GRAPHS:
+        if names and name not in names:
+            continue
+
+        graph, num_objects = fn_create(max(1, int(size * size_ratio)))
+        for op_name, fn in _get_operations(graph, cyclic=(name == 'cyclic')):
+            case = '{0}/{1}'.format(name, op_name)
+            result = results[case] = measure(fn, num_objects, repeat)
+            if log:
+                log("{0:<24} p50 {1:9.3f}ms  p90 {2:9.3f}ms  {3:12.0f} objects/s".format(
+                    case, result['p50'] * 1000, result['p90'] * 1000, result['throughput'] or 0
+                ))
+
+    return results
+
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Compare results with a baseline.
+    :param threshold: The tolerated increase, 0.1 mean a case can be 10% slower than the baseline.
+    :return: A list of message describing each regression.
+    """
+    regressions = []
+    for case, result in sorted(results.items()):
+        base = baseline.get(case)
+        if base is None:
+            continue
+
+        for key in ('p50', 'peak_memory'):
+            value = result.get(key)
+            base_value = base.get(key)
+            if not value or not base_value:
+                continue
+            ratio = float(value) / base_value
+            if ratio > 1.0 + threshold:
+                regressions.append("{0} {1} regressed by {2:.0%} ({3:.6g} -> {4:.6g})".format(
+                    case, key, ratio - 1.0, base_value, value
+                ))
+
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Benchmark the libSerialization serializers.')
+    parser.add_argument('--output', help='Path of the json file that will contain the results.')
+    parser.add_argument('--baseline', help='Path of a previous results file to compare with.')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Tolerated regression, 0.1 mean 10%%.')
+    parser.add_argument('--size', type=int, default=2000, help='Approximative number of objects in each graph.')
+    parser.add_argument('--repeat', type=int, default=10, help='Number of measurements for each case.')
+    parser.add_argument('--graph', action='append', dest='graphs', help='Only benchmark the specified graph.')
+    args = parser.parse_args(args)
+
+    def log(msg):
+        sys.stdout.write(msg + '\n')
+        sys.stdout.flush()
+
+    results = run(size=args.size, repeat=args.repeat, names=args.graphs, log=log)
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump({
+                'meta': {
+                    'time': time.time(),
+                    'python': sys.version.split()[0],
+                    'platform': platform.platform(),
+                    'size': args.size,
+                    'repeat': args.repeat,
+                },
+                'results': results
+            }, fp, indent=4, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as fp:
+            baseline = json.load(fp)['results']
+        regressions = compare(results, baseline, threshold=args.threshold)
+        for msg in regressions:
+            log("REGRESSION: " + msg)
+        if regressions:
+            return 1
+        log("No regression found.")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
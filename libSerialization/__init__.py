@@ -1,4 +1,5 @@
 from core import *
+from instrumentation import *
 
 try:
     from plugin_maya import *
@@ -15,7 +16,27 @@ try:
 except ImportError, e:
     pass
 
+try:
+    from lazy import *
+except ImportError, e:
+    pass
+
+try:
+    from incremental import *
+except ImportError, e:
+    pass
+
 try:
     from plugin_yaml import *
 except ImportError, e:
     pass
+
+try:
+    from plugin_binary import *
+except ImportError, e:
+    pass
+
+try:
+    from plugin_store import *
+except ImportError, e:
+    pass
@@ -1,5 +1,12 @@
+import sys
+import logging
+import weakref
+import instrumentation
 from decorators import memoized
-from .core import get_class_namespace, get_class_module_root
+from .core import get_class_namespace, get_class_module_root, get_class_plan, get_class_latest_definition
+
+log = logging.getLogger(__name__)
+
 
 def iter_subclasses_recursive(cls):
     yield cls
@@ -17,53 +24,307 @@ def iter_module_subclasses_recursive(module_root, cls):
         if module_root == cur_module_root:
             yield sub_cls
 
-class Cache(object):
+
+def _iter_subclasses(cls):
+    """
+    Iterate through a class and all it's subclasses without recursion.
+    """
+    known = set()
+    stack = [cls]
+    while stack:
+        cls = stack.pop()
+        if cls in known:
+            continue
+        known.add(cls)
+        yield cls
+        try:
+            # Using type.__subclasses__ also work with the 'type' datatype.
+            stack.extend(reversed(type.__subclasses__(cls)))
+        except TypeError:
+            pass
+
+
+def _discard_ref(refs, ref):
+    """
+    Remove the weak reference to a deleted class from the list of classes sharing it's name.
+    """
+    if ref in refs:
+        refs.remove(ref)
+
+
+class ClassIndex(object):
+    """
+    Index of the class definitions by name, by namespace and by module.
+
+    The index is built the first time it is used by walking every subclass of object.
+    Afterward, new classes are indexed when a lookup miss, when new modules are imported or when
+    a module is explicitly re-indexed using rebuild_module (ex: after a reload).
+    A lookup that missed don't scan again until the index change or new modules are imported.
+
+    The index is meant to be long-lived and shared between calls, see get_class_index.
+    The generation is incremented each time the index change and invalidate the lookup results.
+    The index only hold weak references to the classes, it never keep an outdated class definition alive.
+    """
     def __init__(self):
-        self.classes = None
+        self._classes = weakref.WeakSet()
+        # The weak references to the classes by name, in the order they were indexed.
+        # If multiple classes share the same name, the last indexed one is used.
+        self._classes_by_name = {}
+        # The namespace of the classes, only computed for the classes matching a namespace lookup.
+        self._namespaces = weakref.WeakKeyDictionary()
+        # The weak references to the successful lookups results for the current generation.
+        self._results = {}
+        # The lookups that found nothing for the current generation, they don't scan again until the index change.
+        # New modules are detected by update() before each lookup, a new class increment the generation.
+        self._missed = set()
+        self._initialized = False
+        # The number of modules the last time we scanned for new classes.
+        self._num_modules = 0
+        self.generation = 0
+        # The number of lookups that returned nothing, by lookup.
+        self.misses = {}
+
+    def _increment_generation(self):
+        self.generation += 1
+        self._results.clear()
+        self._missed.clear()
+
+    def _add_class(self, cls):
+        if cls in self._classes:
+            return False
+        self._classes.add(cls)
+        refs = self._classes_by_name.setdefault(cls.__name__, [])
+        refs.append(weakref.ref(cls, lambda ref: _discard_ref(refs, ref)))
+        return True
+
+    def _remove_class(self, cls):
+        self._classes.discard(cls)
+        self._namespaces.pop(cls, None)
+        refs = self._classes_by_name.get(cls.__name__)
+        if refs:
+            _discard_ref(refs, weakref.ref(cls))
+
+    def _get_namespace(self, cls):
+        try:
+            return self._namespaces[cls]
+        except KeyError:
+            namespace = self._namespaces[cls] = get_class_namespace(cls)
+            return namespace
+
+    def scan(self, base_class=object):
+        """
+        Index every subclass of the provided class that is not already indexed.
+        :return: The number of new classes.
+        """
+        self._initialized = True
+        self._num_modules = len(sys.modules)
+        num_classes = sum(self._add_class(cls) for cls in _iter_subclasses(base_class))
+        if num_classes:
+            self._increment_generation()
+        return num_classes
+
+    def update(self):
+        """
+        Index the new classes if the index was never built or if new modules were imported since the last scan.
+        Checking for new modules is cheap and don't require walking the classes.
+        """
+        if not self._initialized or len(sys.modules) != self._num_modules:
+            self.scan()
+
+    def invalidate(self):
+        """
+        Forget every indexed classes, the index will be rebuilt on the next lookup.
+        """
+        self._classes.clear()
+        self._classes_by_name.clear()
+        self._namespaces.clear()
+        self.misses.clear()
+        self._initialized = False
+        self._increment_generation()
+
+    def rebuild_module(self, module_name):
+        """
+        Re-index the classes defined in a module, this is necessary after a module is reloaded.
+        The outdated class definitions are removed from the index.
+        :param module_name: The name of the module, ex: 'omtk.core.classCtrl'
+        """
+        for cls in [cls for cls in self._classes if cls.__module__ == module_name]:
+            self._remove_class(cls)
+        self._increment_generation()
+
+        module = sys.modules.get(module_name)
+        if module is None:
+            return
+
+        def is_outdated(cls):
+            return cls.__module__ == module_name and getattr(module, cls.__name__, None) is not cls
+
+        for value in list(vars(module).values()):
+            if isinstance(value, type) and value.__module__ == module_name:
+                for cls in _iter_subclasses(value):
+                    if not is_outdated(cls):
+                        self._add_class(cls)
+
+    def _iter_candidates(self, cls_name, module_name, base_class):
+        """
+        Yield the indexed classes matching a name, from the most recent one.
+        """
+        for ref in reversed(self._classes_by_name.get(cls_name, ())):
+            cls = ref()
+            if cls is None:
+                continue
+            if module_name is not None and get_class_module_root(cls) != module_name:
+                continue
+            if base_class is not object and not issubclass(cls, base_class):
+                continue
+            yield cls
+
+    def _lookup(self, key, fn):
+        """
+        Resolve a lookup, if nothing is found, index any new class and try again.
+        """
+        with instrumentation.measure(instrumentation.EVENT_CLASS_RESOLUTION):
+            return self._resolve(key, fn)
+
+    def _resolve(self, key, fn):
+        self.update()
+
+        ref = self._results.get(key)
+        result = ref() if ref is not None else None
+        if result is not None:
+            if instrumentation.enabled:
+                instrumentation.emit(instrumentation.EVENT_CACHE_HIT, 1, 'classes')
+            return result
+
+        if instrumentation.enabled:
+            instrumentation.emit(instrumentation.EVENT_CACHE_MISS, 1, 'classes')
+        if key in self._missed:
+            self.misses[key] += 1
+            return None
+        result = fn()
+        if result is None:
+            # The class might have been defined in an already imported module (ex: __main__).
+            if self.scan():
+                result = fn()
+            if result is None:
+                self._missed.add(key)
+                self.misses[key] = self.misses.get(key, 0) + 1
+                log.debug("Can't find class matching {0}".format(key))
+                return None
+
+        self._results[key] = weakref.ref(result)
+        return result
+
+    def get_class_by_name(self, cls_name, module_name=None, base_class=object):
+        return self._lookup(
+            ('name', cls_name, module_name, base_class),
+            lambda: next(self._iter_candidates(cls_name, module_name, base_class), None)
+        )
+
+    def get_class_by_namespace(self, cls_namespace, module_name=None, base_class=object):
+        # Only the classes which name match the end of the namespace need to be inspected.
+        cls_name = cls_namespace.split('.')[-1]
+
+        def fn():
+            for cls in self._iter_candidates(cls_name, module_name, base_class):
+                if self._get_namespace(cls) == cls_namespace:
+                    return cls
+
+        return self._lookup(('namespace', cls_namespace, module_name, base_class), fn)
+
+
+_class_index = None
+
+
+def get_class_index():
+    """
+    Return the ClassIndex shared by every Cache, it is created the first time it is needed.
+    """
+    global _class_index
+    if _class_index is None:
+        _class_index = ClassIndex()
+    return _class_index
+
+
+def invalidate_class_index(module_name=None):
+    """
+    Invalidate the shared ClassIndex.
+    This is only necessary when a module is reloaded, new modules are detected automatically.
+    The classes defined in an already imported module (ex: __main__) after a lookup missed them
+    are also only found once their module is re-indexed.
+    :param module_name: If provided, only the classes of this module are re-indexed.
+    """
+    index = get_class_index()
+    if module_name is None:
+        index.invalidate()
+    else:
+        index.rebuild_module(module_name)
+
+
+class Cache(object):
+    """
+    The state of a single export or import call.
+    The class lookups are delegated to a long-lived ClassIndex, by default the one shared by the whole process.
+    """
+    def __init__(self, classes=None):
+        self.classes = get_class_index() if classes is None else classes
+        # The plans of the encountered classes, the latest definition of a class is only resolved once per call.
+        self._class_plans = {}
         self._cache_import_by_id = {}
         self._cache_networks_by_id = {}  # todo: merge with _cache_import_by_id
 
-    @memoized
-    def _get_cls_cache_by_module(self, module_name, base_class=object):
-        i = iter_module_subclasses_recursive(module_name, base_class)
-        result = {}
-        for cls in i:
-            result[cls.__name__] = cls
+    def fork(self):
+        """
+        Create a Cache that share the class resolution of this one, but not it's values by id.
+        Each independent document (ex: each value of export_many) need it's own values,
+        a value exported in a document can't be referenced by another one.
+        """
+        result = self.__class__(classes=self.classes)
+        result._class_plans = self._class_plans
         return result
 
     @memoized
-    def _get_cls_cache(self, base_class=object):
-        i = iter_subclasses_recursive(base_class)
-        result = {}
-        for cls in i:
-            result[cls.__name__] = cls
-        return result
-
     def get_class_by_name(self, cls_name, module_name=None, base_class=object):
-        if module_name is None:
-            cache = self._get_cls_cache(base_class=base_class)
-        else:
-            cache = self._get_cls_cache_by_module(module_name=module_name, base_class=base_class)
-        return cache.get(cls_name, None)
+        return self.classes.get_class_by_name(cls_name, module_name=module_name, base_class=base_class)
 
+    @memoized
     def get_class_by_namespace(self, cls_namespace, module_name=None, base_class=object):
-        if module_name is None:
-            cache = self._get_cls_cache(base_class=base_class)
-        else:
-            cache = self._get_cls_cache_by_module(base_class=base_class)
-        for cls in cache.values():
-            cur_namespace = get_class_namespace(cls)
-            if cls_namespace == cur_namespace:
-                return cls
+        return self.classes.get_class_by_namespace(cls_namespace, module_name=module_name, base_class=base_class)
+
+    def get_class_plan(self, cls):
+        """
+        Resolve the plan of the latest definition of a class (in case it was reloaded).
+        :param cls: A class definition.
+        :return: A ClassPlan instance.
+        """
+        try:
+            return self._class_plans[cls]
+        except KeyError:
+            plan = self._class_plans[cls] = get_class_plan(get_class_latest_definition(cls))
+            return plan
 
     def get_import_value_by_id(self, id, default=None):
+        if instrumentation.enabled:
+            return self._get_instrumented(self._cache_import_by_id, 'values', id, default)
         return self._cache_import_by_id.get(id, default)
 
     def set_import_value_by_id(self, id, val):
         self._cache_import_by_id[id] = val
 
     def get_network_by_id(self, id, default=None):
+        if instrumentation.enabled:
+            return self._get_instrumented(self._cache_networks_by_id, 'networks', id, default)
         return self._cache_networks_by_id.get(id, default)
 
+    @staticmethod
+    def _get_instrumented(cache, name, key, default):
+        try:
+            result = cache[key]
+        except KeyError:
+            instrumentation.emit(instrumentation.EVENT_CACHE_MISS, 1, name)
+            return default
+        instrumentation.emit(instrumentation.EVENT_CACHE_HIT, 1, name)
+        return result
+
     def set_network_by_id(self, id, net):
-        self._cache_networks_by_id[id] = net
\ No newline at end of file
+        self._cache_networks_by_id[id] = net
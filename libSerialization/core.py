@@ -1,12 +1,22 @@
 import logging as _logging
 import sys
+import weakref
+import instrumentation
 
 __all__ = (
     'get_class_module_root',
     'get_class_namespace',
+    'register_type',
+    'unregister_type',
+    'register_construction',
+    'unregister_construction',
+    'get_class_plan',
+    'invalidate_class_plans',
     'create_class_instance',
     'export_dict',
-    'import_dict'
+    'import_dict',
+    'export_many',
+    'import_many'
 )
 
 logging = _logging.getLogger()
@@ -14,6 +24,7 @@ logging.setLevel(_logging.WARNING)
 
 # constants
 TYPE_BASIC, TYPE_LIST, TYPE_DAGNODE, TYPE_COMPLEX, TYPE_NONE = range(5)
+CONSTRUCT_INIT, CONSTRUCT_NEW = range(2)
 
 
 def get_class_module_root(cls):
@@ -59,155 +70,702 @@ def create_class_instance(cls):
     :param cls: A class definition to inspect.
     :return: A class instance.
     """
-    class_def = getattr(sys.modules[cls.__module__], cls.__name__)
+    class_def = get_class_latest_definition(cls)
     assert (class_def is not None)
 
-    try:
-        return class_def()
-    except Exception as e:
-        logging.error("Fatal error creating '{0}' instance: {1}".format(cls, str(e)))
-        return None
+    return get_class_plan(class_def).create_instance()
+
+
+def get_class_latest_definition(cls):
+    """
+    Resolve the latest definition of a class (available from sys.modules).
+    If the class was reloaded, the cached plan and data type of the outdated definition are invalidated.
+    :param cls: A class definition to inspect.
+    :return: A class definition.
+    """
+    class_def = getattr(sys.modules[cls.__module__], cls.__name__)
+    if class_def is not cls:
+        invalidate_class_plans(cls)
+        _types_cache.pop(cls, None)
+    return class_def
 
 #
 # Types definitions
 # Type affect how the data is read & writen.
-# By using global variables, we allow any script to hook itself in the module.
+# Any script can hook itself in the module by registering it's own types with register_type.
+# ex: plugin_maya register pymel.PyNode and pymel.Attribute as TYPE_DAGNODE.
 #
 
-# We consider a data complex if it's a class instance.
-# Note: We check for __dict__ because isinstance(_data, object) return True for basic types.
-types_complex = [dict]
+# Map a registered type to it's data type.
+_types_registry = {}
 
+# Map any encountered type to it's resolved data type.
+# This is invalidated each time the registry change.
+_types_cache = {}
 
-def is_data_complex(_data):
-    return any(filter(lambda x: isinstance(_data, x), (iter(types_complex)))) or hasattr(_data, '__dict__')
+
+def register_type(cls, data_type):
+    """
+    Register a type so that it's instances (and the instances of it's subclasses) are handled as a specific data type.
+    :param cls: The type to register.
+    :param data_type: One of TYPE_BASIC, TYPE_LIST, TYPE_DAGNODE or TYPE_COMPLEX.
+    """
+    if data_type not in (TYPE_BASIC, TYPE_LIST, TYPE_DAGNODE, TYPE_COMPLEX):
+        raise ValueError("Unsupported data type {0} for {1}".format(data_type, cls))
+    _types_registry[cls] = data_type
+    _types_cache.clear()
+
+
+def unregister_type(cls):
+    """
+    Remove a type previously registered with register_type.
+    :param cls: The type to unregister.
+    """
+    _types_registry.pop(cls, None)
+    _types_cache.clear()
+
+
+def _resolve_type(cls):
+    """
+    Resolve the data type of a type by inspecting it's method resolution order.
+    If multiple registered types match, the data type with the highest priority win.
+    The priority is the same than the values of the constants, TYPE_BASIC being the highest.
+    This ensure that, as an example, pymel.PyNode are never considered as complex datatypes.
+    :param cls: The type to inspect.
+    :return: A data type constant or None if the type is not registered.
+    """
+    result = None
+    for base_cls in getattr(cls, '__mro__', (cls,)):
+        data_type = _types_registry.get(base_cls)
+        if data_type is not None and (result is None or data_type < result):
+            result = data_type
+    return result
 
 
-types_basic = [int, float, bool]
+def _is_data_registered_as(data, data_type):
+    data_cls = type(data)
+    resolved_type = _types_cache.get(data_cls)
+    if resolved_type is None:
+        resolved_type = _resolve_type(data_cls)
+    return resolved_type == data_type
+
+
+# We consider a data complex if it's a class instance.
+register_type(dict, TYPE_COMPLEX)
+
+register_type(int, TYPE_BASIC)
+register_type(float, TYPE_BASIC)
+register_type(bool, TYPE_BASIC)
 
 # Python3 support
 try:
-    types_basic.append(basestring)
+    register_type(basestring, TYPE_BASIC)
 except NameError:
-    pass
-    types_basic.append(str)
+    register_type(str, TYPE_BASIC)
 
+register_type(list, TYPE_LIST)
+register_type(tuple, TYPE_LIST)
 
-def is_data_basic(_data):
-    global types_basic
-    return any(filter(lambda x: isinstance(_data, x), (iter(types_basic))))
+# The basic types that can be copied without being inspected.
+try:
+    PLAIN_TYPES = frozenset((int, long, float, bool, str, unicode))
+except NameError:
+    PLAIN_TYPES = frozenset((int, float, bool, str))
 
 
-types_list = [list, tuple]
+def is_data_complex(_data):
+    # Note: We check for __dict__ because isinstance(_data, object) return True for basic types.
+    return _is_data_registered_as(_data, TYPE_COMPLEX) or hasattr(_data, '__dict__')
 
 
-def is_data_list(_data):
-    global types_list
-    return any(filter(lambda x: isinstance(_data, x), (iter(types_list))))
+def is_data_basic(_data):
+    return _is_data_registered_as(_data, TYPE_BASIC)
 
 
-types_dag = []
+def is_data_list(_data):
+    return _is_data_registered_as(_data, TYPE_LIST)
 
 
 def is_data_pymel(data):
     """
     Add pymel support.
     """
-    global types_dag
-    return any(filter(lambda x: isinstance(data, x), iter(types_dag)))
+    return _is_data_registered_as(data, TYPE_DAGNODE)
 
 
 def get_data_type(data):
     if data is None:
         return TYPE_NONE
-    if is_data_basic(data):
-        return TYPE_BASIC
-    if is_data_list(data):
-        return TYPE_LIST
-    # It is important to check pymel data before complex data since basically,
-    # pymel.PyNode and pymel.PyNode are complex datatypes themselfs.
-    if is_data_pymel(data):
-        return TYPE_DAGNODE
-    if is_data_complex(data):
-        return TYPE_COMPLEX
 
-    raise NotImplementedError("Unsupported object type {0} ({1})".format(data, type(data)))
+    data_cls = type(data)
+    data_type = _types_cache.get(data_cls)
+    if data_type is not None:
+        return data_type
 
+    data_type = _resolve_type(data_cls)
+    if data_type is None:
+        # Any unregistered class instance is considered complex.
+        if not hasattr(data, '__dict__'):
+            raise NotImplementedError("Unsupported object type {0} ({1})".format(data, type(data)))
+        data_type = TYPE_COMPLEX
 
-def export_dict(data, skip_None=True, recursive=True, cache=None, **args):
+    _types_cache[data_cls] = data_type
+    return data_type
+
+
+#
+# Class plans
+# Everything we need to know about a class to export or import it's instances is computed once per class.
+#
+
+#
+# Construction strategies
+# By default, imported instances are created by calling their class constructor.
+# A class can opt-in to bypass it's constructor with register_construction.
+#
+
+# Map a registered class to it's construction strategy.
+_constructions_registry = {}
+
+
+def register_construction(cls, strategy):
     """
-    Export an object instance (data) into a dictionary of basic data types (including pymel.Pynode and pymel.Attribute).
+    Define how the imported instances of a class (and of it's subclasses) are created.
+    CONSTRUCT_INIT call the class constructor, this is the default.
+    CONSTRUCT_NEW only call cls.__new__, the constructor is never called.
+    This is a lot faster for classes with expensive constructors since their state is overwritten by the import anyway.
+    :param cls: The class to register.
+    :param strategy: CONSTRUCT_INIT or CONSTRUCT_NEW.
+    """
+    if strategy not in (CONSTRUCT_INIT, CONSTRUCT_NEW):
+        raise ValueError("Unsupported construction strategy {0} for {1}".format(strategy, cls))
+    _constructions_registry[cls] = strategy
+    invalidate_class_plans()
 
-    Args:
-        data: An instance of the build-in python class object.
-        skip_None: Don't store an attribute if is value is None.
-        recursive: Export recursively embedded instances of object in (excluding protected and private properties).
-        **args:
 
-    Returns: A dict instance containing only basic data types.
+def unregister_construction(cls):
     """
-    if cache is None:
-        from cache import Cache
-        cache = Cache()
+    Remove a class previously registered with register_construction.
+    :param cls: The class to unregister.
+    """
+    _constructions_registry.pop(cls, None)
+    invalidate_class_plans()
+
 
-    # Check if we already exported this data.
-    # This allow us to support cyclic references.
-    data_id = id(data)
-    result = cache.get_import_value_by_id(data_id)
-    if result is not None:
-        print("Using cache for {0}".format(data))
+def get_construction(cls):
+    """
+    Resolve the construction strategy of a class by inspecting it's method resolution order.
+    :param cls: A class definition.
+    :return: CONSTRUCT_INIT or CONSTRUCT_NEW.
+    """
+    for base_cls in cls.__mro__:
+        strategy = _constructions_registry.get(base_cls)
+        if strategy is not None:
+            return strategy
+    return CONSTRUCT_INIT
+
+
+class ClassPlan(object):
+    """
+    Cached information necessary to export and import the instances of a specific class.
+    Plans are created the first time a class is encountered, see get_class_plan.
+    The plan only hold a weak reference to it's class, so the cache never keep a class alive.
+    """
+    def __init__(self, cls):
+        self._cls = weakref.ref(cls)
+        # The metadata shared by every exported instance.
+        self.header = {
+            '_class': cls.__name__,
+            '_class_namespace': get_class_namespace(cls),
+            '_class_module': get_class_module_root(cls),
+        }
+        self.iter_items = self._iter_dict_items if issubclass(cls, dict) else self._iter_instance_items
+        self.construction = get_construction(cls)
+
+    def __repr__(self):
+        return '<ClassPlan {0}>'.format(self.header['_class_namespace'])
+
+    @property
+    def cls(self):
+        return self._cls()
+
+    @staticmethod
+    def _iter_dict_items(data):
+        # Ignore private keys (starting with an underscore)
+        return [(key, val) for key, val in data.items() if key[0] != '_']
+
+    @staticmethod
+    def _iter_instance_items(data):
+        # Ignore private keys (starting with an underscore)
+        return [(key, val) for key, val in data.__dict__.items() if key[0] != '_']
+
+    def export_header(self, data):
+        """
+        Create the dictionary that will hold the exported representation of an instance.
+        :param data: An instance of the plan class.
+        :return: A dict instance containing the metadata necessary to rebuild the instance.
+        """
+        result = self.header.copy()
+        result['_uid'] = id(data)
         return result
 
-    data_type = get_data_type(data)
-    # object instance
-    if data_type == TYPE_COMPLEX:
-        data_cls = data.__class__
-        result = {
-            '_class': data_cls.__name__,
-            '_class_namespace': get_class_namespace(data_cls),
-            '_class_module': get_class_module_root(data_cls),
+    def create_instance(self):
+        """
+        Create an instance of the plan class.
+        :return: A class instance or None if the constructor failed.
+        """
+        cls = self._cls()
+        try:
+            if self.construction == CONSTRUCT_NEW:
+                return cls.__new__(cls)
+            return cls()
+        except Exception as e:
+            logging.error("Fatal error creating '{0}' instance: {1}".format(cls, str(e)))
+            return None
+
+    def reserve_attributes(self, instance, keys):
+        """
+        Insert the attributes of an instance created without it's constructor in a single update.
+        Their values are assigned later. Since the keys are always inserted in the same order,
+        the instances of the same class can share their keys dictionary (python 3).
+        :param instance: An instance created by create_instance.
+        :param keys: The name of the attributes that will be assigned.
+        """
+        instance.__dict__.update(dict.fromkeys(sorted(keys)))
+
+
+# The plans by class, a plan is forgotten when it's class is deleted (ex: an outdated definition after a reload).
+_class_plans = weakref.WeakKeyDictionary()
+
+
+def get_class_plan(cls):
+    """
+    Resolve the plan used to export and import the instances of a class.
+    :param cls: A class definition.
+    :return: A ClassPlan instance.
+    """
+    try:
+        return _class_plans[cls]
+    except KeyError:
+        plan = _class_plans[cls] = ClassPlan(cls)
+        return plan
+
+
+def invalidate_class_plans(cls=None):
+    """
+    Forget the cached plan of a class, or of all classes if no class is provided.
+    This is automatically done when we detect that a class was reloaded.
+    :param cls: A class definition.
+    """
+    if cls is None:
+        _class_plans.clear()
+    else:
+        _class_plans.pop(cls, None)
+
+
+def resolve_class_plan(cls_path, cls_module, cache):
+    """
+    Resolve the plan of a serialized class from it's exported metadata.
+    :param cls_path: The exported '_class' value.
+    :param cls_module: The exported '_class_module' value if any.
+    :param cache: A Cache instance used to resolve the class definition.
+    :return: A ClassPlan instance or None if the class cannot be found.
+    """
+    cls_name = cls_path.split('.')[-1]
+
+    # HACK: Previously we were storing the complete class namespace.
+    # However this was not very flexible when we played with the class hierarchy.
+    # If we find a '_class_module' attribute, it mean we are doing thing the new way.
+    # Otherwise we'll let it slip for now.
+    if cls_module:
+        cls_def = cache.get_class_by_name(cls_name, module_name=cls_module)
+    else:
+        cls_def = cache.get_class_by_namespace(cls_name)
+
+    if cls_def is None:
+        return None
+    return cache.get_class_plan(cls_def)
+
+
+class ClassTable(object):
+    """
+    Collect the classes of the exported objects in a table.
+    This allow each exported object to only store the index of it's class in the table instead of it's metadata.
+    """
+    def __init__(self):
+        self.indexes = {}
+        # The metadata of each class, in the order they were encountered.
+        self.entries = []
+
+    def export_header(self, plan, data):
+        try:
+            index = self.indexes[plan]
+        except KeyError:
+            index = self.indexes[plan] = len(self.entries)
+            self.entries.append(plan.header.copy())
+        return {
+            '_class_index': index,
             '_uid': id(data)
         }
 
-        # Cache it as soon as possible since we might use recursivity.
-        cache.set_import_value_by_id(data_id, result)
 
-        for key, val in (data.items() if isinstance(data, dict) else data.__dict__.items()):  # TODO: Clean
-            # Ignore private keys (starting with an underscore)
-            if key[0] == '_':
-                continue
+def is_class_table_document(data):
+    """
+    Check if the provided value is a document exported with a class table.
+    ex: {'_classes': [{'_class': 'A', ...}], '_root': {'_class_index': 0, '_uid': 1, ...}}
+    """
+    return isinstance(data, dict) and '_classes' in data and '_root' in data
 
-            if not skip_None or val is not None:
-                if (data_type == TYPE_COMPLEX and recursive is True) or data_type == TYPE_LIST:
-                    val = export_dict(val, skip_None=skip_None, recursive=recursive, cache=cache, **args)
-                if not skip_None or val is not None:
-                    result[key] = val
-    else:
+
+def is_object_table_document(data):
+    """
+    Check if the provided value is a document containing a flat table of objects, see incremental.IncrementalExporter.
+    ex: {'_objects': [{'_class': 'A', '_uid': 1, 'child': {'_ref': 2}}, ...], '_root': {'_ref': 1}}
+    """
+    return isinstance(data, dict) and '_objects' in data and '_root' in data
+
+
+#
+# Traversal
+#
+
+class _DictExporter(object):
+    """
+    Export an object graph to basic data types without recursion.
+    Complex objects and lists are created empty and are filled later when their stack frame is processed.
+    """
+    def __init__(self, skip_None, cache, references=False, class_table=False):
+        self.skip_None = skip_None
+        self.cache = cache
+        # If we are preserving references, remember the uid of each exported complex object by it's id.
+        self.uids = {} if references else None
+        self.class_table = ClassTable() if class_table else None
+        # Local plans lookup, this save us from hashing the class in the global plans cache for each object.
+        self.plans = {}
+        # Each stack frame contain an iterator on the values to export and the container that will receive them.
+        self.stack = []
+
+    def get_plan(self, cls):
+        try:
+            return self.plans[cls]
+        except KeyError:
+            plan = self.plans[cls] = get_class_plan(cls)
+            return plan
+
+    def export_header(self, plan, data):
+        if self.class_table is None:
+            return plan.export_header(data)
+        return self.class_table.export_header(plan, data)
+
+    def export_value(self, data):
+        data_type = get_data_type(data)
 
         # Handle other types of data
-        if data_type == TYPE_BASIC:
-            result = data
+        if data_type == TYPE_BASIC or data_type == TYPE_DAGNODE:
+            return data
+
+        if data_type == TYPE_NONE:
+            logging.warning("[exportToBasicData] Unsupported type {0} ({1}) for {2}".format(type(data), data_type, data))
+            return None
+
+        data_id = id(data)
+
+        if instrumentation.enabled and data_type == TYPE_COMPLEX:
+            instrumentation.emit(instrumentation.EVENT_OBJECT, data.__class__)
+
+        # When preserving references, complex objects are only exported the first time they are encountered.
+        if data_type == TYPE_COMPLEX and self.uids is not None:
+            return self.export_complex_once(data, data_id)
+
+        # Check if we already exported this data.
+        # This allow us to support cyclic references.
+        result = self.cache.get_import_value_by_id(data_id)
+        if result is not None:
+            return result
+
+        # object instance
+        if data_type == TYPE_COMPLEX:
+            plan = self.get_plan(data.__class__)
+            result = self.export_header(plan, data)
+            # Cache it as soon as possible since we might encounter it again while exporting it's content.
+            self.cache.set_import_value_by_id(data_id, result)
+            self.stack.append((iter(plan.iter_items(data)), result, False))
 
         # Handle iterable
-        elif data_type == TYPE_LIST:
-            result = [export_dict(v, skip_None=skip_None, cache=cache, **args) for v in data if not skip_None or v is not None]
+        else:
+            result = []
+            self.cache.set_import_value_by_id(data_id, result)
+            self.stack.append((iter(data), result, True))
 
-        elif data_type == TYPE_DAGNODE:
-            result = data
+        return result
 
+    def export_complex_once(self, data, data_id):
+        """
+        Export a complex object or a reference to it if it was already exported.
+        Since the uid are attributed in the order the objects are encountered, they are stable between exports.
+        """
+        uid = self.uids.get(data_id)
+        if uid is not None:
+            return {'_ref': uid}
+
+        uid = self.uids[data_id] = len(self.uids) + 1
+        plan = self.get_plan(data.__class__)
+        result = self.export_header(plan, data)
+        result['_uid'] = uid
+        self.stack.append((iter(plan.iter_items(data)), result, False))
+        return result
+
+    def export_shallow(self, data):
+        """
+        Export a complex object without exporting it's attributes values.
+        """
+        data_id = id(data)
+        result = self.cache.get_import_value_by_id(data_id)
+        if result is not None:
+            return result
+
+        plan = self.get_plan(data.__class__)
+        result = self.export_header(plan, data)
+        self.cache.set_import_value_by_id(data_id, result)
+        skip_None = self.skip_None
+        for key, val in plan.iter_items(data):
+            if not skip_None or val is not None:
+                result[key] = val
+        return result
+
+    def run(self, data):
+        result = self.export_value(data)
+        self.fill_containers()
+        return result
+
+    def fill_containers(self):
+        """
+        Export the values of the complex objects and lists that are waiting in the stack.
+        """
+        skip_None = self.skip_None
+        export_value = self.export_value
+        stack = self.stack
+
+        # We always process the last frame, this preserve the order in which the objects are visited.
+        while stack:
+            depth = len(stack)
+            values, container, is_list = stack[-1]
+            for val in values:
+                if is_list:
+                    if not skip_None or val is not None:
+                        container.append(export_value(val))
+                else:
+                    key, val = val
+                    if not skip_None or val is not None:
+                        val = export_value(val)
+                        if not skip_None or val is not None:
+                            container[key] = val
+
+                # If a new container was found, we need to fill it before continuing.
+                if len(stack) != depth:
+                    break
+            else:
+                stack.pop()
+
+
+class _UnresolvedReference(object):
+    """
+    Placeholder for a reference to an instance that was not imported yet.
+    """
+    def __init__(self, uid):
+        self.uid = uid
+
+
+class _DictImporter(object):
+    """
+    Import basic data types exported by export_dict without recursion.
+    Class instances and lists are created empty and are filled later when their stack frame is processed.
+    """
+    def __init__(self, cache):
+        self.cache = cache
+        # Local plans lookup by class name and module, the class of each plan is resolved once per import.
+        self.plans = {}
+        # Remember the values we already imported.
+        # This ensure that a dict or a list shared by multiple objects (or cyclic) is only imported once.
+        self.imported = {}
+        # The plans of the document class table if any.
+        self.class_table = None
+        # Remember the instances by their exported uid to resolve references.
+        self.instances_by_uid = {}
+        # References encountered before the instance they point to, resolved once everything is imported.
+        self.unresolved = []
+        # Each stack frame contain an iterator on the values to import and the container that will receive them.
+        self.stack = []
+
+    def get_plan(self, cls_path, cls_module):
+        key = (cls_path, cls_module)
+        try:
+            return self.plans[key]
+        except KeyError:
+            plan = self.plans[key] = resolve_class_plan(cls_path, cls_module, self.cache)
+            return plan
+
+    def set_class_table(self, entries):
+        """
+        Resolve the classes of a document class table, each class is only resolved once.
+        """
+        self.class_table = []
+        for entry in entries:
+            cls_path = entry['_class']
+            plan = self.get_plan(cls_path, entry.get('_class_module', None))
+            if plan is None:
+                logging.error("Can't resolve class {0}, did you import to module?".format(cls_path))
+            self.class_table.append(plan)
+
+    def import_instance(self, data, plan, cls_path):
+        data_id = id(data)
+        try:
+            return self.imported[data_id]
+        except KeyError:
+            pass
+
+        if plan is None:
+            logging.error("Can't create class instance for {0}, did you import to module?".format(cls_path))
+            return None
+
+        if instrumentation.enabled:
+            instrumentation.emit(instrumentation.EVENT_OBJECT, plan.cls)
+
+        instance = plan.create_instance()
+        self.imported[data_id] = instance
+        uid = data.get('_uid')
+        if uid is not None:
+            self.instances_by_uid[uid] = instance
+        if instance is not None:
+            if plan.construction == CONSTRUCT_NEW:
+                plan.reserve_attributes(instance, [key for key in data if key != '_class' and key != '_class_index'])
+            self.stack.append((iter(data.items()), instance.__dict__, False))
+        return instance
+
+    def import_value(self, data):
+        if isinstance(data, dict) and '_class' in data:
+            # Handle Serializable object
+            cls_path = data['_class']
+            return self.import_instance(data, self.get_plan(cls_path, data.get('_class_module', None)), cls_path)
+
+        # Handle Serializable object which class is in the document class table
+        elif isinstance(data, dict) and '_class_index' in data and self.class_table is not None:
+            cls_index = data['_class_index']
+            return self.import_instance(data, self.class_table[cls_index], cls_index)
+
+        # Handle reference to a Serializable object
+        elif isinstance(data, dict) and '_ref' in data:
+            uid = data['_ref']
+            try:
+                return self.instances_by_uid[uid]
+            except KeyError:
+                # The order of the keys is not guaranteed, we might encounter a reference before it's instance.
+                return _UnresolvedReference(uid)
+
+        # Handle array
+        elif is_data_list(data):
+            data_id = id(data)
+            try:
+                return self.imported[data_id]
+            except KeyError:
+                pass
+
+            result = []
+            self.imported[data_id] = result
+            self.stack.append((iter(data), result, True))
+            return result
+
+        # Handle other types of data
         else:
-            logging.warning("[exportToBasicData] Unsupported type {0} ({1}) for {2}".format(type(data), data_type, data))
-            result = None
+            return data
+
+    def run(self, data):
+        import_value = self.import_value
+        stack = self.stack
+
+        result = import_value(data)
+
+        while stack:
+            depth = len(stack)
+            values, container, is_list = stack[-1]
+            for val in values:
+                if is_list:
+                    key = len(container)
+                    val = import_value(val)
+                    container.append(val)
+                else:
+                    key, val = val
+                    if key == '_class' or key == '_class_index':
+                        continue
+                    val = container[key] = import_value(val)
+
+                if isinstance(val, _UnresolvedReference):
+                    self.unresolved.append((container, key, val.uid))
+
+                # If a new container was found, we need to fill it before continuing.
+                if len(stack) != depth:
+                    break
+            else:
+                stack.pop()
+
+        for container, key, uid in self.unresolved:
+            instance = self.instances_by_uid.get(uid)
+            if instance is None:
+                logging.error("Can't resolve reference to {0}, the instance was not found.".format(uid))
+            container[key] = instance
 
-        cache.set_import_value_by_id(data_id, result)
+        return result
 
-    return result
 
+def export_dict(data, skip_None=True, recursive=True, cache=None, references=False, class_table=False, **args):
+    """
+    Export an object instance (data) into a dictionary of basic data types (including pymel.Pynode and pymel.Attribute).
+
+    The object graph is traversed depth-first using an explicit stack instead of recursion.
+    This allow us to export graphs of any depth without hitting the recursion limit.
+
+    Args:
+        data: An instance of the build-in python class object.
+        skip_None: Don't store an attribute if is value is None.
+        recursive: Export recursively embedded instances of object in (excluding protected and private properties).
+        references: If True, a complex object encountered multiple times is only exported once.
+            It's next occurrences are exported as a {'_ref': uid} dict that point to the '_uid' of the first one.
+            This make the result a tree that is safe to dump in json even with cyclic references.
+        class_table: If True, the result is a {'_classes': [...], '_root': ...} document.
+            The metadata of each class is only stored once in '_classes'
+            and the complex objects only store the index of their class in a '_class_index' key.
+        **args:
+
+    Returns: A dict instance containing only basic data types.
+    """
+    if cache is None:
+        from cache import Cache
+        cache = Cache()
+
+    exporter = _DictExporter(skip_None, cache, references=references, class_table=class_table)
+
+    # If we are not exporting recursively, we only need the object attributes as they are.
+    if not recursive and get_data_type(data) == TYPE_COMPLEX:
+        result = exporter.export_shallow(data)
+    else:
+        result = exporter.run(data)
+
+    if class_table:
+        return {
+            '_classes': exporter.class_table.entries,
+            '_root': result
+        }
+    return result
 
 
 def import_dict(data, cache=None, **kwargs):
     """
     Rebuild any instance of a python object instance that have been serialized using export_dict.
+    References exported using the references option are resolved to the same instance.
+    Documents exported using the class_table option are supported, each class is only resolved once.
+    Documents containing a flat table of objects (see incremental.IncrementalExporter) are also supported.
+
+    Like export_dict, the data is traversed depth-first using an explicit stack instead of recursion.
 
     Args:
         _data: A dict instance containing only basic data types.
@@ -221,39 +779,75 @@ def import_dict(data, cache=None, **kwargs):
         from cache import Cache
         cache = Cache()
 
-    #assert (data is not None)
-    if isinstance(data, dict) and '_class' in data:
-        # Handle Serializable object
-        cls_path = data['_class']
-        cls_name = cls_path.split('.')[-1]
-        cls_module = data.get('_class_module', None)
-        #cls_namespace = data.get('_class_namespace')
-
-        # HACK: Previously we were storing the complete class namespace.
-        # However this was not very flexible when we played with the class hierarchy.
-        # If we find a '_class_module' attribute, it mean we are doing thing the new way.
-        # Otherwise we'll let it slip for now.
-
-        if cls_module:
-            cls_def = cache.get_class_by_name(cls_name, module_name=cls_module)
-        else:
-            cls_def = cache.get_class_by_namespace(cls_name)
+    importer = _DictImporter(cache)
+    if is_class_table_document(data):
+        importer.set_class_table(data['_classes'])
+        data = data['_root']
+    elif is_object_table_document(data):
+        # Import every objects first, the root only contain references to them.
+        importer.run(data['_objects'])
+        data = data['_root']
+    return importer.run(data)
 
-        if cls_def is None:
-            logging.error("Can't create class instance for {0}, did you import to module?".format(cls_path))
-            return None
 
-        instance = create_class_instance(cls_def)
+def export_many(values, cache=None, **kwargs):
+    """
+    Export multiple object instances using export_dict.
+    Each instance is exported to an independent document, only the class resolution is shared
+    so each class is only resolved once.
+    :param values: An iterable of object instances.
+    :param cache: The Cache which class resolution is shared by every export, see Cache.fork.
+    :param kwargs: Any keyword arguments supported by export_dict.
+    :return: A list containing the export_dict result of each instance.
+    """
+    if cache is None:
+        from cache import Cache
+        cache = Cache()
 
-        for key, val in data.items():
-            if key != '_class':
-                instance.__dict__[key] = import_dict(val, cache=cache)
-        return instance
+    return [export_dict(value, cache=cache.fork(), **kwargs) for value in values]
 
-    # Handle array
-    elif is_data_list(data):
-        return [import_dict(v, cache=cache) for v in data]
 
-    # Handle other types of data
-    else:
-        return data
+def import_many(values, cache=None, **kwargs):
+    """
+    Import multiple values exported by export_dict or export_many.
+    Like export_many, only the class resolution is shared so each class is only resolved once.
+    :param values: An iterable of export_dict results.
+    :param cache: The Cache which class resolution is shared by every import, see Cache.fork.
+    :param kwargs: Any keyword arguments supported by import_dict.
+    :return: A list containing the imported object instance of each value.
+    """
+    if cache is None:
+        from cache import Cache
+        cache = Cache()
+
+    return [import_dict(value, cache=cache.fork(), **kwargs) for value in values]
+
+
+def map_with_pool(fn, values, workers=None, threads=False):
+    """
+    Apply a function to each value, optionally using a pool of processes or threads.
+    When using a pool of processes, the function need to be defined at the module level
+    and the values need to be picklable.
+    :param fn: The function to apply.
+    :param values: An iterable of values.
+    :param workers: The number of processes to use. If None or 1, everything is done in the current process.
+    If 0, one process is used for each cpu.
+    :param threads: If True, a pool of threads is used instead of a pool of processes.
+    This is useful to overlap file operations.
+    :return: A list containing the result of each value, in the same order.
+    """
+    if workers is None or workers == 1:
+        return [fn(value) for value in values]
+
+    import multiprocessing
+    import multiprocessing.pool
+    values = list(values)
+    workers = workers or multiprocessing.cpu_count()
+    # Send the values in chunks, the cost of the inter-process communication is paid per chunk.
+    chunksize = max(1, len(values) // (workers * 4))
+    pool = multiprocessing.pool.ThreadPool(workers) if threads else multiprocessing.Pool(workers)
+    try:
+        return pool.map(fn, values, chunksize)
+    finally:
+        pool.close()
+        pool.join()
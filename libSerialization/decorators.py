@@ -1,33 +1,117 @@
-import collections
 import functools
+import collections
+
+# The default number of values a memoized function or method remember.
+DEFAULT_MAXSIZE = 1024
+
+CacheInfo = collections.namedtuple('CacheInfo', ('hits', 'misses', 'evictions', 'maxsize', 'currsize'))
+
+
+class _LRUCache(object):
+    """
+    Caches a function's return value each time it is called.
+    If called later with the same arguments, the cached value is returned (not reevaluated).
+    When the cache is full, the least recently used value is discarded.
+    """
+    def __init__(self, func, maxsize=DEFAULT_MAXSIZE):
+        self.func = func
+        self.maxsize = maxsize
+        self.cache = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _call(self, args, kwargs):
+        return self.func(*args, **kwargs)
+
+    def __call__(self, *args, **kwargs):
+        # Include kwargs
+        # src: http://stackoverflow.com/questions/6407993/how-to-memoize-kwargs
+        key = (args, frozenset(kwargs.items())) if kwargs else args
+        cache = self.cache
+        try:
+            value = cache.pop(key)
+        except KeyError:
+            pass
+        except TypeError:
+            # uncacheable. a list, for instance.
+            # better to not cache than blow up.
+            return self._call(args, kwargs)
+        else:
+            # Move the value at the end since it is now the most recently used.
+            cache[key] = value
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = cache[key] = self._call(args, kwargs)
+        if len(cache) > self.maxsize:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def cache_info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self.cache))
+
+    def cache_clear(self):
+        self.cache.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+class _LRUCacheMethod(_LRUCache):
+    """
+    A memoized method bound to a specific instance.
+    The instance and it's cache reference each other, they are released together by the garbage collector.
+    """
+    def __init__(self, func, obj, maxsize=DEFAULT_MAXSIZE):
+        super(_LRUCacheMethod, self).__init__(func, maxsize=maxsize)
+        self.obj = obj
+
+    def _call(self, args, kwargs):
+        return self.func(self.obj, *args, **kwargs)
+
 
-# src: https://wiki.python.org/moin/PythonDecoratorLibrary#Memoize
-# modified to support kwargs
 class memoized(object):
     '''Decorator. Caches a function's return value each time it is called.
     If called later with the same arguments, the cached value is returned
     (not reevaluated).
+
+    When decorating a method, each instance have it's own cache that is released with the instance.
+    The caches are bounded, the least recently used values are discarded first.
+    The cache statistics are available using cache_info().
+
+    >>> @memoized
+    ... def fn(a): pass
+    >>> @memoized(maxsize=16)
+    ... def fn(a): pass
     '''
 
-    def __init__(self, func):
+    def __init__(self, func=None, maxsize=DEFAULT_MAXSIZE):
+        self.func = func
+        self.maxsize = maxsize
+        self.cache = None
+        if func is not None:
+            self._set_func(func)
+
+    def _set_func(self, func):
         self.func = func
-        self.cache = {}
+        self.__name__ = func.__name__
+        self.__doc__ = func.__doc__
+        self.cache = _LRUCache(func, maxsize=self.maxsize)
 
     def __call__(self, *args, **kwargs):
-        if not isinstance(args, collections.Hashable):
-            # uncacheable. a list, for instance.
-            # better to not cache than blow up.
-            return self.func(*args)
+        # Support @memoized(maxsize=...)
+        if self.func is None:
+            self._set_func(args[0])
+            return self
 
-        # Include kwargs
-        # src: http://stackoverflow.com/questions/6407993/how-to-memoize-kwargs
-        key = (args, frozenset(kwargs.items()))
-        if key in self.cache:
-            return self.cache[key]
-        else:
-            value = self.func(*args, **kwargs)
-            self.cache[key] = value
-            return value
+        return self.cache(*args, **kwargs)
+
+    def cache_info(self):
+        return self.cache.cache_info()
+
+    def cache_clear(self):
+        self.cache.cache_clear()
 
     def __repr__(self):
         """Return the function's docstring."""
@@ -35,4 +119,12 @@ class memoized(object):
 
     def __get__(self, obj, objtype):
         """Support instance methods."""
-        return functools.partial(self.__call__, obj)
\ No newline at end of file
+        if obj is None:
+            return self
+
+        # Store the bound cache on the instance. Since we are a non-data descriptor,
+        # the next lookups will directly return it without calling __get__.
+        method = _LRUCacheMethod(self.func, obj, maxsize=self.maxsize)
+        functools.update_wrapper(method, self.func)
+        obj.__dict__[self.func.__name__] = method
+        return method
@@ -0,0 +1,311 @@
+#
+# Incremental json export.
+# The object graph is exported as a flat table of objects in which the nested objects are replaced by references.
+# Each object is encoded separately and it's encoded fragment is reused as long as the object don't change.
+# When the caller provide the objects that changed, only these are exported again.
+# This allow the same object graph to be exported repeatedly (ex: autosave) while only encoding what changed,
+# either as a complete document or as a delta containing only the changed objects.
+#
+# Document: {"_generation": 2, "_objects": [{"_class": "A", "_uid": 1, "child": {"_ref": 2}}, ...], "_root": {"_ref": 1}}
+# Delta: {"_base": 2, "_generation": 3, "_objects": [<changed objects>], "_removed": [<uids>], "_root": {"_ref": 1}}
+#
+import os
+import json
+import collections
+import core
+
+__all__ = (
+    'IncrementalExporter',
+    'apply_delta'
+)
+
+
+def _make_dir(path):
+    path_dir = os.path.dirname(path)
+
+    # Create destination folder if needed
+    if not os.path.exists(path_dir):
+        os.makedirs(path_dir)
+
+
+class _FragmentExporter(core._DictExporter):
+    """
+    Export the objects of an IncrementalExporter one at a time, the nested complex objects are exported as references.
+    """
+    def __init__(self, exporter, skip_None, cache):
+        super(_FragmentExporter, self).__init__(skip_None, cache)
+        self.exporter = exporter
+
+    def export_value(self, data):
+        data_type = core.get_data_type(data)
+        if data_type == core.TYPE_BASIC or data_type == core.TYPE_DAGNODE:
+            return data
+        if data_type == core.TYPE_COMPLEX:
+            return self.exporter.get_reference(data)
+        # Lists that only contain basic values (ex: a list of floats) are copied as is.
+        if data_type == core.TYPE_LIST and all(type(val) in core.PLAIN_TYPES for val in data):
+            return list(data)
+        return super(_FragmentExporter, self).export_value(data)
+
+    def export_fragment(self, data, uid):
+        plan = self.get_plan(data.__class__)
+        result = self.export_header(plan, data)
+        result['_uid'] = uid
+        self.stack.append((iter(plan.iter_items(data)), result, False))
+        self.fill_containers()
+        return result
+
+
+class IncrementalExporter(object):
+    """
+    Export the same object graph multiple times, only the objects that changed since the last export are encoded.
+    The exported objects keep the same uid from one export to another.
+
+    By default, finding what changed require to export every object to a dict and compare it with the previous
+    export, this is cheaper than encoding them but still scale with the size of the graph.
+    When the caller know which objects changed, it can provide them as the 'dirty' objects.
+    Only these objects and the new objects they reference are exported, the others are never visited.
+    Since an object that changed without being marked as dirty would be missed, the dirty objects are only trusted
+    for a limited number of consecutive updates, then a full compare is done (see verify_interval).
+
+    >>> exporter = IncrementalExporter()
+    >>> exporter.export_json_file(rig, '/tmp/rig.json')
+    >>> exporter.export_json_delta_file(rig, '/tmp/rig.1.json', dirty=[rig.arm])
+    >>> import_json_file('/tmp/rig.json', deltas=['/tmp/rig.1.json'])
+    """
+    def __init__(self, skip_None=True, cls=None, verify_interval=10, **kwargs):
+        """
+        :param skip_None: See export_dict.
+        :param cls: The JSONEncoder class used to encode the objects.
+        :param verify_interval: The number of consecutive updates for which the dirty objects are trusted.
+        The next update compare every object, this ensure that a change made to an object that was not marked
+        as dirty is never lost for long. If 0, the dirty objects are always trusted.
+        :param kwargs: Any keyword arguments supported by the JSONEncoder, except indent.
+        """
+        self.skip_None = skip_None
+        self.verify_interval = verify_interval
+        # The number of consecutive updates that trusted the dirty objects.
+        self.num_trusted = 0
+        kwargs['indent'] = None
+        self.encoder = (cls or json.JSONEncoder)(**kwargs)
+        self.generation = 0
+        # The exported objects by their uid. Keeping them alive ensure that their id is not reused.
+        self.objects = {}
+        self.uids_by_id = {}
+        self.last_uid = 0
+        # The last exported fragment of each object by their uid, it's encoded text and the uids it reference.
+        self.fragments = {}
+        self.texts = {}
+        self.refs = {}
+        self.root = None
+        self.root_text = None
+        # The uids referenced by the root (the root can be an object or a list of objects).
+        self.root_refs = frozenset()
+        # The objects changed and removed by the last update.
+        self.changed = []
+        self.removed = []
+        # The uid of the objects encountered during an update and the ones left to export.
+        self._visited = set()
+        self._pending = []
+        # If False, only the new objects are visited when they are referenced.
+        self._visit_all = True
+        # The uids referenced by the fragment being exported.
+        self._refs = set()
+
+    def _visit(self, uid):
+        if uid not in self._visited:
+            self._visited.add(uid)
+            self._pending.append(uid)
+
+    def get_reference(self, data):
+        data_id = id(data)
+        uid = self.uids_by_id.get(data_id)
+        if uid is None:
+            self.last_uid += 1
+            uid = self.uids_by_id[data_id] = self.last_uid
+            self.objects[uid] = data
+            self._visit(uid)
+        elif self._visit_all:
+            self._visit(uid)
+        self._refs.add(uid)
+        return {'_ref': uid}
+
+    def _get_unreachable(self, root_refs):
+        """
+        :param root_refs: The uids referenced by the root.
+        :return: The uids of the objects that can't be reached from the root anymore.
+        """
+        reached = set(root_refs)
+        stack = list(root_refs)
+        while stack:
+            for uid in self.refs.get(stack.pop(), ()):
+                if uid not in reached:
+                    reached.add(uid)
+                    stack.append(uid)
+        return [uid for uid in self.objects if uid not in reached]
+
+    def update(self, data, dirty=None):
+        """
+        Export an object graph, only the objects that changed since the last update are encoded.
+        :param data: The object instance to export.
+        :param dirty: If provided, only these objects (and the new objects they reference) are exported,
+        the other objects are considered unchanged. Ignored on the first update and when a full compare is due,
+        see verify_interval.
+        :return: A 2-tuple containing the uids of the changed (or new) objects and the uids of the removed objects.
+        """
+        from cache import Cache
+
+        incremental = dirty is not None and self.root is not None
+        if incremental and self.verify_interval and self.num_trusted >= self.verify_interval:
+            incremental = False
+        self.num_trusted = self.num_trusted + 1 if incremental else 0
+
+        self._visit_all = not incremental
+        self._visited = set()
+        self._pending = []
+        self._refs = set()
+        exporter = _FragmentExporter(self, self.skip_None, Cache())
+        encode = self.encoder.encode
+
+        root = exporter.run(data)
+        # If some references are lost, some objects may not be part of the graph anymore.
+        root_refs = frozenset(self._refs)
+        refs_lost = not self.root_refs <= root_refs
+        self.root_refs = root_refs
+        if root != self.root or self.root_text is None:
+            self.root = root
+            self.root_text = encode(root)
+
+        if incremental:
+            for obj in dirty:
+                uid = self.uids_by_id.get(id(obj))
+                # An unknown object is only part of the graph if a dirty object reference it.
+                if uid is not None:
+                    self._visit(uid)
+
+        changed = []
+        pending = self._pending
+        while pending:
+            uid = pending.pop()
+            self._refs = set()
+            fragment = exporter.export_fragment(self.objects[uid], uid)
+            refs = frozenset(self._refs)
+            old_refs = self.refs.get(uid)
+            if old_refs is not None and not old_refs <= refs:
+                refs_lost = True
+            self.refs[uid] = refs
+            if fragment != self.fragments.get(uid):
+                self.fragments[uid] = fragment
+                self.texts[uid] = encode(fragment)
+                changed.append(uid)
+
+        # Forget the objects that are not part of the graph anymore.
+        if not incremental:
+            removed = [uid for uid in self.objects if uid not in self._visited]
+        elif refs_lost:
+            removed = self._get_unreachable(root_refs)
+        else:
+            removed = []
+        for uid in removed:
+            del self.uids_by_id[id(self.objects.pop(uid))]
+            del self.fragments[uid]
+            del self.texts[uid]
+            del self.refs[uid]
+
+        self.generation += 1
+        self.changed = sorted(changed)
+        self.removed = sorted(removed)
+        self._visited = set()
+        self._visit_all = True
+        return self.changed, self.removed
+
+    def _encode_document(self, items):
+        key_separator = self.encoder.key_separator
+        return '{' + self.encoder.item_separator.join(
+            '"{0}"{1}{2}'.format(key, key_separator, text) for key, text in items
+        ) + '}'
+
+    def _encode_objects(self, uids):
+        return '[' + self.encoder.item_separator.join(self.texts[uid] for uid in uids) + ']'
+
+    def get_document(self):
+        """
+        Build the json document of the last update from the encoded fragments.
+        """
+        return self._encode_document((
+            ('_generation', str(self.generation)),
+            ('_objects', self._encode_objects(sorted(self.texts))),
+            ('_root', self.root_text),
+        ))
+
+    def get_delta(self):
+        """
+        Build the json document containing the changes made by the last update.
+        """
+        return self._encode_document((
+            ('_base', str(self.generation - 1)),
+            ('_generation', str(self.generation)),
+            ('_objects', self._encode_objects(self.changed)),
+            ('_removed', self.encoder.encode(self.removed)),
+            ('_root', self.root_text),
+        ))
+
+    def export_json(self, data, dirty=None):
+        self.update(data, dirty=dirty)
+        return self.get_document()
+
+    def export_json_delta(self, data, dirty=None):
+        self.update(data, dirty=dirty)
+        return self.get_delta()
+
+    def export_json_file(self, data, path, mkdir=True, dirty=None):
+        """
+        Export an object graph to a json file, the objects that did not change since the last export are not encoded.
+        :param dirty: See update.
+        """
+        if mkdir:
+            _make_dir(path)
+
+        with open(path, 'w') as fp:
+            fp.write(self.export_json(data, dirty=dirty))
+
+        return True
+
+    def export_json_delta_file(self, data, path, mkdir=True, dirty=None):
+        """
+        Export the changes made to an object graph since the last export to a json file.
+        Use import_json_file with the deltas argument to import it.
+        :param dirty: See update.
+        """
+        if mkdir:
+            _make_dir(path)
+
+        with open(path, 'w') as fp:
+            fp.write(self.export_json_delta(data, dirty=dirty))
+
+        return True
+
+
+def apply_delta(document, delta):
+    """
+    Apply a delta exported by IncrementalExporter to the document of the previous export.
+    :param document: A document (or the result of apply_delta) decoded from json.
+    :param delta: A delta decoded from json.
+    :return: The updated document.
+    """
+    if delta['_base'] != document['_generation']:
+        raise ValueError("Can't apply delta of generation {0} to document of generation {1}.".format(
+            delta['_generation'], document['_generation']
+        ))
+
+    objects = collections.OrderedDict((fragment['_uid'], fragment) for fragment in document['_objects'])
+    for uid in delta['_removed']:
+        objects.pop(uid, None)
+    for fragment in delta['_objects']:
+        objects[fragment['_uid']] = fragment
+
+    return {
+        '_generation': delta['_generation'],
+        '_objects': list(objects.values()),
+        '_root': delta['_root'],
+    }
@@ -0,0 +1,174 @@
+#
+# Opt-in instrumentation of the serialization hot paths.
+# The serializers report events (objects visited, cache lookups, timings, bytes written) to the registered hooks.
+# When no hook is registered, the instrumented code only check the module 'enabled' flag.
+#
+# >>> with collect_stats() as stats:
+# ...     export_json_file(rig, '/tmp/rig.json')
+# >>> print(stats)
+#
+import collections
+import contextlib
+from timeit import default_timer as timer
+
+__all__ = (
+    'Stats',
+    'collect_stats',
+    'register_hook',
+    'unregister_hook',
+)
+
+# The events reported to the hooks, each hook is called with the event, a value and some information.
+EVENT_OBJECT = 'object'  # value: the class of an object visited, info: None
+EVENT_CACHE_HIT = 'cache_hit'  # value: 1, info: the name of the cache
+EVENT_CACHE_MISS = 'cache_miss'  # value: 1, info: the name of the cache
+EVENT_CLASS_RESOLUTION = 'class_resolution'  # value: the duration in seconds, info: None
+EVENT_ENCODE = 'encode'  # value: the duration in seconds, info: the format
+EVENT_DECODE = 'decode'  # value: the duration in seconds, info: the format
+EVENT_BYTES_WRITTEN = 'bytes_written'  # value: the number of bytes, info: the format
+EVENT_BYTES_READ = 'bytes_read'  # value: the number of bytes, info: the format
+
+# True if at least one hook is registered. The instrumented code check it before reporting anything.
+enabled = False
+
+_hooks = []
+
+
+def register_hook(fn):
+    """
+    Register a function that will be called for each instrumentation event.
+    :param fn: A function that receive the event name, it's value and it's information (or None).
+    """
+    global enabled
+    _hooks.append(fn)
+    enabled = True
+
+
+def unregister_hook(fn):
+    """
+    Unregister a function registered with register_hook.
+    """
+    global enabled
+    _hooks.remove(fn)
+    enabled = bool(_hooks)
+
+
+def emit(event, value=1, info=None):
+    for fn in _hooks:
+        fn(event, value, info)
+
+
+class _Measure(object):
+    """
+    Report the duration of a block of code.
+    """
+    __slots__ = ('event', 'info', 'start')
+
+    def __init__(self, event, info):
+        self.event = event
+        self.info = info
+        self.start = None
+
+    def __enter__(self):
+        self.start = timer()
+        return self
+
+    def __exit__(self, *args):
+        emit(self.event, timer() - self.start, self.info)
+
+
+class _NullMeasure(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_null_measure = _NullMeasure()
+
+
+def measure(event, info=None):
+    """
+    Create a context manager that report the duration of it's block, this does nothing if nothing is registered.
+    """
+    if enabled:
+        return _Measure(event, info)
+    return _null_measure
+
+
+class Stats(object):
+    """
+    Accumulate the instrumentation events, register it with register_hook or use collect_stats.
+    """
+    def __init__(self):
+        self.objects = collections.Counter()
+        self.cache_hits = collections.Counter()
+        self.cache_misses = collections.Counter()
+        self.class_resolution_time = 0.0
+        self.encode_time = 0.0
+        self.decode_time = 0.0
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+    def __call__(self, event, value, info):
+        if event == EVENT_OBJECT:
+            self.objects[value] += 1
+        elif event == EVENT_CACHE_HIT:
+            self.cache_hits[info] += value
+        elif event == EVENT_CACHE_MISS:
+            self.cache_misses[info] += value
+        elif event == EVENT_CLASS_RESOLUTION:
+            self.class_resolution_time += value
+        elif event == EVENT_ENCODE:
+            self.encode_time += value
+        elif event == EVENT_DECODE:
+            self.decode_time += value
+        elif event == EVENT_BYTES_WRITTEN:
+            self.bytes_written += value
+        elif event == EVENT_BYTES_READ:
+            self.bytes_read += value
+
+    def get_objects_by_class_name(self):
+        """
+        :return: A dict containing the number of objects visited by class name.
+        """
+        result = collections.Counter()
+        for cls, count in self.objects.items():
+            result['{0}.{1}'.format(cls.__module__, cls.__name__)] += count
+        return dict(result)
+
+    def as_dict(self):
+        return {
+            'objects': self.get_objects_by_class_name(),
+            'cache_hits': dict(self.cache_hits),
+            'cache_misses': dict(self.cache_misses),
+            'class_resolution_time': self.class_resolution_time,
+            'encode_time': self.encode_time,
+            'decode_time': self.decode_time,
+            'bytes_written': self.bytes_written,
+            'bytes_read': self.bytes_read,
+        }
+
+    def __repr__(self):
+        return '<Stats objects={0} cache_hits={1} cache_misses={2} class_resolution={3:.6f}s ' \
+               'encode={4:.6f}s decode={5:.6f}s written={6} read={7}>'.format(
+                   sum(self.objects.values()), sum(self.cache_hits.values()), sum(self.cache_misses.values()),
+                   self.class_resolution_time, self.encode_time, self.decode_time, self.bytes_written, self.bytes_read
+               )
+
+
+@contextlib.contextmanager
+def collect_stats(stats=None):
+    """
+    Collect the instrumentation events of a block of code.
+    :param stats: An existing Stats instance to accumulate in.
+    :return: The Stats instance.
+    """
+    if stats is None:
+        stats = Stats()
+    register_hook(stats)
+    try:
+        yield stats
+    finally:
+        unregister_hook(stats)
@@ -0,0 +1,418 @@
+#
+# Lazy json import.
+# Instead of decoding a whole json document, the nested serialized objects are returned as LazyObject proxies
+# that only remember where the object is in the json text. The object is decoded and instantiated the first time
+# one of it's attribute is accessed.
+#
+import re
+import json
+from json import decoder as _decoder
+import core
+
+__all__ = (
+    'LazyObject',
+    'materialize'
+)
+
+# Match a json string or a container delimiter, including anything else before it (numbers, whitespace, etc.).
+# Consuming it in the same match is a lot faster than trying to match a token at each position.
+# The first group match strings, the second group match containers openings and the third containers closings.
+_TOKEN_RE = re.compile(r'[^"{}\[\]]*(?:("[^"\\]*(?:\\.[^"\\]*)*")|([{\[])|([}\]]))')
+_UID_RE = re.compile(r'\s*:\s*(-?\d+)')
+_REF_KEY_RE = re.compile(r'"_ref"\s*:\s*$')
+_WHITESPACE_RE = _decoder.WHITESPACE
+
+# The kind of json objects, detected from their keys.
+KIND_PLAIN, KIND_OBJECT, KIND_REFERENCE, KIND_DOCUMENT = range(4)
+_KINDS_BY_KEY = {
+    '"_class"': KIND_OBJECT,
+    '"_class_index"': KIND_OBJECT,
+    '"_ref"': KIND_REFERENCE,
+    '"_classes"': KIND_DOCUMENT,
+}
+
+# The python 2 scanstring also take the encoding as argument.
+try:
+    unicode
+    _scanstring = lambda text, idx, strict: _decoder.scanstring(text, idx, None, strict)
+except NameError:
+    _scanstring = _decoder.scanstring
+
+
+class LazyObject(object):
+    """
+    Proxy to a serialized object that is only decoded and instantiated when one of it's attribute is accessed.
+    Accessing any attribute (including __class__, so isinstance work as expected) will materialize the object.
+    Note that the proxy is not replaced by the real instance, use materialize for this.
+    """
+    __slots__ = ('_lazy_document', '_lazy_start', '_lazy_end', '_lazy_instance', '_lazy_loaded')
+
+    def __init__(self, document, start, end):
+        object.__setattr__(self, '_lazy_document', document)
+        object.__setattr__(self, '_lazy_start', start)
+        object.__setattr__(self, '_lazy_end', end)
+        object.__setattr__(self, '_lazy_instance', None)
+        object.__setattr__(self, '_lazy_loaded', False)
+
+    def _lazy_get_instance(self):
+        if not self._lazy_loaded:
+            instance = self._lazy_document.instantiate(self._lazy_start, self._lazy_end)
+            object.__setattr__(self, '_lazy_instance', instance)
+            object.__setattr__(self, '_lazy_loaded', True)
+        return self._lazy_instance
+
+    @property
+    def __class__(self):
+        return self._lazy_get_instance().__class__
+
+    def __getattr__(self, name):
+        return getattr(self._lazy_get_instance(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._lazy_get_instance(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._lazy_get_instance(), name)
+
+    def __repr__(self):
+        if self._lazy_loaded:
+            return repr(self._lazy_instance)
+        return '<LazyObject at {0}:{1}>'.format(self._lazy_start, self._lazy_end)
+
+
+class LazyDocument(object):
+    """
+    A json document exported with export_json from which objects are instantiated on demand.
+    """
+    def __init__(self, text, cache=None, decoder=None):
+        if cache is None:
+            from cache import Cache
+            cache = Cache()
+
+        self.text = text
+        self.cache = cache
+        decoder = self.decoder = decoder or json.JSONDecoder()
+        # The decoder scanner is used for everything that is not a serialized object.
+        self.scan_once = decoder.scan_once
+        self.strict = decoder.strict
+        # The proxies by the position of their object in the text.
+        # This ensure that a reference to an object always return the same proxy.
+        self.proxies = {}
+        # The end position and the kind of every container by their start position and the position of the objects
+        # by their uid. They are computed in a single pass over the text the first time they are needed.
+        self.spans = None
+        self.positions_by_uid = None
+        # The class plans by their exported metadata.
+        self.plans = {}
+        # The plans of the document class table if any.
+        self.class_table = None
+        # The root instance returned by get_root and the number of instances created.
+        self.root = None
+        self.num_instances = 0
+
+    def skip_whitespace(self, idx):
+        return _WHITESPACE_RE.match(self.text, idx).end()
+
+    def _index(self):
+        """
+        Resolve the end position and the kind of every container and the position of every object that define
+        a '_uid' key in a single pass over the text.
+        Scanning each container when it is decoded would scan the nested containers again for each level.
+        """
+        text = self.text
+        spans = {}
+        positions_by_uid = {}
+        # The start position and the kind of the containers being scanned.
+        openings = []
+        for match in _TOKEN_RE.finditer(text):
+            if match.lastindex == 2:
+                openings.append([match.start(2), KIND_PLAIN])
+            elif match.lastindex == 3:
+                start, kind = openings.pop()
+                spans[start] = (match.end(), kind)
+            elif openings and text[openings[-1][0]] == '{':
+                token = match.group(1)
+                key_kind = _KINDS_BY_KEY.get(token)
+                if key_kind is not None:
+                    # Ensure the string is a key and not a value.
+                    if text[self.skip_whitespace(match.end())] == ':':
+                        openings[-1][1] = key_kind
+                elif token == '"_uid"':
+                    uid_match = _UID_RE.match(text, match.end())
+                    if uid_match:
+                        positions_by_uid[int(uid_match.group(1))] = openings[-1][0]
+
+        self.spans = spans
+        self.positions_by_uid = positions_by_uid
+
+    def scan_container(self, idx):
+        """
+        Find the end of the container starting at the provided position.
+        :return: A 2-tuple containing the container end position and it's kind.
+        """
+        if self.spans is None:
+            self._index()
+        try:
+            return self.spans[idx]
+        except KeyError:
+            raise ValueError("Unterminated json container starting at {0}".format(idx))
+
+    def get_proxy(self, start, end):
+        try:
+            return self.proxies[start]
+        except KeyError:
+            proxy = self.proxies[start] = LazyObject(self, start, end)
+            return proxy
+
+    def get_proxy_by_uid(self, uid):
+        if self.positions_by_uid is None:
+            self._index()
+        try:
+            start = self.positions_by_uid[uid]
+        except KeyError:
+            core.logging.error("Can't resolve reference to {0}, the instance was not found.".format(uid))
+            return None
+        end, _ = self.scan_container(start)
+        return self.get_proxy(start, end)
+
+    def decode_value(self, idx):
+        """
+        Decode the value at the provided position.
+        Serialized objects are returned as proxies and lists are decoded lazily.
+        :return: A 2-tuple containing the value and it's end position.
+        """
+        char = self.text[idx]
+        if char == '{':
+            end, kind = self.scan_container(idx)
+            if kind == KIND_OBJECT:
+                return self.get_proxy(idx, end), end
+            value, end = self.scan_once(self.text, idx)
+            if kind == KIND_REFERENCE:
+                value = self.get_proxy_by_uid(value['_ref'])
+            return value, end
+        if char == '[':
+            return self.decode_list(idx)
+        return self.scan_once(self.text, idx)
+
+    def decode_list(self, idx):
+        end, _ = self.scan_container(idx)
+        # If the list don't contain any object, there's nothing to be lazy about.
+        if self.text.find('{', idx, end) == -1:
+            return self.scan_once(self.text, idx)
+
+        result = []
+        idx = self.skip_whitespace(idx + 1)
+        if self.text[idx] == ']':
+            return result, idx + 1
+        while True:
+            value, idx = self.decode_value(idx)
+            result.append(value)
+            idx = self.skip_whitespace(idx)
+            char = self.text[idx]
+            idx = self.skip_whitespace(idx + 1)
+            if char == ']':
+                return result, idx
+            if char != ',':
+                raise ValueError("Expecting ',' delimiter at {0}".format(idx))
+
+    def decode_object(self, idx, eager_keys=()):
+        """
+        Decode the first level of the json object at the provided position.
+        :param eager_keys: The keys which values are completely decoded.
+        :return: A 2-tuple containing the decoded dict and it's end position.
+        """
+        text = self.text
+        result = {}
+        idx = self.skip_whitespace(idx + 1)
+        if text[idx] == '}':
+            return result, idx + 1
+        while True:
+            if text[idx] != '"':
+                raise ValueError("Expecting property name at {0}".format(idx))
+            key, idx = _scanstring(text, idx + 1, self.strict)
+            idx = self.skip_whitespace(idx)
+            if text[idx] != ':':
+                raise ValueError("Expecting ':' delimiter at {0}".format(idx))
+            idx = self.skip_whitespace(idx + 1)
+            if key in eager_keys:
+                result[key], idx = self.scan_once(text, idx)
+            else:
+                result[key], idx = self.decode_value(idx)
+            idx = self.skip_whitespace(idx)
+            char = text[idx]
+            idx = self.skip_whitespace(idx + 1)
+            if char == '}':
+                return result, idx
+            if char != ',':
+                raise ValueError("Expecting ',' delimiter at {0}".format(idx))
+
+    def instantiate(self, start, end):
+        """
+        Create the instance of the serialized object at the provided position.
+        It's nested serialized objects are proxies.
+        """
+        data, _ = self.decode_object(start)
+
+        if '_class_index' in data:
+            cls_path = data.pop('_class_index')
+            plan = self.class_table[cls_path]
+        else:
+            cls_path = data.pop('_class')
+            plan = self.get_plan(cls_path, data.get('_class_module', None))
+
+        if plan is None:
+            core.logging.error("Can't create class instance for {0}, did you import to module?".format(cls_path))
+            return None
+
+        # The values are already decoded, we can't use import_dict since it would materialize the proxies.
+        self.num_instances += 1
+        instance = plan.create_instance()
+        if instance is not None:
+            instance.__dict__.update(data)
+        return instance
+
+    def get_plan(self, cls_path, cls_module):
+        key = (cls_path, cls_module)
+        try:
+            return self.plans[key]
+        except KeyError:
+            plan = self.plans[key] = core.resolve_class_plan(cls_path, cls_module, self.cache)
+            return plan
+
+    def get_root(self):
+        idx = self.skip_whitespace(0)
+
+        # Documents exported with a class table contain the root value and the class table.
+        if self.text[idx] == '{' and self.scan_container(idx)[1] == KIND_DOCUMENT:
+            document, _ = self.decode_object(idx, eager_keys=('_classes',))
+            self.class_table = [
+                self.get_plan(entry['_class'], entry.get('_class_module', None)) for entry in document['_classes']
+            ]
+            self.root = _resolve_proxy(document['_root'])
+            return self.root
+
+        value, _ = self.decode_value(idx)
+        self.root = _resolve_proxy(value)
+        return self.root
+
+    def is_referenced(self, uid):
+        """
+        :return: True if the document contain a reference to the object with the provided uid.
+        """
+        if uid is None:
+            return False
+        # Searching for the uid itself is a lot faster than searching for a pattern.
+        text = self.text
+        token = str(uid)
+        idx = text.find(token)
+        while idx != -1:
+            end = idx + len(token)
+            if not text[end:end + 1].isdigit() and _REF_KEY_RE.search(text, max(0, idx - 32), idx):
+                return True
+            idx = text.find(token, end)
+        return False
+
+    def import_root(self):
+        """
+        Import the whole document eagerly and move the result in the root instance.
+        This is only possible if no other instance was created from the document yet.
+        Decoding the document with the json decoder and import_dict is a lot faster than instantiating the objects
+        one at a time, especially on deep graphs.
+        :return: The eagerly imported root that was moved in the root instance or None.
+        """
+        root = self.root
+        if root is None or self.num_instances != 1 or not hasattr(root, '__dict__'):
+            return None
+
+        eager_root = core.import_dict(self.decoder.decode(self.text), cache=self.cache)
+        if type(eager_root) is not type(root):
+            return None
+
+        # The proxies of the root values may already be referenced elsewhere, they are bound to their eager instance.
+        attrs = root.__dict__
+        eager_attrs = eager_root.__dict__
+        for key, value in attrs.items():
+            _bind_proxies(value, eager_attrs.get(key), eager_root, root)
+        attrs.clear()
+        attrs.update(eager_attrs)
+        return eager_root
+
+
+def _resolve_proxy(value):
+    if type(value) is LazyObject:
+        return value._lazy_get_instance()
+    return value
+
+
+def _bind_proxies(value, eager_value, eager_root, root):
+    """
+    Bind the proxies of a lazy value to the instances of the same value imported eagerly.
+    """
+    if type(value) is LazyObject:
+        if not value._lazy_loaded:
+            object.__setattr__(value, '_lazy_instance', root if eager_value is eager_root else eager_value)
+            object.__setattr__(value, '_lazy_loaded', True)
+    elif type(value) is list and isinstance(eager_value, list):
+        for item, eager_item in zip(value, eager_value):
+            _bind_proxies(item, eager_item, eager_root, root)
+
+
+def _get_document(data):
+    """
+    :return: The LazyDocument of the first proxy found in the values of an instance or None.
+    """
+    if not hasattr(data, '__dict__') or isinstance(data, dict) or core.is_data_pymel(data):
+        return None
+    for value in data.__dict__.values():
+        # Note that isinstance would load the proxies through their __class__ property.
+        if type(value) is LazyObject:
+            return value._lazy_document
+        if isinstance(value, list):
+            for item in value:
+                if type(item) is LazyObject:
+                    return item._lazy_document
+    return None
+
+
+def materialize(data):
+    """
+    Replace every LazyObject proxy reachable from the provided value by the real instance.
+    If nothing except the root was instantiated yet, the whole document is imported eagerly instead.
+    :param data: A value returned by import_json or import_json_file with lazy=True.
+    :return: The real value without any proxy.
+    """
+    data = _resolve_proxy(data)
+
+    # The references to the eagerly imported root are replaced by the root itself.
+    replacements = {}
+    document = _get_document(data)
+    if document is not None and document.root is data:
+        eager_root = document.import_root()
+        if eager_root is not None:
+            # If nothing reference the root, there's no proxy left to resolve.
+            if not document.is_referenced(data.__dict__.get('_uid')):
+                return data
+            replacements[id(eager_root)] = data
+
+    visited = set()
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        value_id = id(value)
+        if value_id in visited:
+            continue
+        visited.add(value_id)
+
+        if isinstance(value, list):
+            for i, item in enumerate(value):
+                item = _resolve_proxy(item)
+                item = value[i] = replacements.get(id(item), item)
+                stack.append(item)
+        elif hasattr(value, '__dict__') and not isinstance(value, dict) and not core.is_data_pymel(value):
+            attrs = value.__dict__
+            for key, item in attrs.items():
+                item = _resolve_proxy(item)
+                item = attrs[key] = replacements.get(id(item), item)
+                stack.append(item)
+
+    return data
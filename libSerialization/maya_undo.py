@@ -0,0 +1,67 @@
+#
+# Add the edits of an OpenMaya.MDGModifier to the maya undo queue.
+# A modifier applied outside of a command never reach the undo queue, this module is also a maya plugin
+# that register a command whose only job is to record an already applied modifier.
+# Undoing the command call undoIt on the modifier, redoing it call doIt.
+#
+import os
+import sys
+import types
+from maya import cmds
+from maya import OpenMayaMPx
+
+COMMAND_NAME = 'libSerializationRecordModifier'
+
+# When loaded as a plugin, this file is imported a second time under another name.
+# The modifiers waiting to be recorded are shared through sys.modules so both copies see them.
+_shared = sys.modules.setdefault('_libSerialization_undo', types.ModuleType('_libSerialization_undo'))
+if not hasattr(_shared, 'pending'):
+    _shared.pending = []
+
+
+class _RecordModifierCommand(OpenMayaMPx.MPxCommand):
+    def __init__(self):
+        OpenMayaMPx.MPxCommand.__init__(self)
+        self.modifier = None
+
+    def isUndoable(self):
+        return True
+
+    def doIt(self, args):
+        # The modifier was already applied by the caller.
+        self.modifier = _shared.pending.pop()
+
+    def redoIt(self):
+        self.modifier.doIt()
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+
+def _create_command():
+    return OpenMayaMPx.asMPxPtr(_RecordModifierCommand())
+
+
+def initializePlugin(mobject):
+    OpenMayaMPx.MFnPlugin(mobject).registerCommand(COMMAND_NAME, _create_command)
+
+
+def uninitializePlugin(mobject):
+    OpenMayaMPx.MFnPlugin(mobject).deregisterCommand(COMMAND_NAME)
+
+
+def record(modifier):
+    """
+    Add an already applied modifier to the undo queue.
+    :param modifier: An OpenMaya.MDGModifier (or MDagModifier) on which doIt was called.
+    """
+    if not cmds.exists(COMMAND_NAME):
+        cmds.loadPlugin(os.path.splitext(__file__)[0] + '.py', quiet=True)
+
+    _shared.pending.append(modifier)
+    try:
+        getattr(cmds, COMMAND_NAME)()
+    finally:
+        # Don't leak the modifier if the command failed.
+        if modifier in _shared.pending:
+            _shared.pending.remove(modifier)
@@ -0,0 +1,389 @@
+#
+# Batched export of object graphs to networks.
+# export_network create each network and connection as separate DG edits.
+# In batch mode, the networks of the whole object graph are planned first, then created through a single MDGModifier.
+#
+# The attribute definitions are resolved once by class and type signature of the values, see AttrSchemas.
+#
+# This module don't import maya, the OpenMaya module is provided to the NetworkBuilder.
+# This allow the planning and the order of the DG edits to be tested without maya.
+#
+import core
+import instrumentation
+
+_export_network_key_whitelist = ['_class', '_class_module', '_class_namespace']
+
+
+def _can_export_attr_by_name(name):
+    """
+    Determine what attribute can be exported to a network.
+    All key that start with an underscore are considered private and won't be exported.
+    The reserved keyword and automatically excempted from this rule.
+    """
+    if name in _export_network_key_whitelist:
+        return True
+
+    if name[0] == '_':
+        return False
+
+    return True
+
+
+class TypedArray(object):
+    """
+    A list of int, float or string values stored in a single typed array attribute
+    instead of a multi attribute with one plug by element.
+    It only exist between the planning and the creation of the networks, it is not a registered type.
+    """
+    __slots__ = ('item_type', 'values')
+
+    def __init__(self, item_type, values):
+        """
+        :param item_type: int, float or basestring.
+        :param values: A list of values of this type.
+        """
+        self.item_type = item_type
+        self.values = values
+
+_int_types = frozenset((int,))
+_float_types = frozenset((float,))
+_string_types = frozenset((str, unicode))
+
+
+def _get_array_item_type(values):
+    """
+    :return: The item_type of the TypedArray that can hold a list or None if the list need a multi attribute.
+    Note that a list containing None values or mixed types can't be stored in a typed array.
+    """
+    types = set(map(type, values))
+    if types == _int_types:
+        return int
+    if types == _float_types:
+        return float
+    if types and types <= _string_types:
+        return basestring
+    return None
+
+
+def _iter_network_items(data_dict, typed_arrays=False):
+    """
+    Iterate through the (key, value) tuples of an exported dict that will be stored in a network.
+    :param typed_arrays: If True, the lists of int, float or string are replaced by TypedArray instances.
+    """
+    for key, val in data_dict.items():
+        if not _can_export_attr_by_name(key):
+            continue
+        if core.get_data_type(val) == core.TYPE_LIST:
+            # Skip empty list
+            if not any(val):
+                continue
+            if typed_arrays:
+                item_type = _get_array_item_type(val)
+                if item_type is not None:
+                    val = TypedArray(item_type, list(val))
+        yield key, val
+
+
+def _get_network_name(data):
+    # Automaticly name network whenever possible
+    try:
+        return data.__getNetworkName__()
+    except (AttributeError, TypeError):
+        return data.__class__.__name__
+
+
+class NetworkRef(object):
+    """
+    Replace a complex object in a planned network attributes, it refer to the network that will be created for it.
+    Like the complex objects, it have a __dict__ and is stored in a message attribute.
+    """
+    def __init__(self, index):
+        self.index = index
+
+
+class PlannedNetwork(object):
+    """
+    A network to create.
+    The attributes are a list of (name, value) tuples, the value can be a basic value, a NetworkRef, a node or a list.
+    """
+    __slots__ = ('data', 'name', 'attrs')
+
+    def __init__(self, data, name):
+        self.data = data
+        self.name = name
+        self.attrs = []
+
+
+class NetworkPlanner(object):
+    """
+    Plan the networks of an object graph without recursion and without touching the scene.
+    """
+    def __init__(self, cache, typed_arrays=False, **kwargs):
+        """
+        :param cache: A Cache instance, the networks created by previous exports with the same cache are reused.
+        :param typed_arrays: If True, the lists of int, float or string are stored in typed array attributes.
+        :param kwargs: Any keyword arguments supported by export_dict.
+        """
+        self.cache = cache
+        self.typed_arrays = typed_arrays
+        self.kwargs = kwargs
+        self.networks = []
+        # The index of the planned network of each object by their id.
+        self.indexes = {}
+        self.pending = []
+
+    def get_reference(self, data):
+        data_id = id(data)
+        index = self.indexes.get(data_id)
+        if index is not None:
+            return NetworkRef(index)
+
+        network = self.cache.get_network_by_id(data_id)
+        if network is not None:
+            return network
+
+        index = self.indexes[data_id] = len(self.networks)
+        self.networks.append(PlannedNetwork(data, _get_network_name(data)))
+        self.pending.append(index)
+        return NetworkRef(index)
+
+    def export_value(self, data):
+        if type(data) is TypedArray:
+            return data
+        data_type = core.get_data_type(data)
+        if data_type == core.TYPE_COMPLEX:
+            return self.get_reference(data)
+        if data_type == core.TYPE_LIST:
+            return [self.export_value(val) for val in data]
+        return data
+
+    def plan_network(self, network):
+        if instrumentation.enabled:
+            instrumentation.emit(instrumentation.EVENT_OBJECT, network.data.__class__)
+
+        data_dict = core.export_dict(network.data, recursive=False, cache=self.cache, **self.kwargs)
+        for key, val in _iter_network_items(data_dict, typed_arrays=self.typed_arrays):
+            network.attrs.append((key, self.export_value(val)))
+
+    def run(self, data):
+        """
+        Plan the networks of an object graph.
+        :param data: The object instance to export.
+        :return: A NetworkRef to the network of the object or it's existing network.
+        """
+        root = self.get_reference(data)
+        while self.pending:
+            self.plan_network(self.networks[self.pending.pop()])
+        return root
+
+
+class AttrDef(object):
+    """
+    The definition of an attribute, resolved once and used to create the same attribute on any number of nodes.
+    """
+    __slots__ = ('fn_cls', 'args', 'array')
+
+    def __init__(self, fn_cls, args=(), array=False):
+        """
+        :param fn_cls: The OpenMaya.MFnAttribute subclass used to create the attribute.
+        :param args: The arguments that follow the long and short name in the create call.
+        :param array: If True, the attribute is an array.
+        """
+        self.fn_cls = fn_cls
+        self.args = args
+        self.array = array
+
+    def as_array(self):
+        return self.__class__(self.fn_cls, self.args, array=True)
+
+    def create_fn(self, name):
+        fn = self.fn_cls()
+        fn.create(name, name, *self.args)
+        return fn
+
+    def create(self, name):
+        """
+        Create the attribute.
+        :return: An OpenMaya.MFnAttribute subclass instance.
+        """
+        fn = self.create_fn(name)
+        if self.array:
+            fn.setArray(True)
+        fn.setNiceNameOverride(name)
+        return fn
+
+
+class AttrSchemas(object):
+    """
+    Cache the attribute layout of the networks.
+    All the networks of the same class usually hold the same types of values, the attribute definitions are resolved
+    once by class and type signature of the values. The attributes of each node type are also mapped once,
+    a new node only have these so there's no need to probe it's plugs.
+    """
+    def __init__(self, fn_get_attr_def, uncached_types=()):
+        """
+        :param fn_get_attr_def: A function that receive the name of an attribute and a value
+        and return an AttrDef (or None if the value can't be stored).
+        :param uncached_types: The types of value that need their own definition, (ex: pymel.Attribute).
+        """
+        self.fn_get_attr_def = fn_get_attr_def
+        self.uncached_types = uncached_types
+        self.schemas = {}
+        self.static_attrs = {}
+
+    def get_signature(self, value):
+        """
+        :return: What determine the definition of the attribute that hold a value, or None if the value
+        need it's own definition.
+        """
+        value_type = type(value)
+        if value_type is TypedArray:
+            return (TypedArray, value.item_type)
+        if value_type is list or value_type is tuple:
+            ref_val = next((val for val in value if val is not None), None)
+            signature = self.get_signature(ref_val) if ref_val is not None else None
+            return (list, signature) if signature is not None else None
+        if issubclass(value_type, self.uncached_types):
+            return None
+        return value_type
+
+    def get_attr_defs(self, cls, attrs):
+        """
+        :param cls: The class of the object exported to the network.
+        :param attrs: The (name, value) tuples of the network.
+        :return: The AttrDef of each attribute (or None if the value can't be stored).
+        """
+        signature = tuple((name, self.get_signature(value)) for name, value in attrs)
+        key = (cls, signature)
+        schema = self.schemas.get(key)
+        if instrumentation.enabled:
+            event = instrumentation.EVENT_CACHE_MISS if schema is None else instrumentation.EVENT_CACHE_HIT
+            instrumentation.emit(event, info='schemas')
+        if schema is None:
+            schema = self.schemas[key] = [
+                self.fn_get_attr_def(name, value) if value_signature is not None else None
+                for (name, value_signature), (_, value) in zip(signature, attrs)
+            ]
+
+        # Resolve the values that need their own definition.
+        result = []
+        for attr_def, (name, value_signature), (_, value) in zip(schema, signature, attrs):
+            if value_signature is None:
+                attr_def = self.fn_get_attr_def(name, value)
+            result.append(attr_def)
+        return result
+
+    def get_static_attrs(self, om, fn_node):
+        """
+        :return: A dict containing the attribute MObjects of a new node by their name.
+        """
+        node_type = fn_node.typeName()
+        result = self.static_attrs.get(node_type)
+        if result is None:
+            result = self.static_attrs[node_type] = {}
+            for i in range(fn_node.attributeCount()):
+                attr = fn_node.attribute(i)
+                result[om.MFnAttribute(attr).name()] = attr
+        return result
+
+    def add_attrs(self, om, modifier, node, cls, attrs):
+        """
+        Add the attributes of a network to it's new node.
+        :param om: The maya.OpenMaya module (or anything that behave like it).
+        :param modifier: The OpenMaya.MDGModifier used to add the attributes, the caller is responsible for calling doIt.
+        :param node: The MObject of the new node.
+        :param cls: The class of the object exported to the network.
+        :param attrs: The (name, value) tuples of the network.
+        :return: A list of (attribute MObject, value) tuples for the attributes that need to be set.
+        """
+        existing = self.get_static_attrs(om, om.MFnDependencyNode(node))
+        # The '_uid' attribute is reserved to store the python id of the object, it is not set for now.
+        attrs = [('_uid', 0)] + attrs
+        result = []
+        for (name, value), attr_def in zip(attrs, self.get_attr_defs(cls, attrs)):
+            attr = existing.get(name)
+            if attr is None:
+                if attr_def is None:
+                    continue  # In case of invalid value like missing pymel PyNode & Attributes
+                attr = attr_def.create(name).object()
+                modifier.addAttribute(node, attr)
+            if name != '_uid':
+                result.append((attr, value))
+        return result
+
+
+class NetworkBuilder(object):
+    """
+    Create planned networks through a single MDGModifier.
+    The nodes, the attributes and finally the values and connections are added to the modifier in three passes,
+    calling undoIt on the modifier revert the whole export.
+    Note that the modifier don't reach the maya undo queue by itself, see maya_undo.record.
+
+    Subclasses need to implement set_dagnode_value.
+    """
+    def __init__(self, om, schemas):
+        """
+        :param om: The maya.OpenMaya module (or anything that behave like it).
+        :param schemas: The AttrSchemas used to create the attributes, it can be shared between builders.
+        """
+        self.om = om
+        self.schemas = schemas
+        self.modifier = om.MDGModifier()
+        self.nodes = []
+
+    def set_dagnode_value(self, plug, value):
+        """
+        Set or connect a value that is neither a basic value nor a network (ex: pymel.PyNode or TypedArray).
+        """
+        raise NotImplementedError
+
+    def get_message_plug(self, index):
+        return self.om.MFnDependencyNode(self.nodes[index]).findPlug('message')
+
+    def set_value(self, plug, value):
+        modifier = self.modifier
+        if isinstance(value, NetworkRef):
+            modifier.connect(self.get_message_plug(value.index), plug)
+        elif isinstance(value, list):
+            for i, val in enumerate(value):
+                if val is not None:
+                    self.set_value(plug.elementByLogicalIndex(i), val)
+        elif isinstance(value, bool):
+            modifier.newPlugValueBool(plug, value)
+        elif isinstance(value, int):
+            modifier.newPlugValueInt(plug, value)
+        elif isinstance(value, float):
+            modifier.newPlugValueFloat(plug, value)
+        elif isinstance(value, basestring):
+            modifier.newPlugValueString(plug, value)
+        else:
+            self.set_dagnode_value(plug, value)
+
+    def build(self, networks):
+        """
+        Create planned networks.
+        :param networks: A list of PlannedNetwork instances.
+        :return: The MObject of each network.
+        """
+        om = self.om
+        modifier = self.modifier
+
+        # The nodes need to exist before we can know which attributes they already have.
+        for network in networks:
+            node = modifier.createNode('network')
+            modifier.renameNode(node, network.name)
+            self.nodes.append(node)
+        modifier.doIt()
+
+        # The plugs of the new attributes can only be used once they are added.
+        values = []
+        for node, network in zip(self.nodes, networks):
+            for attr, value in self.schemas.add_attrs(om, modifier, node, network.data.__class__, network.attrs):
+                values.append((node, attr, value))
+        modifier.doIt()
+
+        for node, attr, value in values:
+            self.set_value(om.MPlug(node, attr), value)
+        modifier.doIt()
+
+        return self.nodes
@@ -0,0 +1,197 @@
+#
+# Scene-wide index of the serialized networks by class.
+# iter_networks_from_class used to list every network of the scene and read their class attribute on each query.
+# The index is built once per scene, then kept up to date through DG callbacks:
+# - The networks added to the scene are indexed on the next query. This way their attributes can be set
+#   (ex: by export_network) before their attribute changed callback is registered.
+# - The indexed networks are indexed again on the next query when their '_class' or '_class_namespace'
+#   attribute change. Maya have no scene-level callback for attribute changes, each indexed network have it's own
+#   callback, it return immediately for any other attribute.
+# - The networks removed from the scene are removed from the index.
+# - The whole index is dropped when a new scene is created or opened, it is built again on the next query.
+# A query only index the networks that were added or changed since the last one, it don't read every network.
+#
+# Like network_batch, this module don't import maya, the OpenMaya module is provided to the SceneNetworkIndex.
+#
+import collections
+
+# The attributes that contain the class of a network, the first one found is used.
+_class_attr_names = ('_class_namespace', '_class')
+
+
+class NetworkIndex(object):
+    """
+    Index networks by each component of their class namespace.
+    ex: A network of the 'RigElement.Rig' class is found with both 'RigElement' and 'Rig'.
+    """
+    def __init__(self):
+        # The networks by their key, in the order they were indexed.
+        self.networks = collections.OrderedDict()
+        self.components = {}
+        self.networks_by_component = {}
+
+    def __len__(self):
+        return len(self.networks)
+
+    def __contains__(self, key):
+        return key in self.networks
+
+    def set(self, key, network, value):
+        """
+        Index a network.
+        :param key: A hashable value that identify the network.
+        :param network: The network returned by the queries.
+        :param value: The class namespace of the network or None.
+        """
+        self.remove(key)
+        components = frozenset(value.split('.')) if value else frozenset()
+        self.networks[key] = network
+        self.components[key] = components
+        for component in components:
+            networks = self.networks_by_component.get(component)
+            if networks is None:
+                networks = self.networks_by_component[component] = collections.OrderedDict()
+            networks[key] = network
+
+    def remove(self, key):
+        if key not in self.networks:
+            return
+        del self.networks[key]
+        for component in self.components.pop(key):
+            networks = self.networks_by_component[component]
+            del networks[key]
+            if not networks:
+                del self.networks_by_component[component]
+
+    def get(self, cls_name):
+        """
+        :return: A list containing the networks created from a class.
+        """
+        networks = self.networks_by_component.get(cls_name)
+        return list(networks.values()) if networks else []
+
+
+class SceneNetworkIndex(object):
+    """
+    Maintain a NetworkIndex of the networks in the current maya scene.
+    """
+    def __init__(self, om, fn_wrap=None):
+        """
+        :param om: The maya.OpenMaya module (or anything that behave like it).
+        :param fn_wrap: A function that receive the MObject of a network and return what the queries return
+        (ex: pymel.PyNode). The function is only called once by network.
+        """
+        self.om = om
+        self.fn_wrap = fn_wrap
+        self.index = None
+        # The MObjectHandle of the networks added or changed since the last query by their key.
+        self.pending = {}
+        self.callbacks = []
+        self.node_callbacks = {}
+        # The attribute messages that can change the class of a network.
+        self.attribute_changed_mask = (
+            om.MNodeMessage.kAttributeSet | om.MNodeMessage.kAttributeAdded | om.MNodeMessage.kAttributeRemoved
+        )
+
+    def get_key(self, node):
+        return self.om.MObjectHandle(node).hashCode()
+
+    def get_class(self, fn_node):
+        """
+        :return: The class namespace of a network or None.
+        """
+        for attr_name in _class_attr_names:
+            if fn_node.hasAttribute(attr_name):
+                return fn_node.findPlug(attr_name).asString()
+        return None
+
+    def add_node(self, node, fn_node=None):
+        om = self.om
+        if fn_node is None:
+            fn_node = om.MFnDependencyNode(node)
+        key = self.get_key(node)
+        network = self.index.networks.get(key)
+        if network is None:
+            network = self.fn_wrap(node) if self.fn_wrap else node
+        self.index.set(key, network, self.get_class(fn_node))
+        # The callback is only registered once the network is indexed, after it's attributes were set.
+        if key not in self.node_callbacks:
+            self.node_callbacks[key] = om.MNodeMessage.addAttributeChangedCallback(node, self._on_attribute_changed)
+
+    def build(self):
+        """
+        Index every network of the scene and register the callbacks.
+        """
+        om = self.om
+        self.index = NetworkIndex()
+        self.pending = {}
+        self.callbacks = [
+            om.MDGMessage.addNodeAddedCallback(self._on_node_added, 'network'),
+            om.MDGMessage.addNodeRemovedCallback(self._on_node_removed, 'network'),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kBeforeNew, self._on_scene_changed),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kBeforeOpen, self._on_scene_changed),
+        ]
+
+        it = om.MItDependencyNodes()
+        while not it.isDone():
+            node = it.thisNode()
+            fn_node = om.MFnDependencyNode(node)
+            if fn_node.typeName() == 'network':
+                self.add_node(node, fn_node)
+            it.next()
+
+    def drop(self):
+        """
+        Remove the callbacks and forget everything, the index will be built again on the next query.
+        """
+        om = self.om
+        for callback in self.callbacks:
+            om.MMessage.removeCallback(callback)
+        for callback in self.node_callbacks.values():
+            om.MMessage.removeCallback(callback)
+        self.callbacks = []
+        self.node_callbacks = {}
+        self.pending = {}
+        self.index = None
+
+    def flush(self):
+        """
+        Index the networks added or changed since the last query.
+        """
+        pending = self.pending
+        self.pending = {}
+        for handle in pending.values():
+            if handle.isValid():
+                self.add_node(handle.object())
+
+    def get(self, cls_name):
+        """
+        :return: A list containing the networks of the scene created from a class.
+        """
+        if self.index is None:
+            self.build()
+        elif self.pending:
+            self.flush()
+        return self.index.get(cls_name)
+
+    def _on_node_added(self, node, *args):
+        handle = self.om.MObjectHandle(node)
+        self.pending[handle.hashCode()] = handle
+
+    def _on_node_removed(self, node, *args):
+        key = self.get_key(node)
+        self.pending.pop(key, None)
+        self.index.remove(key)
+        callback = self.node_callbacks.pop(key, None)
+        if callback is not None:
+            self.om.MMessage.removeCallback(callback)
+
+    def _on_attribute_changed(self, msg, plug, *args):
+        # This is called for every attribute change of the indexed networks, return as soon as possible.
+        if not msg & self.attribute_changed_mask:
+            return
+        if plug.partialName() in _class_attr_names:
+            self._on_node_added(plug.node())
+
+    def _on_scene_changed(self, *args):
+        self.drop()
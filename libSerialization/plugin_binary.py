@@ -0,0 +1,323 @@
+#
+# Binary Support
+# A compact binary representation of the export_dict result, mostly useful for local caches.
+#
+# Layout:
+#   MAGIC
+#   varint: number of strings in the string table
+#   (varint: string length, utf-8 bytes) for each string
+#   root value
+#
+# Each value is a one byte tag followed by it's payload:
+#   TAG_NONE, TAG_FALSE, TAG_TRUE: no payload
+#   TAG_INT: zigzag encoded varint
+#   TAG_FLOAT: little-endian double
+#   TAG_STR: varint index in the string table
+#   TAG_LIST: varint number of values followed by the values
+#   TAG_DICT: varint number of items followed by (varint key index in the string table, value) for each item
+#   TAG_BACKREF: varint index of an already decoded list or dict, in the order they were encountered.
+#
+import os
+import mmap
+import struct
+import core
+
+__all__ = (
+    'export_binary',
+    'export_binary_file',
+    'import_binary',
+    'import_binary_file'
+)
+
+MAGIC = b'LSB\x01'
+
+TAG_NONE, TAG_FALSE, TAG_TRUE, TAG_INT, TAG_FLOAT, TAG_STR, TAG_LIST, TAG_DICT, TAG_BACKREF = range(9)
+
+_float_struct = struct.Struct('<d')
+_byte_struct = struct.Struct('B')
+
+# Python3 support
+try:
+    _integer_types = (int, long)
+    _text_type = unicode
+    _binary_type = str
+except NameError:
+    _integer_types = (int,)
+    _text_type = str
+    _binary_type = bytes
+
+
+def _make_dir(path):
+    path_dir = os.path.dirname(path)
+
+    # Create destination folder if needed
+    if not os.path.exists(path_dir):
+        os.makedirs(path_dir)
+
+
+def _write_varint(buf, value):
+    while value > 0x7f:
+        buf.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _read_varint(buf, pos):
+    unpack_byte = _byte_struct.unpack_from
+    result = 0
+    shift = 0
+    while True:
+        byte = unpack_byte(buf, pos)[0]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _encode_string(value):
+    if isinstance(value, _text_type):
+        return value.encode('utf-8')
+    return value
+
+
+def _decode_string(value):
+    # Under python 2, we keep ascii strings as str like the rest of the python code would expect.
+    if _text_type is not str:
+        try:
+            value.decode('ascii')
+            return value
+        except UnicodeDecodeError:
+            pass
+    return value.decode('utf-8')
+
+
+class _BinaryEncoder(object):
+    """
+    Encode an export_dict result without recursion.
+    """
+    def __init__(self):
+        self.strings = {}
+        self.body = bytearray()
+        # The index of each encoded list and dict by their id, this support shared and cyclic containers.
+        self.containers = {}
+        self.stack = []
+
+    def get_string_index(self, value):
+        try:
+            return self.strings[value]
+        except KeyError:
+            index = self.strings[value] = len(self.strings)
+            return index
+
+    def encode_value(self, data):
+        body = self.body
+
+        if data is None:
+            body.append(TAG_NONE)
+        elif data is True:
+            body.append(TAG_TRUE)
+        elif data is False:
+            body.append(TAG_FALSE)
+        elif isinstance(data, _integer_types):
+            body.append(TAG_INT)
+            _write_varint(body, data << 1 if data >= 0 else (-data << 1) - 1)
+        elif isinstance(data, float):
+            body.append(TAG_FLOAT)
+            body.extend(_float_struct.pack(data))
+        elif isinstance(data, (_text_type, _binary_type)):
+            body.append(TAG_STR)
+            _write_varint(body, self.get_string_index(data))
+        elif isinstance(data, (list, tuple, dict)):
+            data_id = id(data)
+            index = self.containers.get(data_id)
+            if index is not None:
+                body.append(TAG_BACKREF)
+                _write_varint(body, index)
+                return
+            self.containers[data_id] = len(self.containers)
+
+            if isinstance(data, dict):
+                body.append(TAG_DICT)
+                self.stack.append((iter(data.items()), True))
+            else:
+                body.append(TAG_LIST)
+                self.stack.append((iter(data), False))
+            _write_varint(body, len(data))
+        else:
+            raise TypeError("{0} ({1}) is not binary serializable".format(data, type(data)))
+
+    def run(self, data):
+        body = self.body
+        stack = self.stack
+        encode_value = self.encode_value
+
+        encode_value(data)
+
+        while stack:
+            depth = len(stack)
+            values, is_dict = stack[-1]
+            for val in values:
+                if is_dict:
+                    key, val = val
+                    _write_varint(body, self.get_string_index(key))
+                encode_value(val)
+
+                # If a new container was found, we need to encode it before continuing.
+                if len(stack) != depth:
+                    break
+            else:
+                stack.pop()
+
+        header = bytearray(MAGIC)
+        _write_varint(header, len(self.strings))
+        for string, _ in sorted(self.strings.items(), key=lambda item: item[1]):
+            string = _encode_string(string)
+            _write_varint(header, len(string))
+            header.extend(string)
+
+        return bytes(header + body)
+
+
+class _BinaryDecoder(object):
+    """
+    Decode a binary buffer without recursion.
+    The buffer can be anything supporting the buffer protocol and slicing, like bytes, memoryview or mmap.
+    Only the strings from the string table are copied out of the buffer.
+    """
+    def __init__(self, buf):
+        self.buf = buf
+        self.strings = []
+        # The lists and dicts in the order they were encountered, used to resolve TAG_BACKREF.
+        self.containers = []
+        # Each stack frame contain the container to fill, the number of values left and if the container is a dict.
+        self.stack = []
+
+    def read_bytes(self, start, end):
+        # The strings are used as dict keys, the bytearray and memoryview slices are not hashable.
+        data = self.buf[start:end]
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        elif isinstance(data, bytearray):
+            data = bytes(data)
+        return data
+
+    def decode_value(self, pos):
+        buf = self.buf
+        tag = _byte_struct.unpack_from(buf, pos)[0]
+        pos += 1
+
+        if tag == TAG_STR:
+            index, pos = _read_varint(buf, pos)
+            return self.strings[index], pos
+        if tag == TAG_INT:
+            value, pos = _read_varint(buf, pos)
+            return (value >> 1) if not value & 1 else -((value + 1) >> 1), pos
+        if tag == TAG_FLOAT:
+            return _float_struct.unpack_from(buf, pos)[0], pos + 8
+        if tag == TAG_NONE:
+            return None, pos
+        if tag == TAG_TRUE:
+            return True, pos
+        if tag == TAG_FALSE:
+            return False, pos
+        if tag == TAG_DICT or tag == TAG_LIST:
+            count, pos = _read_varint(buf, pos)
+            value = {} if tag == TAG_DICT else []
+            self.containers.append(value)
+            if count:
+                self.stack.append([value, count, tag == TAG_DICT])
+            return value, pos
+        if tag == TAG_BACKREF:
+            index, pos = _read_varint(buf, pos)
+            return self.containers[index], pos
+        raise ValueError("Unknown tag {0} at position {1}".format(tag, pos - 1))
+
+    def run(self):
+        buf = self.buf
+        if self.read_bytes(0, len(MAGIC)) != MAGIC:
+            raise ValueError("Invalid binary data, the header don't match.")
+        pos = len(MAGIC)
+
+        num_strings, pos = _read_varint(buf, pos)
+        for _ in range(num_strings):
+            size, pos = _read_varint(buf, pos)
+            self.strings.append(_decode_string(self.read_bytes(pos, pos + size)))
+            pos += size
+
+        stack = self.stack
+        strings = self.strings
+        decode_value = self.decode_value
+
+        result, pos = decode_value(pos)
+
+        while stack:
+            frame = stack[-1]
+            container, count, is_dict = frame
+            depth = len(stack)
+            while count:
+                count -= 1
+                if is_dict:
+                    key_index, pos = _read_varint(buf, pos)
+                    container[strings[key_index]], pos = decode_value(pos)
+                else:
+                    value, pos = decode_value(pos)
+                    container.append(value)
+
+                # If a new container was found, we need to decode it before continuing.
+                if len(stack) != depth:
+                    break
+            frame[1] = count
+            if not count and stack[-1] is frame:
+                stack.pop()
+
+        return result
+
+
+def export_binary(data, **kwargs):
+    """
+    Export an object instance to binary data.
+    :param data: The object instance to export.
+    :param kwargs: Any keyword arguments supported by export_dict.
+    :return: A bytes instance.
+    """
+    data_dict = core.export_dict(data, **kwargs)
+    return _BinaryEncoder().run(data_dict)
+
+
+def export_binary_file(data, path, mkdir=True, **kwargs):
+    if mkdir:
+        _make_dir(path)
+
+    data_binary = export_binary(data, **kwargs)
+
+    with open(path, 'wb') as fp:
+        fp.write(data_binary)
+
+    return True
+
+
+def import_binary(data, **kwargs):
+    """
+    Import an object instance from binary data.
+    :param data: A bytes, bytearray, memoryview or mmap instance.
+    :param kwargs: Any keyword arguments supported by import_dict.
+    :return: The imported object instance.
+    """
+    data_dict = _BinaryDecoder(data).run()
+    return core.import_dict(data_dict, **kwargs)
+
+
+def import_binary_file(path, **kwargs):
+    if not os.path.exists(path):
+        raise Exception("Can't importFromBinaryFile, file does not exist! {0}".format(path))
+
+    # The file is memory-mapped so only the decoded strings are copied in memory.
+    with open(path, 'rb') as fp:
+        buf = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            data_dict = _BinaryDecoder(buf).run()
+        finally:
+            buf.close()
+
+    return core.import_dict(data_dict, **kwargs)
@@ -1,12 +1,21 @@
 import os
 import json
+import collections
+from StringIO import StringIO
 import core
+import lazy
+import instrumentation
+import incremental
 
 __all__ = (
+    'SerializableJSONEncoder',
     'export_json',
     'export_json_file',
     'import_json',
-    'import_json_file'
+    'import_json_file',
+    'export_json_many',
+    'import_json_many',
+    'import_json_files'
 )
 
 #
@@ -22,32 +31,687 @@ def _make_dir(path):
         os.makedirs(path_dir)
 
 
-def export_json(data, indent=4, **kwargs):
-    data = core.export_dict(data)
-    return json.dumps(data, indent=indent, **kwargs)
+def _emit_size(event, fp):
+    if instrumentation.enabled:
+        instrumentation.emit(event, fp.tell(), 'json')
 
 
-def export_json_file(data, path, mkdir=True, indent=4, **kwargs):
+def _get_json_kwargs(indent, compact, kwargs):
+    """
+    Resolve the json.dump keyword arguments.
+    The compact mode remove the indentation and any whitespace between the values.
+    """
+    if compact:
+        indent = None
+        kwargs.setdefault('separators', (',', ':'))
+    kwargs['indent'] = indent
+    return kwargs
+
+
+_INFINITY = float('inf')
+
+# The json encoders use recursion and raise this error on deeply nested graphs.
+try:
+    _RecursionError = RecursionError
+except NameError:
+    _RecursionError = RuntimeError
+
+
+class _JSONStreamWriter(object):
+    """
+    Write the json representation of an object graph to a file handle without building it's export_dict result.
+    The object graph is traversed iteratively like export_dict and the json text is written as soon as possible.
+    The result is the same document that json.dump would write from the export_dict result.
+    """
+    # Number of chunks to accumulate before writing them to the file handle.
+    flush_size = 4096
+
+    def __init__(self, fp, encoder, skip_None=True, references=False, class_table=False):
+        self.fp = fp
+        self.encoder = encoder
+        self.skip_None = skip_None
+
+        indent = encoder.indent
+        if isinstance(indent, int):
+            indent = ' ' * indent
+        self.indent = indent
+        self.item_separator = encoder.item_separator
+        self.key_separator = encoder.key_separator
+        self.sort_keys = encoder.sort_keys
+
+        # If we are preserving references, remember the uid of each exported complex object by it's id.
+        self.uids = {} if references else None
+        # If we are using a class table, the root value is written inside a document.
+        # Since we only know the classes once everything is written, the table is written last.
+        self.class_table = core.ClassTable() if class_table else None
+        self.base_depth = 1 if class_table else 0
+        # The ids of the containers being written, used to detect cyclic references like json.dump.
+        self.markers = set()
+        self.plans = {}
+        self.chunks = []
+        # Each stack frame contain an iterator on the values to write, if the values are from a list,
+        # the number of values already written and the id of the container.
+        self.stack = []
+
+    def write(self, chunk):
+        chunks = self.chunks
+        chunks.append(chunk)
+        if len(chunks) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        self.fp.write(''.join(self.chunks))
+        self.chunks = []
+
+    def get_plan(self, cls):
+        try:
+            return self.plans[cls]
+        except KeyError:
+            plan = self.plans[cls] = core.get_class_plan(cls)
+            return plan
+
+    def get_newline(self, depth):
+        return '\n' + self.indent * depth
+
+    def encode_basic(self, data):
+        if data is True:
+            return 'true'
+        if data is False:
+            return 'false'
+        if isinstance(data, float):
+            # Mimic json.encoder floatstr
+            if data != data:
+                text = 'NaN'
+            elif data == _INFINITY:
+                text = 'Infinity'
+            elif data == -_INFINITY:
+                text = '-Infinity'
+            else:
+                return repr(data)
+            if not self.encoder.allow_nan:
+                raise ValueError("Out of range float values are not JSON compliant: {0}".format(repr(data)))
+            return text
+        if isinstance(data, int):
+            return str(data)
+        return self.encoder.encode(data)
+
+    def write_plain(self, data, depth):
+        """
+        Write a value that only contain json datatypes (like the result of JSONEncoder.default).
+        These are small and written recursively.
+        """
+        if isinstance(data, dict):
+            items = sorted(data.items()) if self.sort_keys else data.items()
+            self.write_plain_container('{', '}', items, depth, True)
+        elif isinstance(data, (list, tuple)):
+            self.write_plain_container('[', ']', data, depth, False)
+        elif data is None:
+            self.write('null')
+        else:
+            self.write(self.encode_basic(data))
+
+    def write_plain_container(self, opener, closer, values, depth, is_dict):
+        if not values:
+            self.write(opener + closer)
+            return
+        self.write(opener)
+        newline = self.get_newline(depth + 1) if self.indent is not None else ''
+        for i, val in enumerate(values):
+            self.write((self.item_separator if i else '') + newline)
+            if is_dict:
+                key, val = val
+                self.write(self.encoder.encode(key) + self.key_separator)
+            self.write_plain(val, depth + 1)
+        if self.indent is not None:
+            self.write(self.get_newline(depth))
+        self.write(closer)
+
+    def write_value(self, data):
+        """
+        Write a value, complex objects and lists are opened and their content is written later using the stack.
+        """
+        data_type = core.get_data_type(data)
+
+        if data_type == core.TYPE_BASIC:
+            self.write(self.encode_basic(data))
+            return
+
+        if data_type == core.TYPE_DAGNODE:
+            self.write_plain(self.encoder.default(data), len(self.stack) + self.base_depth)
+            return
+
+        if data_type == core.TYPE_NONE:
+            core.logging.warning("[exportToBasicData] Unsupported type {0} ({1}) for {2}".format(type(data), data_type, data))
+            self.write('null')
+            return
+
+        data_id = id(data)
+
+        if data_type == core.TYPE_COMPLEX:
+            if instrumentation.enabled:
+                instrumentation.emit(instrumentation.EVENT_OBJECT, data.__class__)
+            plan = self.get_plan(data.__class__)
+            if self.class_table is None:
+                header = plan.export_header(data)
+            else:
+                header = self.class_table.export_header(plan, data)
+
+            # When preserving references, complex objects are only exported the first time they are encountered.
+            if self.uids is not None:
+                uid = self.uids.get(data_id)
+                if uid is not None:
+                    self.write_plain({'_ref': uid}, len(self.stack) + self.base_depth)
+                    return
+                uid = self.uids[data_id] = len(self.uids) + 1
+                header['_uid'] = uid
+
+            items = list(header.items())
+            skip_None = self.skip_None
+            items.extend(item for item in plan.iter_items(data) if not skip_None or item[1] is not None)
+            if self.sort_keys:
+                items.sort()
+            self.open_container(data_id, '{', items, False)
+
+        # Handle iterable
+        else:
+            if self.skip_None:
+                data = [val for val in data if val is not None]
+            self.open_container(data_id, '[', data, True)
+
+    def open_container(self, data_id, opener, values, is_list):
+        if data_id in self.markers:
+            raise ValueError("Circular reference detected")
+        self.markers.add(data_id)
+        self.write(opener)
+        self.stack.append([iter(values), is_list, 0, data_id])
+
+    def close_container(self):
+        values, is_list, count, data_id = self.stack.pop()
+        self.markers.discard(data_id)
+        if count and self.indent is not None:
+            self.write(self.get_newline(len(self.stack) + self.base_depth))
+        self.write(']' if is_list else '}')
+
+    def run(self, data):
+        stack = self.stack
+        encode_key = self.encoder.encode
+        item_separator = self.item_separator
+        key_separator = self.key_separator
+        base_depth = self.base_depth
+
+        if self.class_table is not None:
+            newline = self.get_newline(1) if self.indent is not None else ''
+            self.write('{' + newline + encode_key('_root') + key_separator)
+
+        self.write_value(data)
+
+        while stack:
+            depth = len(stack)
+            frame = stack[-1]
+            values, is_list = frame[0], frame[1]
+            newline = self.get_newline(depth + base_depth) if self.indent is not None else ''
+            for val in values:
+                prefix = (item_separator if frame[2] else '') + newline
+                frame[2] += 1
+                if is_list:
+                    self.write(prefix)
+                else:
+                    key, val = val
+                    self.write(prefix + encode_key(key) + key_separator)
+                self.write_value(val)
+
+                # If a new container was opened, we need to write it before continuing.
+                if len(stack) != depth:
+                    break
+            else:
+                self.close_container()
+
+        if self.class_table is not None:
+            newline = self.get_newline(1) if self.indent is not None else ''
+            self.write(item_separator + newline + encode_key('_classes') + key_separator)
+            self.write_plain(self.class_table.entries, 1)
+            self.write((self.get_newline(0) if self.indent is not None else '') + '}')
+
+        self.flush()
+
+
+class SerializableJSONEncoder(json.JSONEncoder):
+    """
+    A JSONEncoder that export the object instances while encoding them, without building the export_dict result.
+    The complex objects are exported when the encoder reach them through default, following the export_dict rules.
+    The values it don't support are passed to the next default implementation, this allow it to be combined
+    with another encoder:
+
+    >>> class MyEncoder(SerializableJSONEncoder, PymelJSONEncoder):
+    ...     pass
+
+    Without references, cyclic references raise a ValueError like json.dumps on the export_dict result.
+    """
+    def __init__(self, skip_None=True, references=False, **kwargs):
+        """
+        :param skip_None: See export_dict.
+        :param references: See export_dict.
+        :param kwargs: Any keyword arguments supported by the JSONEncoder.
+        """
+        # The encoder would detect the object being referenced as circular before reaching default.
+        if references:
+            kwargs['check_circular'] = False
+        super(SerializableJSONEncoder, self).__init__(**kwargs)
+        self.skip_None = skip_None
+        self.references = references
+        self.uids = None
+        self.plans = {}
+
+    def get_plan(self, cls):
+        try:
+            return self.plans[cls]
+        except KeyError:
+            plan = self.plans[cls] = core.get_class_plan(cls)
+            return plan
+
+    def iterencode(self, o, _one_shot=False):
+        # The uids are only unique in the same document.
+        if self.references:
+            self.uids = {}
+        return super(SerializableJSONEncoder, self).iterencode(self.export_value(o), _one_shot)
+
+    def default(self, o):
+        try:
+            data_type = core.get_data_type(o)
+        except NotImplementedError:
+            data_type = None
+
+        if data_type == core.TYPE_COMPLEX:
+            return self.export_complex(o)
+        if data_type == core.TYPE_LIST:
+            return self.export_value(list(o))
+        return super(SerializableJSONEncoder, self).default(o)
+
+    def _need_export(self, data):
+        for val in data:
+            if val is None or isinstance(val, (dict, list, tuple)):
+                return True
+        return False
+
+    def export_value(self, data):
+        """
+        Export the values that the encoder would otherwise encode as is.
+        The dict are complex objects and the lists can contain dicts or None values to skip.
+        Other values are left to default.
+        """
+        if isinstance(data, dict):
+            return self.export_complex(data)
+        if isinstance(data, (list, tuple)) and self._need_export(data):
+            skip_None = self.skip_None
+            return [self.export_value(val) for val in data if not skip_None or val is not None]
+        return data
+
+    def export_complex(self, data):
+        data_id = id(data)
+        if self.uids is not None:
+            uid = self.uids.get(data_id)
+            if uid is not None:
+                return {'_ref': uid}
+
+        if instrumentation.enabled:
+            instrumentation.emit(instrumentation.EVENT_OBJECT, data.__class__)
+
+        plan = self.get_plan(data.__class__)
+        result = plan.export_header(data)
+        if self.uids is not None:
+            uid = self.uids[data_id] = len(self.uids) + 1
+            result['_uid'] = uid
+
+        # Only the object itself is exported, it's nested objects are exported when the encoder reach them.
+        skip_None = self.skip_None
+        export_value = self.export_value
+        plain_types = core.PLAIN_TYPES
+        for key, val in plan.iter_items(data):
+            if type(val) in plain_types:
+                result[key] = val
+            elif not skip_None or val is not None:
+                result[key] = export_value(val)
+        return result
+
+
+# The SerializableJSONEncoder subclasses created for the encoders provided to export_json.
+_encoder_classes = {}
+
+
+def _get_encoder_class(cls):
+    """
+    Resolve a SerializableJSONEncoder class that use the default implementation of the provided encoder class.
+    """
+    if cls is None:
+        return SerializableJSONEncoder
+    if issubclass(cls, SerializableJSONEncoder):
+        return cls
+
+    try:
+        return _encoder_classes[cls]
+    except KeyError:
+        result = _encoder_classes[cls] = type('Serializable' + cls.__name__, (SerializableJSONEncoder, cls), {})
+        return result
+
+
+def _get_encoder(references, class_table, kwargs):
+    """
+    Create a SerializableJSONEncoder if the json can be encoded by the C encoder.
+    The pure python encoder (used with indentation or sorted keys) add a generator for each value returned
+    by default, it is faster to encode the export_dict result in that case.
+    The class table is only known once every object was exported, it always need the export_dict result.
+    :return: A SerializableJSONEncoder instance or None.
+    """
+    if class_table or json.encoder.c_make_encoder is None or kwargs.get('indent') is not None or kwargs.get('sort_keys'):
+        return None
+
+    kwargs = kwargs.copy()
+    cls = _get_encoder_class(kwargs.pop('cls', None))
+    return cls(references=references, **kwargs)
+
+
+def _dump_stream(data, fp, references, class_table, kwargs):
+    """
+    Write an object graph to a file handle using the _JSONStreamWriter.
+    Unlike the json encoders, the writer don't use recursion and support object graphs of any depth.
+    """
+    kwargs = kwargs.copy()
+    cls = kwargs.pop('cls', None) or json.JSONEncoder
+    encoder = cls(**kwargs)
+    # The object graph is traversed while encoding, the measure include the export.
+    with instrumentation.measure(instrumentation.EVENT_ENCODE, 'json'):
+        _JSONStreamWriter(fp, encoder, references=references, class_table=class_table).run(data)
+
+
+def export_json(data, indent=4, references=False, class_table=False, compact=False, **kwargs):
+    """
+    Export an object instance to a json string.
+    :param data: The object instance to export.
+    :param indent: The indentation used by json.dumps.
+    :param references: If True, complex objects encountered multiple times are only written once. See export_dict.
+    :param class_table: If True, the classes metadata are only written once in a table. See export_dict.
+    :param compact: If True, the json is written without indentation or whitespaces.
+    :param kwargs: Any keyword arguments supported by json.dumps. The encoder class (cls) is combined with
+    SerializableJSONEncoder.
+    :return: The json string. Object graphs too deep for the json encoders are written using the stream writer.
+    """
+    kwargs = _get_json_kwargs(indent, compact, kwargs)
+
+    try:
+        # The objects are exported while being encoded, the measure include the export.
+        encoder = _get_encoder(references, class_table, kwargs)
+        if encoder is not None:
+            with instrumentation.measure(instrumentation.EVENT_ENCODE, 'json'):
+                return encoder.encode(data)
+
+        data_dict = core.export_dict(data, references=references, class_table=class_table)
+        with instrumentation.measure(instrumentation.EVENT_ENCODE, 'json'):
+            return json.dumps(data_dict, **kwargs)
+    except _RecursionError:
+        # The object graph is too deep for the json encoders, fallback on the stream writer.
+        fp = StringIO()
+        _dump_stream(data, fp, references, class_table, kwargs)
+        return fp.getvalue()
+
+
+def export_json_file(data, path, mkdir=True, indent=4, references=False, class_table=False, stream=False,
+                     compact=False, **kwargs):
+    """
+    Export an object instance to a json file.
+    :param data: The object instance to export.
+    :param path: The path of the json file.
+    :param mkdir: If True, the destination folder will be created if needed.
+    :param indent: The indentation used by json.dump.
+    :param references: If True, complex objects encountered multiple times are only written once. See export_dict.
+    :param class_table: If True, the classes metadata are only written once in a table. See export_dict.
+    :param stream: If True, the json is written while traversing the object graph,
+    without building the export_dict result. This greatly reduce the memory usage on large graphs.
+    :param compact: If True, the json is written without indentation or whitespaces.
+    :param kwargs: Any keyword arguments supported by json.dump.
+    :return: True on success.
+    """
     if mkdir:
         _make_dir(path)
 
-    data_dict = core.export_dict(data)
+    kwargs = _get_json_kwargs(indent, compact, kwargs)
 
-    with open(path, 'w') as fp:
-        json.dump(data_dict, fp, indent=indent, **kwargs)
+    if not stream:
+        try:
+            _dump_json_file(data, path, references, class_table, kwargs)
+            return True
+        except _RecursionError:
+            # The object graph is too deep for the json encoders, fallback on the stream writer.
+            pass
 
+    with open(path, 'w') as fp:
+        _dump_stream(data, fp, references, class_table, kwargs)
+        _emit_size(instrumentation.EVENT_BYTES_WRITTEN, fp)
     return True
 
 
-def import_json(str_, **kwargs):
-    data = json.loads(str_, **kwargs)
+def _dump_json_file(data, path, references, class_table, kwargs):
+    """
+    Write an object graph to a json file using the json encoders.
+    """
+    encoder = _get_encoder(references, class_table, kwargs)
+    if encoder is not None:
+        with instrumentation.measure(instrumentation.EVENT_ENCODE, 'json'):
+            text = encoder.encode(data)
+        with open(path, 'w') as fp:
+            fp.write(text)
+            _emit_size(instrumentation.EVENT_BYTES_WRITTEN, fp)
+        return
+
+    data_dict = core.export_dict(data, references=references, class_table=class_table)
+
+    with open(path, 'w') as fp:
+        with instrumentation.measure(instrumentation.EVENT_ENCODE, 'json'):
+            json.dump(data_dict, fp, **kwargs)
+        _emit_size(instrumentation.EVENT_BYTES_WRITTEN, fp)
+
+
+def import_json(str_, lazy=False, **kwargs):
+    """
+    Import an object instance from a json string.
+    :param str_: The json string.
+    :param lazy: If True, the nested serialized objects are returned as proxies that are instantiated on demand.
+    See import_json_file.
+    :param kwargs: Any keyword arguments supported by json.loads.
+    :return: The imported object instance.
+    """
+    if lazy:
+        return _import_json_lazy(str_, **kwargs)
+
+    with instrumentation.measure(instrumentation.EVENT_DECODE, 'json'):
+        data = json.loads(str_, **kwargs)
+    if instrumentation.enabled:
+        instrumentation.emit(instrumentation.EVENT_BYTES_READ, len(str_), 'json')
     return core.import_dict(data)
 
 
-def import_json_file(path, **kwargs):
+def import_json_file(path, lazy=False, deltas=None, **kwargs):
+    """
+    Import an object instance from a json file.
+    :param path: The path of the json file.
+    :param lazy: If True, the nested serialized objects are returned as LazyObject proxies.
+    A proxy is only decoded and instantiated when one of it's attribute is accessed.
+    This is a lot faster and use a lot less memory if we only need to inspect a few values of a large file.
+    Use materialize to replace every proxy by the real instance.
+    :param deltas: The paths of the json files exported by IncrementalExporter.export_json_delta_file
+    to apply on the document, in the order they were exported.
+    :param kwargs: Any keyword arguments supported by json.load.
+    :return: The imported object instance.
+    """
     if not os.path.exists(path):
         raise Exception("Can't importFromJsonFile, file does not exist! {0}".format(path))
 
+    if lazy and deltas:
+        raise ValueError("Can't apply deltas when importing lazily.")
+
     with open(path, 'r') as fp:
-        data = json.load(fp, **kwargs)
-        return core.import_dict(data)
+        if lazy:
+            return _import_json_lazy(fp.read(), **kwargs)
+
+        with instrumentation.measure(instrumentation.EVENT_DECODE, 'json'):
+            data = json.load(fp, **kwargs)
+        _emit_size(instrumentation.EVENT_BYTES_READ, fp)
+
+    for delta_path in deltas or ():
+        with open(delta_path, 'r') as fp:
+            data = incremental.apply_delta(data, json.load(fp, **kwargs))
+
+    return core.import_dict(data)
+
+
+def _write_json_file(args):
+    data_dict, path, mkdir, kwargs = args
+    if mkdir:
+        _make_dir(path)
+
+    with open(path, 'w') as fp:
+        with instrumentation.measure(instrumentation.EVENT_ENCODE, 'json'):
+            json.dump(data_dict, fp, **kwargs)
+        _emit_size(instrumentation.EVENT_BYTES_WRITTEN, fp)
+
+    return True
+
+
+def _read_json_file(args):
+    path, kwargs = args
+    if not os.path.exists(path):
+        raise Exception("Can't importFromJsonFile, file does not exist! {0}".format(path))
+
+    with open(path, 'r') as fp:
+        with instrumentation.measure(instrumentation.EVENT_DECODE, 'json'):
+            data = json.load(fp, **kwargs)
+        _emit_size(instrumentation.EVENT_BYTES_READ, fp)
+        return data
+
+
+def export_json_many(values, paths=None, path=None, mkdir=True, indent=4, references=False, class_table=False,
+                     compact=False, workers=None, **kwargs):
+    """
+    Export multiple object instances to json files, either one file per instance or a single document.
+    The classes are only resolved once for every instances.
+    :param values: An iterable of object instances.
+    :param paths: The path of the json file of each instance.
+    :param path: The path of a single json file that will contain the list of every instances.
+    Use import_json_file to import it.
+    :param mkdir: If True, the destination folders will be created if needed.
+    :param indent: The indentation used by json.dump.
+    :param references: If True, complex objects encountered multiple times are only written once. See export_dict.
+    :param class_table: If True, the classes metadata are only written once in a table. See export_dict.
+    :param compact: If True, the json is written without indentation or whitespaces.
+    :param workers: The number of processes used to encode and write the files when using paths.
+    If None, everything is done in the current process. If 0, one process is used for each cpu.
+    The instances are always exported to basic data types in the current process,
+    however pymel datatypes cannot be sent to other processes.
+    :param kwargs: Any keyword arguments supported by json.dump.
+    :return: True on success.
+    """
+    if (paths is None) == (path is None):
+        raise ValueError("Expected either paths or path.")
+
+    kwargs = _get_json_kwargs(indent, compact, kwargs)
+
+    if path is not None:
+        data_dict = core.export_dict(list(values), references=references, class_table=class_table)
+        return _write_json_file((data_dict, path, mkdir, kwargs))
+
+    values = list(values)
+    paths = list(paths)
+    if len(values) != len(paths):
+        raise ValueError("Expected one path for each value, got {0} paths for {1} values.".format(
+            len(paths), len(values)
+        ))
+
+    data_dicts = core.export_many(values, references=references, class_table=class_table)
+    core.map_with_pool(
+        _write_json_file,
+        [(data_dict, path, mkdir, kwargs) for data_dict, path in zip(data_dicts, paths)],
+        workers=workers
+    )
+    return True
+
+
+def import_json_many(paths, workers=None, **kwargs):
+    """
+    Import multiple json files exported by export_json_file or export_json_many.
+    The classes are only resolved once for every files.
+    :param paths: The path of each json file.
+    :param workers: The number of processes used to read and decode the files.
+    If None, everything is done in the current process. If 0, one process is used for each cpu.
+    The instances are always created in the current process.
+    :param kwargs: Any keyword arguments supported by json.load.
+    :return: A list containing the imported object instance of each file.
+    """
+    data_dicts = core.map_with_pool(_read_json_file, [(path, kwargs) for path in paths], workers=workers)
+    return core.import_many(data_dicts)
+
+
+# The result of each file imported by import_json_files.
+# If the file could not be imported, the value is None and the error contain the exception.
+ImportResult = collections.namedtuple('ImportResult', ('path', 'value', 'error'))
+
+
+def _load_json_file(args):
+    """
+    Read and decode a json file without raising.
+    :return: A 2-tuple containing the decoded data and the exception if any.
+    """
+    path, kwargs = args
+    try:
+        with open(path, 'r') as fp:
+            with instrumentation.measure(instrumentation.EVENT_DECODE, 'json'):
+                data = json.load(fp, **kwargs)
+            _emit_size(instrumentation.EVENT_BYTES_READ, fp)
+            return data, None
+    except Exception as e:
+        return None, e
+
+
+def import_json_files(paths, workers=None, processes=None, **kwargs):
+    """
+    Import multiple json files concurrently.
+    The files are read and decoded by a pool of threads (or processes), then the object instances are created
+    in the current process, in the same order as the paths. The classes are only resolved once for every files.
+    An error in a file is reported in it's result and don't prevent the other files from being imported.
+    :param paths: The path of each json file.
+    :param workers: The number of threads used to read and decode the files, 8 by default.
+    :param processes: If provided, the number of processes used to read and decode the files instead of threads.
+    This is faster for large files since the decoding is not limited by the GIL. If 0, one process is used for each cpu.
+    It cannot be used with workers.
+    :param kwargs: Any keyword arguments supported by json.load.
+    :return: A list of ImportResult, one for each path.
+    """
+    from cache import Cache
+
+    if workers is not None and processes is not None:
+        raise ValueError("Can't use both workers ({0}) and processes ({1}).".format(workers, processes))
+
+    paths = list(paths)
+    args = [(path, kwargs) for path in paths]
+    if processes is not None:
+        loaded = core.map_with_pool(_load_json_file, args, workers=processes)
+    else:
+        loaded = core.map_with_pool(_load_json_file, args, workers=8 if workers is None else workers, threads=True)
+
+    cache = Cache()
+    results = []
+    for path, (data, error) in zip(paths, loaded):
+        value = None
+        if error is None:
+            try:
+                value = core.import_dict(data, cache=cache.fork())
+            except Exception as e:
+                error = e
+        if error is not None:
+            core.logging.error("Can't import {0}: {1}".format(path, error))
+        results.append(ImportResult(path, value, error))
+
+    return results
+
+
+def _import_json_lazy(str_, cls=None, **kwargs):
+    decoder = (cls or json.JSONDecoder)(**kwargs)
+    return lazy.LazyDocument(str_, decoder=decoder).get_root()
@@ -1,8 +1,14 @@
 import pymel.core as pymel
 from maya import OpenMaya
+from maya import cmds
 import sys
 import logging
 import core
+import instrumentation
+import network_batch
+import network_index
+import maya_undo
+from network_batch import _can_export_attr_by_name
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
@@ -21,49 +27,92 @@ __all__ = (
 )
 
 # Pymel compatibility implementation
-core.types_dag.append(pymel.PyNode)
-core.types_dag.append(pymel.Attribute)
-core.types_dag.append(pymel.datatypes.Matrix)
-core.types_dag.append(pymel.datatypes.Vector)
+core.register_type(pymel.PyNode, core.TYPE_DAGNODE)
+core.register_type(pymel.Attribute, core.TYPE_DAGNODE)
+core.register_type(pymel.datatypes.Matrix, core.TYPE_DAGNODE)
+core.register_type(pymel.datatypes.Vector, core.TYPE_DAGNODE)
 
 
 #
 # Maya Metanetwork Serialization
 #
 
-def _create_attr(name, data):
+class _VectorAttrDef(network_batch.AttrDef):
     """
-    Factory method that create an OpenMaya.MFnAttribute object from an arbitrary instance.
+    Define a compound of three double attributes.
+    """
+    def __init__(self, fn_cls=OpenMaya.MFnNumericAttribute, args=(), array=False):
+        super(_VectorAttrDef, self).__init__(fn_cls, args, array=array)
+
+    def create_fn(self, name):
+        name_x = '{0}X'.format(name)
+        name_y = '{0}Y'.format(name)
+        name_z = '{0}Z'.format(name)
+        fn = OpenMaya.MFnNumericAttribute()
+        mo_x = fn.create(name_x, name_x, OpenMaya.MFnNumericData.kDouble)
+        mo_y = fn.create(name_y, name_y, OpenMaya.MFnNumericData.kDouble)
+        mo_z = fn.create(name_z, name_z, OpenMaya.MFnNumericData.kDouble)
+        fn.create(name, name, mo_x, mo_y, mo_z)
+        return fn
+
+
+# The typed array data of each TypedArray item_type.
+_array_data_types = {
+    int: OpenMaya.MFnData.kIntArray,
+    float: OpenMaya.MFnData.kDoubleArray,
+    basestring: OpenMaya.MFnData.kStringArray,
+}
+
+
+def _create_array_data(data):
+    """
+    Create the data of a typed array attribute.
+    :param data: A network_batch.TypedArray instance.
+    :return: An MObject that can be set on the plug of the attribute in a single call.
+    """
+    values = data.values
+    if data.item_type is int:
+        array = OpenMaya.MIntArray()
+        OpenMaya.MScriptUtil.createIntArrayFromList(values, array)
+        return OpenMaya.MFnIntArrayData().create(array)
+    if data.item_type is float:
+        util = OpenMaya.MScriptUtil()
+        util.createFromList(values, len(values))
+        array = OpenMaya.MDoubleArray(util.asDoublePtr(), len(values))
+        return OpenMaya.MFnDoubleArrayData().create(array)
+    # There's no bulk conversion for strings.
+    array = OpenMaya.MStringArray()
+    for value in values:
+        array.append(value)
+    return OpenMaya.MFnStringArrayData().create(array)
+
+
+def _get_attr_def(name, data):
+    """
+    Factory method that resolve the OpenMaya.MFnAttribute to create from an arbitrary instance.
     :param name: The name of the OpenMaya.MFnAttribute to create.
     :param data: The value used to determine the type of OpenMaya.MFnAttribute to create.
-    :return: An OpenMaya.MFnAttribute subclass instance.
+    :return: A network_batch.AttrDef instance.
     """
     # (str, unicode) -> MFnTypedAttribute(kString)
     if isinstance(data, basestring):
-        fn = OpenMaya.MFnTypedAttribute()
-        fn.create(name, name, OpenMaya.MFnData.kString)
-        return fn
+        return network_batch.AttrDef(OpenMaya.MFnTypedAttribute, (OpenMaya.MFnData.kString,))
     data_type = type(data)
+    # (TypedArray,) -> MFnTypedAttribute(kIntArray, kDoubleArray or kStringArray)
+    if data_type is network_batch.TypedArray:
+        return network_batch.AttrDef(OpenMaya.MFnTypedAttribute, (_array_data_types[data.item_type],))
     # (bool,) -> MFnNumericAttribute(kBoolean)
     if issubclass(data_type, bool):
-        fn = OpenMaya.MFnNumericAttribute()
-        fn.create(name, name, OpenMaya.MFnNumericData.kBoolean)
-        return fn
+        return network_batch.AttrDef(OpenMaya.MFnNumericAttribute, (OpenMaya.MFnNumericData.kBoolean,))
     # (int,) -> MFnNumericData(kInt)
     if issubclass(data_type, int):
-        fn = OpenMaya.MFnNumericAttribute()
-        fn.create(name, name, OpenMaya.MFnNumericData.kInt)
-        return fn
+        return network_batch.AttrDef(OpenMaya.MFnNumericAttribute, (OpenMaya.MFnNumericData.kInt,))
     # (float,) -> MFnNumericData(kFloat)
     if issubclass(data_type, float):
-        fn = OpenMaya.MFnNumericAttribute()
-        fn.create(name, name, OpenMaya.MFnNumericData.kFloat)
-        return fn
+        return network_batch.AttrDef(OpenMaya.MFnNumericAttribute, (OpenMaya.MFnNumericData.kFloat,))
     # (dict,) -> MFnMessageAttribute
     if isinstance(data, dict):
-        fn = OpenMaya.MFnMessageAttribute()
-        fn.create(name, name)
-        return fn
+        return network_batch.AttrDef(OpenMaya.MFnMessageAttribute)
     # (list, tuple,) -> arbitrary type depending on the list content.
     # Note contrary to python list, Maya lists are typed.
     # This will crash if the list contain multiple types at the same time.
@@ -84,90 +133,54 @@ def _create_attr(name, data):
 
         # todo: raise an exception if multiples types are in the same list. check performance impact.
 
-        fn = _create_attr(name, ref_val)
-        fn.setArray(True)
-        return fn
+        attr_def = _get_attr_def(name, ref_val)
+        return attr_def.as_array() if attr_def is not None else None
     # (pymel.datatypes.Matrix,) -> MFnMatrixAttribute
     if issubclass(data_type, pymel.datatypes.Matrix):  # HACK
-        fn = OpenMaya.MFnMatrixAttribute()
-        fn.create(name, name)
-        return fn
+        return network_batch.AttrDef(OpenMaya.MFnMatrixAttribute)
     # (pymel.datatypes.Vector,) -> MFnNumericAttribute(kDouble)
     if issubclass(data_type, pymel.datatypes.Vector):
-        name_x = '{0}X'.format(name)
-        name_y = '{0}Y'.format(name)
-        name_z = '{0}Z'.format(name)
-        fn = OpenMaya.MFnNumericAttribute()
-        mo_x = fn.create(name_x, name_x, OpenMaya.MFnNumericData.kDouble)
-        mo_y = fn.create(name_y, name_y, OpenMaya.MFnNumericData.kDouble)
-        mo_z = fn.create(name_z, name_z, OpenMaya.MFnNumericData.kDouble)
-        fn.create(name, name, mo_x, mo_y, mo_z)
-        return fn
+        return _VectorAttrDef()
     # (pymel.general.Attribute,) -> arbitrary type depending on the attribute type itself.
     if issubclass(data_type, pymel.Attribute):
         if not is_valid_PyNode(data):
             log.warning("Can't serialize {0} attribute because of non-existent pymel Attribute!".format(name))
             return None
         elif data.type() == 'doubleAngle':
-            fn = OpenMaya.MFnUnitAttribute()
-            fn.create(name, name, OpenMaya.MFnUnitAttribute.kAngle)
-            return fn
+            return network_batch.AttrDef(OpenMaya.MFnUnitAttribute, (OpenMaya.MFnUnitAttribute.kAngle,))
         elif data.type() == 'time':
-            fn = OpenMaya.MFnUnitAttribute()
-            fn.create(name, name, OpenMaya.MFnUnitAttribute.kTime)
-            return fn
+            return network_batch.AttrDef(OpenMaya.MFnUnitAttribute, (OpenMaya.MFnUnitAttribute.kTime,))
         # If the attribute doesn't represent anything special,
         # we'll check it's value to know what attribute type to create.
         else:
-            return _create_attr(name, data.get())
+            return _get_attr_def(name, data.get())
     # (pymel.general.PyNode,) -> MFnMessageAttribute
     # The order is important here as if we hit this, we don't deal with a pymel.general.Attribute.
     # Note that by using duct-typing we support any 'pymel-like' behavior.
     if hasattr(data, '__melobject__'):  # TODO: Really usefull?
-        fn = OpenMaya.MFnMessageAttribute()
-        fn.create(name, name)
-        return fn
+        return network_batch.AttrDef(OpenMaya.MFnMessageAttribute)
     # (object,) -> MFnMessageAttribute
     if hasattr(data, '__dict__'):
-        fn = OpenMaya.MFnMessageAttribute()
-        fn.create(name, name)
-        return fn
+        return network_batch.AttrDef(OpenMaya.MFnMessageAttribute)
 
     pymel.error("Can't create MFnAttribute for {0} {1} {2}".format(name, data, data_type))
 
-def _add_attr(fnDependNode, name, data, cache=None):
-    data_type = core.get_data_type(data)
 
-    # Skip empty list
-    is_multi = data_type == core.TYPE_LIST
-    if is_multi and len(filter(None, data)) == 0:
-        return
+# The attribute definitions of the networks by class and type signature of their values, shared by every export.
+# The definition of a pymel.Attribute depend on the maya attribute itself so it is never cached.
+_schemas = network_batch.AttrSchemas(_get_attr_def, uncached_types=(pymel.Attribute,))
 
-    plug = None
-    # Get attribute arguments
-    try:  # TODO: Is a try/catch really the best way to know if the plug exists?
-        plug = fnDependNode.findPlug(name)
-    except:
-        pass
-
-    if plug is None:
-        fnAtt = _create_attr(name, data)
-        if fnAtt is None:
-            return  # In case of invalid value like missing pymel PyNode & Attributes
-        fnAtt.setNiceNameOverride(name)
-        moAtt = fnAtt.object()
-        if moAtt is not None:
-            try:
-                fnDependNode.addAttribute(moAtt)
-                plug = OpenMaya.MPlug(fnDependNode.object(), moAtt)
-            except Exception as e:
-                log.warning('Error adding attribute {0}: {1}'.format(name, e))
-
-    if plug is not None:
-        _set_attr(plug, data, cache=cache)
 
+def _set_attr(_plug, data, modifier, cache=None, typed_arrays=False):
+    """
+    Set the value of a network attribute.
+    :param modifier: The OpenMaya.MDGModifier receiving the connections, it is executed by the caller.
+    """
+    # The TypedArray are not a registered type.
+    if isinstance(data, network_batch.TypedArray):
+        _plug.setMObject(_create_array_data(data))
+        return
 
-def _set_attr(_plug, data, cache=None):
     data_type = core.get_data_type(data)
     if data_type == core.TYPE_LIST:
         num_elements = len(data)
@@ -175,7 +188,7 @@ def _set_attr(_plug, data, cache=None):
         _plug.setNumElements(num_elements)  # TODO: MAKE IT WORK # TODO: NECESSARY???
 
         for i in range(num_elements):
-            _set_attr(_plug.elementByLogicalIndex(i), data[i], cache=cache)
+            _set_attr(_plug.elementByLogicalIndex(i), data[i], modifier, cache=cache, typed_arrays=typed_arrays)
 
     elif data_type == core.TYPE_BASIC:
         # Basic types
@@ -190,13 +203,9 @@ def _set_attr(_plug, data, cache=None):
             # pymel.Attribute(_plug).set(_val)
 
     elif data_type == core.TYPE_COMPLEX:
-        network = export_network(data, cache=cache)
+        network = export_network(data, cache=cache, typed_arrays=typed_arrays)
         plug = network.__apimfn__().findPlug('message')
-
-        # Use a dag modifier to connect the attribute. TODO: Is this really the best way?
-        dagM = OpenMaya.MDagModifier()
-        dagM.connect(plug, _plug)
-        dagM.doIt()
+        modifier.connect(plug, _plug)
 
     elif data_type == core.TYPE_DAGNODE:
         plug = None
@@ -224,11 +233,8 @@ def _set_attr(_plug, data, cache=None):
             plug = data.__apimfn__().findPlug('message')
 
         if plug is not None:
-            dagM = OpenMaya.MDagModifier()
             # if pymel.attributeQuery(pymel.Attribute(_val), writable=True):
-            dagM.connect(plug, _plug)
-            dagM.connect(plug, _plug)  # is connecting two times necessary?
-            dagM.doIt()
+            modifier.connect(plug, _plug)
         else:
             raise Exception("Unknow TYPE {0}, {1}".format(type(data), data))
     elif data_type == core.TYPE_NONE:
@@ -239,54 +245,271 @@ def _set_attr(_plug, data, cache=None):
         raise NotImplementedError
 
 
-def _get_network_attr(attr, fn_skip=None, cache=None):
+# The numeric attribute types read as int.
+_numeric_int_types = frozenset((
+    OpenMaya.MFnNumericData.kByte,
+    OpenMaya.MFnNumericData.kChar,
+    OpenMaya.MFnNumericData.kShort,
+    OpenMaya.MFnNumericData.kInt,
+))
+
+
+def _get_plug_source(plug):
+    """
+    :return: The OpenMaya.MPlug connected to the input of a plug or None.
+    """
+    if not plug.isConnected():
+        return None
+    sources = OpenMaya.MPlugArray()
+    plug.connectedTo(sources, True, False)
+    return sources[0] if sources.length() else None
+
+
+def _get_network_attr(plug, fn_skip=None, cache=None):
     # Recursive
-    if attr.isMulti():
-        attr_indices = attr.getArrayIndices()
+    if plug.isArray():
+        indices = OpenMaya.MIntArray()
+        plug.getExistingArrayAttributeIndices(indices)
         # Empty array
-        if not attr_indices:
+        if not indices.length():
             return []
-        num_logical_elements = max(attr_indices)+1
-        return [_get_network_attr(attr.elementByLogicalIndex(i), fn_skip=fn_skip, cache=cache) for i in range(num_logical_elements)]
+        num_logical_elements = max(indices[i] for i in range(indices.length())) + 1
+        return [_get_network_attr(plug.elementByLogicalIndex(i), fn_skip=fn_skip, cache=cache) for i in range(num_logical_elements)]
 
-    if attr.type() == 'message':
-        if not attr.isConnected():
+    attr = plug.attribute()
+    if attr.hasFn(OpenMaya.MFn.kMessageAttribute):
+        source = _get_plug_source(plug)
+        if source is None:
             #log.warning('[_getNetworkAttr] Un-connected message attribute, skipping {0}'.format(attr))
             return None
-        attr_input = attr.inputs()[0]
-        # Network
-        if hasattr(attr_input, '_class'):
-            return import_network(attr_input, fn_skip=fn_skip, cache=cache)
-        # Node
-        else:
-            return attr_input
+        # Network or Node
+        return _import_network(source.node(), fn_skip=fn_skip, cache=cache)
 
     # pymel.Attribute
-    if attr.isConnected():
-        return attr.inputs(plugs=True)[0]
+    source = _get_plug_source(plug)
+    if source is not None:
+        return pymel.Attribute(source)
 
     # Basic type
-    return attr.get()
+    if attr.hasFn(OpenMaya.MFn.kNumericAttribute):
+        numeric_type = OpenMaya.MFnNumericAttribute(attr).unitType()
+        if numeric_type == OpenMaya.MFnNumericData.kBoolean:
+            return plug.asBool()
+        if numeric_type in _numeric_int_types:
+            return plug.asInt()
+        if numeric_type == OpenMaya.MFnNumericData.kFloat:
+            return plug.asFloat()
+        if numeric_type == OpenMaya.MFnNumericData.kDouble:
+            return plug.asDouble()
+    elif attr.hasFn(OpenMaya.MFn.kTypedAttribute):
+        if OpenMaya.MFnTypedAttribute(attr).attrType() == OpenMaya.MFnData.kString:
+            return plug.asString()
+
+    # Anything else (matrix, vector, angle, time, typed arrays) is converted by pymel, the typed arrays are also read
+    # in a single call.
+    return pymel.Attribute(plug).get()
+
+
+def _get_network_attrs(fn_node):
+    """
+    Resolve which attributes of a network we'll want to import.
+    :return: A dict containing the attribute MObjects by their long name.
+    """
+    attrs_by_longname = {}
+    for i in range(fn_node.attributeCount()):
+        attr = fn_node.attribute(i)
+        fn_attr = OpenMaya.MFnAttribute(attr)
+        # Only import user defined attributes.
+        if not fn_attr.isDynamic():
+            continue
+        # Skip compound children as we are only interested the compound value itself.
+        # ex: import translate and skip translateX, translateY, translateZ
+        if not fn_attr.parent().isNull():
+            continue
+        attr_name = fn_attr.name()
+        if '_' != attr_name[0]:  # Attribute longName starting with '_' are considered private
+            attrs_by_longname[attr_name] = attr
+    return attrs_by_longname
+
+
+def _import_network(node, fn_skip=None, cache=None, network=None):
+    """
+    Create a class instance from a network MObject.
+    The network is read through OpenMaya, only the nodes that are returned or provided to fn_skip are wrapped in pymel.
+    :param node: The MObject of the network to read from.
+    :param network: The pymel.PyNode of the network, if already known.
+    """
+    fn_node = OpenMaya.MFnDependencyNode(node)
+
+    # Duck-type the network, if the '_class' attribute exist, it is a class instance representation.
+    # Otherwise it is a simple pymel.PyNode datatypes.
+    if not fn_node.hasAttribute('_class'):
+        return network if network is not None else pymel.PyNode(node)
+
+    # This is the same key as hash(network) but without creating a pymel.PyNode.
+    network_id = OpenMaya.MObjectHandle(node).hashCode()
+
+    # Check if the object related to the network already exist in the cache and return it if found
+    cached_obj = cache.get_import_value_by_id(network_id)
+    if cached_obj is not None:
+        return cached_obj
+
+    if network is None:
+        network = pymel.PyNode(node)
+
+    # Check if the object is blacklisted. If it is, we'll still add it to the cache in case we encounter it again.
+    if fn_skip and fn_skip(network):
+        cache.set_import_value_by_id(network_id, None)
+        return None
+
+    cls_name = fn_node.findPlug('_class').asString()
+
+    # HACK: Previously we were storing the complete class namespace.
+    # However this was not very flexible when we played with the class hierarchy.
+    # If we find a '_class_module' attribute, it mean we are doing thing the new way.
+    # Otherwise we'll let it slip for now.
+    cls_module = fn_node.findPlug('_class_module').asString() if fn_node.hasAttribute('_class_module') else None
+    if cls_module:
+        cls_def = cache.get_class_by_name(cls_name, module_name=cls_module)
+    else:
+        cls_def = cache.get_class_by_namespace(cls_name)
+
+    if cls_def is None:
+        log.warning("Can't find class definiton for {0}. Returning None".format(cls_name))
+        return None
+
+    # Get latest definition, this is only resolved once per class.
+    plan = cache.get_class_plan(cls_def)
+    if instrumentation.enabled:
+        instrumentation.emit(instrumentation.EVENT_OBJECT, plan.cls)
+    obj = plan.create_instance()
+    if obj is None:
+        return None
+
+    # Monkey patch the network if supported
+    if isinstance(obj, object) and not isinstance(obj, dict):
+        obj._network = network
+
+    # Fill the import cache to make sure that self reference doesn't try to infinitly loop in it's import
+    cache.set_import_value_by_id(network_id, obj)
+
+    attrs_by_longname = _get_network_attrs(fn_node)
+
+    # If the constructor was bypassed, the attributes are inserted in a single update.
+    # There's no constructor state to preserve so we can also bypass setattr.
+    bulk = plan.construction == core.CONSTRUCT_NEW and not isinstance(obj, dict)
+    if bulk:
+        plan.reserve_attributes(obj, attrs_by_longname.keys())
+        obj_dict = obj.__dict__
+
+    for attr_name, attr in attrs_by_longname.iteritems():
+        # logging.debug('Importing attribute {0} from {1}'.format(key, _network.name()))
+        val = _get_network_attr(OpenMaya.MPlug(node, attr), fn_skip=fn_skip, cache=cache)
+        # if hasattr(obj, key):
+        if bulk:
+            obj_dict[attr_name] = val
+        elif isinstance(obj, dict):
+            obj[attr_name] = val
+        else:
+            setattr(obj, attr_name, val)
+        # else:
+        #    #logging.debug("Can't set attribute {0} to {1}, attribute does not exists".format(key, obj))
 
-_export_network_key_whitelist = ['_class', '_class_module', '_class_namespace']
-def _can_export_attr_by_name(name):
+        # Update network _uid to the current python variable context
+        #    if _network.hasAttr('_uid'):
+        #        _network._uid.set(id(obj))
+
+    # Hack: Find implemented class via duck-typing
+    # Implement a __callbackNetworkPostBuild__ method in your class instances as a callback.
+    try:
+        obj.__callbackNetworkPostBuild__()
+    except (AttributeError, TypeError):
+        pass
+
+    return obj
+
+
+class _NetworkBuilder(network_batch.NetworkBuilder):
     """
-    Determine what attribute can be exported to a network.
-    All key that start with an underscore are considered private and won't be exported.
-    The reserved keyword and automatically excempted from this rule.
+    Create the networks planned by export_network in batch mode.
     """
-    if name in _export_network_key_whitelist:
-        return True
+    def set_dagnode_value(self, plug, data):
+        modifier = self.modifier
+        if isinstance(data, network_batch.TypedArray):
+            modifier.newPlugValue(plug, _create_array_data(data))
+        elif isinstance(data, pymel.Attribute):  # pymel.Attribute
+            # Hack: Don't crash with non-existent pymel.Attribute
+            if not data.exists():
+                log.warning("Can't setAttr, Attribute {0} don't exist".format(data))
+                return
+            modifier.connect(data.__apimfn__(), plug)
+        elif isinstance(data, pymel.datatypes.Matrix):
+            fn = OpenMaya.MFnMatrixData()
+            modifier.newPlugValue(plug, fn.create(data.apicls(data)))
+        elif isinstance(data, pymel.datatypes.Vector):
+            modifier.newPlugValueFloat(plug.child(0), data.x)
+            modifier.newPlugValueFloat(plug.child(1), data.y)
+            modifier.newPlugValueFloat(plug.child(2), data.z)
+        elif hasattr(data, 'exists'):  # pymel.PyNode
+            # Hack: Don't crash with non-existent pymel.PyNode
+            if not pymel.objExists(data.__melobject__()):
+                log.warning("Can't setAttr, PyNode {0} don't exist".format(data))
+                return
+            modifier.connect(data.__apimfn__().findPlug('message'), plug)
+        else:
+            raise Exception("Unknow TYPE {0}, {1}".format(type(data), data))
 
-    if name[0] == '_':
-        return False
 
-    return True
+def _export_network_batch(data, cache, typed_arrays=False, **kwargs):
+    planner = network_batch.NetworkPlanner(cache, typed_arrays=typed_arrays, **kwargs)
+    root = planner.run(data)
+    # The object was already exported with the same cache.
+    if not isinstance(root, network_batch.NetworkRef):
+        return root
 
-def export_network(data, cache=None, **kwargs):
+    # The modifier is recorded by an undoable command, a single undo revert the whole export.
+    builder = _NetworkBuilder(OpenMaya, _schemas)
+    cmds.undoInfo(openChunk=True)
+    try:
+        try:
+            nodes = builder.build(planner.networks)
+        except Exception:
+            builder.modifier.undoIt()
+            raise
+        maya_undo.record(builder.modifier)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    networks = [pymel.PyNode(node) for node in nodes]
+    for planned, network in zip(planner.networks, networks):
+        # Monkey patch the network in a _network attribute if supported.
+        if isinstance(planned.data, object) and not isinstance(planned.data, dict):
+            planned.data._network = network
+        cache.set_network_by_id(id(planned.data), network)
+
+    return networks[root.index]
+
+
+def export_network(data, cache=None, batch=False, typed_arrays=False, **kwargs):
+    """
+    Export an object instance to a network, the nested objects are exported to their own networks.
+    :param data: The object instance to export.
+    :param cache: Used internally.
+    :param batch: If True, the networks of the whole object graph are planned first and created through
+    a single OpenMaya.MDGModifier instead of one DG edit per node, attribute and connection.
+    This is a lot faster on large object graphs.
+    :param typed_arrays: If True, the lists that only contain int, float or string values are stored in
+    a single typed array attribute (kIntArray, kDoubleArray or kStringArray) instead of a multi attribute.
+    This is a lot faster on large lists, import_network support both layouts.
+    :param kwargs: Any keyword arguments supported by export_dict.
+    :return: The pymel.nodetypes.Network of the object instance.
+    """
     if cache is None:
         from cache import Cache
         cache = Cache()
+
+    if batch:
+        return _export_network_batch(data, cache, typed_arrays=typed_arrays, **kwargs)
     #log.debug('CreateNetwork {0}'.format(data))
 
     # We'll deal with two additional attributes, '_network' and '_uid'.
@@ -303,6 +526,9 @@ def export_network(data, cache=None, **kwargs):
     if result is not None:
         return result
 
+    if instrumentation.enabled:
+        instrumentation.emit(instrumentation.EVENT_OBJECT, data.__class__)
+
     # Create network
     # Optimisation: Use existing network if already present in scene
     #if hasattr(data, '_network') and is_valid_PyNode(data._network):
@@ -320,11 +546,6 @@ def export_network(data, cache=None, **kwargs):
     if isinstance(data, object) and not isinstance(data, dict):
         data._network = network
 
-    # Ensure the network have the current python id stored
-    if not network.hasAttr('_uid'):
-        pymel.addAttr(network, longName='_uid', niceName='_uid', at='long')  # todo: validate attributeType
-    # network._uid.set(id(_data))
-
     # Cache as soon as possible since we'll use recursivity soon.
     cache.set_network_by_id(data_id, network)
 
@@ -332,10 +553,18 @@ def export_network(data, cache=None, **kwargs):
     data_dict = core.export_dict(data, recursive=False, cache=cache, **kwargs)
     assert (isinstance(data_dict, dict))
 
-    fnNet = network.__apimfn__()
-    for key, val in data_dict.items():
-        if _can_export_attr_by_name(key):
-            _add_attr(fnNet, key, val, cache=cache)
+    # Add every attributes in a single edit, this also ensure the network have the '_uid' attribute.
+    # network._uid.set(id(_data))
+    node = network.__apimobject__()
+    modifier = OpenMaya.MDGModifier()
+    items = list(network_batch._iter_network_items(data_dict, typed_arrays=typed_arrays))
+    attrs = _schemas.add_attrs(OpenMaya, modifier, node, data.__class__, items)
+    modifier.doIt()
+
+    # The connections are added to the same modifier, calling doIt again only execute them.
+    for attr, val in attrs:
+        _set_attr(OpenMaya.MPlug(node, attr), val, modifier, cache=cache, typed_arrays=typed_arrays)
+    modifier.doIt()
 
     return network
 
@@ -352,90 +581,7 @@ def import_network(network, fn_skip=None, cache=None, **kwargs):
         from cache import Cache
         cache = Cache()
 
-    # Duck-type the network, if the '_class' attribute exist, it is a class instance representation.
-    # Otherwise it is a simple pymel.PyNode datatypes.
-    if not network.hasAttr('_class'):
-        return network
-
-    network_id = hash(network)
-
-    # Check if the object related to the network already exist in the cache and return it if found
-    cached_obj = cache.get_import_value_by_id(network_id)
-    if cached_obj is not None:
-        return cached_obj
-
-    # Check if the object is blacklisted. If it is, we'll still add it to the cache in case we encounter it again.
-    if fn_skip and fn_skip(network):
-        cache.set_import_value_by_id(network_id, None)
-        return None
-
-    cls_name = network.getAttr('_class')
-
-    # HACK: Previously we were storing the complete class namespace.
-    # However this was not very flexible when we played with the class hierarchy.
-    # If we find a '_class_module' attribute, it mean we are doing thing the new way.
-    # Otherwise we'll let it slip for now.
-    cls_module = network.getAttr('_class_module') if network.hasAttr('_class_module') else None
-    if cls_module:
-        cls_def = cache.get_class_by_name(cls_name, module_name=cls_module)
-    else:
-        cls_def = cache.get_class_by_namespace(cls_name)
-
-    if cls_def is None:
-        log.warning("Can't find class definiton for {0}. Returning None".format(cls_name))
-        return None
-
-    # HACK: Get latest definition
-    cls_def = getattr(sys.modules[cls_def.__module__], cls_def.__name__)
-    obj = cls_def()
-
-    # Monkey patch the network if supported
-    if isinstance(obj, object) and not isinstance(obj, dict):
-        obj._network = network
-
-    # Fill the import cache to make sure that self reference doesn't try to infinitly loop in it's import
-    cache.set_import_value_by_id(network_id, obj)
-
-    # Resolve wich attribute we'll want to import
-    attrs_by_longname = {}
-    for attr_name in pymel.listAttr(network, userDefined=True):
-        if '_' != attr_name[0]:  # Attribute longName starting with '_' are considered private
-            attrs_by_longname[attr_name] = network.attr(attr_name)
-
-    # Filter compound children as we are only interested the compound value itself.
-    # ex: import translate and skip translateX, translateY, translateZ
-    for attr in attrs_by_longname.values():
-        if attr.isCompound():
-            for child in attr.getChildren():
-                child_longname = child.longName()
-                try:
-                    attrs_by_longname.pop(child_longname)
-                except KeyError:
-                    pass
-
-    for attr_name, attr in attrs_by_longname.iteritems():
-        # logging.debug('Importing attribute {0} from {1}'.format(key, _network.name()))
-        val = _get_network_attr(attr, fn_skip=fn_skip, cache=cache)
-        # if hasattr(obj, key):
-        if isinstance(obj, dict):
-            obj[attr_name.longName()] = val
-        else:
-            setattr(obj, attr_name, val)
-        # else:
-        #    #logging.debug("Can't set attribute {0} to {1}, attribute does not exists".format(key, obj))
-
-        # Update network _uid to the current python variable context
-        #    if _network.hasAttr('_uid'):
-        #        _network._uid.set(id(obj))
-
-    # Hack: Find implemented class via duck-typing
-    # Implement a __callbackNetworkPostBuild__ method in your class instances as a callback.
-    try:
-        obj.__callbackNetworkPostBuild__()
-    except (AttributeError, TypeError):
-        pass
-
-    return obj
+    return _import_network(network.__apimobject__(), fn_skip=fn_skip, cache=cache, network=network)
 
 
 def is_network_from_class(net, cls_name):
@@ -454,10 +600,17 @@ def is_network_from_class(net, cls_name):
         return cls_name in net._class.get().split('.')
     return None
 
+# When the module is reloaded, remove the callbacks of the previous index, they would never be removed otherwise.
+if '_network_index' in globals():
+    _network_index.drop()
+
+# The networks of the scene by class, it is built on the first query and maintained by DG callbacks.
+_network_index = network_index.SceneNetworkIndex(OpenMaya, fn_wrap=pymel.PyNode)
+
+
 def iter_networks_from_class(cls_name):
-    for network in pymel.ls(type='network'):
-        if is_network_from_class(network, cls_name):
-            yield network
+    for network in _network_index.get(cls_name):
+        yield network
 
 def get_networks_from_class(cls_name):
     """
@@ -469,6 +622,8 @@ def get_networks_from_class(cls_name):
     calling libSerialization.import_network will return None.
     # todo: add an option to pre-validate
 
+    The networks are found through an index of the scene, the first call build it and DG callbacks keep it up to date.
+
     :param cls_name: A string representing the name of a class.
     :return: A list of pymel.nodetypes.Network.
     """
@@ -0,0 +1,341 @@
+#
+# Content-addressed object store.
+# Each complex object is encoded separately and written once in the store, under the hash of it's encoding.
+# An exported version is a small manifest pointing to the objects it need, unchanged objects are shared between versions.
+#
+# Since an object encoding contain the hash of it's nested objects, the graph need to be hashed from the leaves.
+# References to an object that is still being exported (cycles) can't use a hash, they are written as the distance
+# to the object in the current path instead: {"_back": 1} refer to the parent of the object.
+# An object encountered multiple times is only exported once, if multiple different objects share the same
+# content, they are distinguished by their copy number: {"_hash": "...", "_copy": 1}
+#
+# Manifest: {"_store": "objects", "_root": {"_hash": "..."}}
+#
+import os
+import json
+import hashlib
+import tempfile
+import core
+
+__all__ = (
+    'export_store',
+    'import_store'
+)
+
+_DEFAULT_STORE = 'objects'
+
+
+def _get_file_mode():
+    """
+    :return: The permissions of a new file created with open(), mkstemp always create it's files as 0600.
+    """
+    # The umask can only be read by changing it.
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+class _ObjectStore(object):
+    """
+    A directory containing the encoded objects by their hash.
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def get_object_path(self, hash_):
+        # Split the objects in sub-directories so we don't have too many files in the same directory.
+        return os.path.join(self.path, hash_[:2], hash_[2:] + '.json')
+
+    def write_object(self, hash_, text):
+        """
+        Write an object in the store if it is not already there.
+        :return: True if the object was written.
+        """
+        path = self.get_object_path(hash_)
+        if os.path.exists(path):
+            return False
+
+        path_dir = os.path.dirname(path)
+        if not os.path.exists(path_dir):
+            try:
+                os.makedirs(path_dir)
+            except OSError:  # Created by someone else in the meantime.
+                pass
+
+        # Write in a temporary file first so an interrupted export never leave a partial object in the store.
+        fd, path_tmp = tempfile.mkstemp(dir=path_dir)
+        with os.fdopen(fd, 'w') as fp:
+            fp.write(text)
+        os.chmod(path_tmp, _get_file_mode())
+        try:
+            os.rename(path_tmp, path)
+        except OSError:  # Windows can't rename over an existing file, the object was written by someone else.
+            os.remove(path_tmp)
+        return True
+
+    def read_object(self, hash_):
+        path = self.get_object_path(hash_)
+        if not os.path.exists(path):
+            raise Exception("Can't find object {0} in store {1}".format(hash_, self.path))
+        with open(path, 'r') as fp:
+            return fp.read()
+
+
+class _StoreWriter(object):
+    """
+    Export an object graph to a store without recursion.
+    An object is encoded once all it's nested objects are, their hash is then known.
+    """
+    def __init__(self, store, encoder, skip_None=True):
+        self.store = store
+        self.encoder = encoder
+        self.skip_None = skip_None
+        # The reference to each exported object by it's id.
+        self.refs = {}
+        # The position in the path of the objects being exported by their id.
+        self.depths = {}
+        self.path = []
+        # The number of different objects encountered for each hash.
+        self.copies = {}
+        self.plans = {}
+        self.num_written = 0
+        # Each stack frame contain an iterator on the values to export, the container that will receive them,
+        # if the container is a list, the id of the object being exported and the reference that will receive it's hash.
+        self.stack = []
+
+    def get_plan(self, cls):
+        try:
+            return self.plans[cls]
+        except KeyError:
+            plan = self.plans[cls] = core.get_class_plan(cls)
+            return plan
+
+    def export_value(self, data):
+        data_type = core.get_data_type(data)
+
+        if data_type == core.TYPE_BASIC or data_type == core.TYPE_DAGNODE:
+            return data
+
+        if data_type == core.TYPE_NONE:
+            core.logging.warning("[exportToBasicData] Unsupported type {0} ({1}) for {2}".format(type(data), data_type, data))
+            return None
+
+        if data_type == core.TYPE_LIST:
+            result = []
+            self.stack.append((iter(data), result, True, None, None))
+            return result
+
+        data_id = id(data)
+        ref = self.refs.get(data_id)
+        if ref is not None:
+            return ref.copy()
+
+        depth = self.depths.get(data_id)
+        if depth is not None:
+            return {'_back': len(self.path) - 1 - depth}
+
+        # The items are sorted so the same object always produce the same encoding.
+        plan = self.get_plan(data.__class__)
+        result = plan.header.copy()
+        ref = {}
+        self.depths[data_id] = len(self.path)
+        self.path.append(data_id)
+        self.stack.append((iter(sorted(plan.iter_items(data))), result, False, data_id, ref))
+        return ref
+
+    def write_object(self, data, data_id, ref):
+        text = self.encoder.encode(data)
+        hash_ = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        if self.store.write_object(hash_, text):
+            self.num_written += 1
+
+        ref['_hash'] = hash_
+        copy = self.copies.get(hash_, 0)
+        self.copies[hash_] = copy + 1
+        if copy:
+            ref['_copy'] = copy
+
+        self.refs[data_id] = ref
+        del self.depths[data_id]
+        self.path.pop()
+
+    def run(self, data):
+        skip_None = self.skip_None
+        export_value = self.export_value
+        stack = self.stack
+
+        result = export_value(data)
+
+        while stack:
+            depth = len(stack)
+            values, container, is_list, data_id, ref = stack[-1]
+            for val in values:
+                if is_list:
+                    if not skip_None or val is not None:
+                        container.append(export_value(val))
+                else:
+                    key, val = val
+                    if not skip_None or val is not None:
+                        container[key] = export_value(val)
+
+                # If a new container was found, we need to fill it before continuing.
+                if len(stack) != depth:
+                    break
+            else:
+                stack.pop()
+                if data_id is not None:
+                    self.write_object(container, data_id, ref)
+
+        return result
+
+
+class _StoreReader(object):
+    """
+    Import an object graph from a store without recursion.
+    Only the objects reachable from the root are read.
+    """
+    def __init__(self, store, cache, decoder):
+        self.store = store
+        self.cache = cache
+        self.decoder = decoder
+        # The imported instances by their hash and copy number.
+        self.instances = {}
+        # The decoded objects by their hash.
+        self.documents = {}
+        # The instances being imported, used to resolve the '_back' references.
+        self.path = []
+        self.plans = {}
+        self.stack = []
+
+    def get_plan(self, cls_path, cls_module):
+        key = (cls_path, cls_module)
+        try:
+            return self.plans[key]
+        except KeyError:
+            plan = self.plans[key] = core.resolve_class_plan(cls_path, cls_module, self.cache)
+            return plan
+
+    def get_document(self, hash_):
+        try:
+            return self.documents[hash_]
+        except KeyError:
+            document = self.documents[hash_] = self.decoder.decode(self.store.read_object(hash_))
+            return document
+
+    def import_value(self, data):
+        if isinstance(data, dict) and '_hash' in data:
+            key = (data['_hash'], data.get('_copy', 0))
+            try:
+                return self.instances[key]
+            except KeyError:
+                pass
+
+            document = self.get_document(data['_hash'])
+            cls_path = document['_class']
+            plan = self.get_plan(cls_path, document.get('_class_module', None))
+            if plan is None:
+                core.logging.error("Can't create class instance for {0}, did you import to module?".format(cls_path))
+                instance = None
+            else:
+                instance = plan.create_instance()
+            self.instances[key] = instance
+            if instance is not None:
+                if plan.construction == core.CONSTRUCT_NEW:
+                    plan.reserve_attributes(instance, [name for name in document if name != '_class'])
+                self.path.append(instance)
+                self.stack.append((iter(sorted(document.items())), instance.__dict__, False, True))
+            return instance
+
+        if isinstance(data, dict) and '_back' in data:
+            return self.path[-1 - data['_back']]
+
+        if isinstance(data, list):
+            result = []
+            self.stack.append((iter(data), result, True, False))
+            return result
+
+        return data
+
+    def run(self, data):
+        import_value = self.import_value
+        stack = self.stack
+
+        result = import_value(data)
+
+        while stack:
+            depth = len(stack)
+            values, container, is_list, is_instance = stack[-1]
+            for val in values:
+                if is_list:
+                    container.append(import_value(val))
+                else:
+                    key, val = val
+                    if key == '_class':
+                        continue
+                    container[key] = import_value(val)
+
+                # If a new container was found, we need to fill it before continuing.
+                if len(stack) != depth:
+                    break
+            else:
+                stack.pop()
+                if is_instance:
+                    self.path.pop()
+
+        return result
+
+
+def export_store(data, path, store=None, skip_None=True, cls=None):
+    """
+    Export an object instance to a content-addressed store.
+    Each complex object is stored once under the hash of it's encoding, only the objects not already present
+    in the store are written. This make exporting multiple versions of the same object graph very cheap.
+    :param data: The object instance to export.
+    :param path: The path of the manifest file of this version.
+    :param store: The directory of the store, if not provided, the 'objects' directory next to the manifest is used.
+    :param skip_None: See export_dict.
+    :param cls: The JSONEncoder class used to encode the objects.
+    :return: The number of objects written in the store.
+    """
+    path_dir = os.path.dirname(path)
+    if path_dir and not os.path.exists(path_dir):
+        os.makedirs(path_dir)
+
+    if store is None:
+        store = os.path.join(path_dir, _DEFAULT_STORE)
+
+    # The encoding need to be canonical, otherwise the same object could produce a different hash.
+    encoder = (cls or json.JSONEncoder)(sort_keys=True, separators=(',', ':'))
+    writer = _StoreWriter(_ObjectStore(store), encoder, skip_None=skip_None)
+    root = writer.run(data)
+
+    manifest = {
+        '_store': os.path.relpath(store, path_dir or os.curdir),
+        '_root': root
+    }
+    with open(path, 'w') as fp:
+        fp.write(encoder.encode(manifest))
+
+    return writer.num_written
+
+
+def import_store(path, cls=None, **kwargs):
+    """
+    Import an object instance from a version exported with export_store.
+    :param path: The path of the manifest file of the version.
+    :param cls: The JSONDecoder class used to decode the objects.
+    :param kwargs: Any keyword arguments supported by the JSONDecoder.
+    :return: The imported object instance.
+    """
+    from cache import Cache
+
+    if not os.path.exists(path):
+        raise Exception("Can't importFromStore, file does not exist! {0}".format(path))
+
+    decoder = (cls or json.JSONDecoder)(**kwargs)
+    with open(path, 'r') as fp:
+        manifest = decoder.decode(fp.read())
+
+    store = os.path.join(os.path.dirname(path), manifest['_store'])
+    reader = _StoreReader(_ObjectStore(store), Cache(), decoder)
+    return reader.run(manifest['_root'])
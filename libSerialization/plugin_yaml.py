@@ -1,37 +1,257 @@
 import yaml
 import os
 import core
+import instrumentation
 
 __all__ = (
 	'export_yaml',
     'export_yaml_file',
     'import_yaml',
-    'import_yaml_file'
+    'import_yaml_file',
+    'export_yaml_many',
+    'import_yaml_many'
 )
 
-def export_yaml(data, **kwargs):
-	dicData = core.export_dict(data)
-	return yaml.dump(dicData, **kwargs)
+# Use the libyaml bindings when they are available, they are a lot faster than the pure python implementation.
+try:
+	from yaml import CSafeDumper as _BaseDumper, CSafeLoader as _BaseLoader
+except ImportError:
+	from yaml import SafeDumper as _BaseDumper, SafeLoader as _BaseLoader
 
-def export_yaml_file(data, path, mkdir=True, **kwargs):
-	if mkdir: 
-		os.makedirs(path)
+_TAG_MAP = u'tag:yaml.org,2002:map'
+_TAG_SEQ = u'tag:yaml.org,2002:seq'
 
-	dicData = core.export_dict(data)
+def _make_dir(path):
+	path_dir = os.path.dirname(path)
+
+	# Create destination folder if needed
+	if path_dir and not os.path.exists(path_dir):
+		os.makedirs(path_dir)
+
+def _emit_size(event, fp):
+	if instrumentation.enabled:
+		instrumentation.emit(event, fp.tell(), 'yaml')
+
+#
+# Yaml engine
+# The object instances are represented and constructed directly by the yaml dumper and loader,
+# without building the export_dict result. The document is the same than the one export_dict would produce.
+# Objects encountered multiple times (including cyclic references) are written as yaml aliases.
+#
+
+class _Dumper(_BaseDumper):
+	skip_None = True
+
+	def represent_serializable(self, data):
+		data_type = core.get_data_type(data)
+
+		if data_type == core.TYPE_COMPLEX:
+			if instrumentation.enabled:
+				instrumentation.emit(instrumentation.EVENT_OBJECT, data.__class__)
+			plan = core.get_class_plan(data.__class__)
+			mapping = plan.export_header(data)
+			skip_None = self.skip_None
+			for key, val in plan.iter_items(data):
+				if not skip_None or val is not None:
+					mapping[key] = val
+			return self.represent_mapping(_TAG_MAP, mapping)
+
+		if data_type == core.TYPE_LIST:
+			return self.represent_sequence(_TAG_SEQ, list(data))
+
+		return self.represent_undefined(data)
+
+# dict are exported as complex objects, everything else that yaml don't know is resolved by it's data type.
+_Dumper.add_representer(dict, _Dumper.represent_serializable)
+_Dumper.add_multi_representer(object, _Dumper.represent_serializable)
+
+class _DumperWithNone(_Dumper):
+	skip_None = False
+
+class _Loader(_BaseLoader):
+	def __init__(self, stream):
+		from cache import Cache
+
+		super(_Loader, self).__init__(stream)
+		self.cache = Cache()
+		self.plans = {}
+		# If False, the mappings are constructed as is and the document need to be imported with import_dict.
+		self.direct = True
+
+	def get_plan(self, cls_path, cls_module):
+		key = (cls_path, cls_module)
+		try:
+			return self.plans[key]
+		except KeyError:
+			plan = self.plans[key] = core.resolve_class_plan(cls_path, cls_module, self.cache)
+			return plan
+
+	def get_single_data(self):
+		node = self.get_single_node()
+		if node is None:
+			return None
+
+		# The class table and object table documents are resolved by import_dict.
+		if isinstance(node, yaml.MappingNode) and any(key.value in ('_classes', '_objects') for key, _ in node.value):
+			self.direct = False
+
+		return self.construct_document(node)
+
+	def construct_serializable(self, node):
+		cls_path = None
+		cls_module = None
+		if self.direct:
+			for key_node, value_node in node.value:
+				if key_node.value == '_class':
+					cls_path = value_node.value
+				elif key_node.value == '_class_module':
+					cls_module = value_node.value
+
+		if cls_path is None:
+			return self.construct_yaml_map(node)
+		return self.construct_instance(node, cls_path, cls_module)
+
+	def construct_instance(self, node, cls_path, cls_module):
+		plan = self.get_plan(cls_path, cls_module)
+		if plan is None:
+			core.logging.error("Can't create class instance for {0}, did you import to module?".format(cls_path))
+			yield None
+			return
+
+		if instrumentation.enabled:
+			instrumentation.emit(instrumentation.EVENT_OBJECT, plan.cls)
+
+		# The instance is provided before it's values are constructed since they might reference it.
+		instance = plan.create_instance()
+		yield instance
+		if instance is None:
+			return
+
+		values = self.construct_mapping(node)
+		values.pop('_class', None)
+		if plan.construction == core.CONSTRUCT_NEW:
+			plan.reserve_attributes(instance, values)
+		instance.__dict__.update(values)
+
+	def construct_python_unicode(self, node):
+		return self.construct_scalar(node)
+
+_Loader.add_constructor(_TAG_MAP, _Loader.construct_serializable)
+# The files exported by previous versions can contain python2 unicode strings.
+_Loader.add_constructor(u'tag:yaml.org,2002:python/unicode', _Loader.construct_python_unicode)
+
+def _load(stream):
+	loader = _Loader(stream)
+	try:
+		with instrumentation.measure(instrumentation.EVENT_DECODE, 'yaml'):
+			data = loader.get_single_data()
+	finally:
+		loader.dispose()
+
+	if not loader.direct:
+		data = core.import_dict(data)
+	return data
+
+def export_yaml(data, skip_None=True, **kwargs):
+	"""
+	Export an object instance to a yaml string.
+	:param data: The object instance to export.
+	:param skip_None: See export_dict.
+	:param kwargs: Any keyword arguments supported by yaml.dump.
+	:return: The yaml string.
+	"""
+	with instrumentation.measure(instrumentation.EVENT_ENCODE, 'yaml'):
+		return yaml.dump(data, Dumper=_Dumper if skip_None else _DumperWithNone, **kwargs)
+
+def export_yaml_file(data, path, mkdir=True, skip_None=True, **kwargs):
+	"""
+	Export an object instance to a yaml file.
+	:param data: The object instance to export.
+	:param path: The path of the yaml file.
+	:param mkdir: If True, the destination folder will be created if needed.
+	:param skip_None: See export_dict.
+	:param kwargs: Any keyword arguments supported by yaml.dump.
+	:return: True on success.
+	"""
+	if mkdir:
+		_make_dir(path)
 
 	with open(path, 'w') as fp:
-		yaml.dump(dicData, fp)
+		with instrumentation.measure(instrumentation.EVENT_ENCODE, 'yaml'):
+			yaml.dump(data, fp, Dumper=_Dumper if skip_None else _DumperWithNone, **kwargs)
+		_emit_size(instrumentation.EVENT_BYTES_WRITTEN, fp)
 
 	return True
 
 def import_yaml(str_, **kwargs):
-	data = yaml.load(str_)
-	return core.import_dict(data)
+	"""
+	Import an object instance from a yaml string.
+	:param str_: The yaml string.
+	:return: The imported object instance.
+	"""
+	if instrumentation.enabled:
+		instrumentation.emit(instrumentation.EVENT_BYTES_READ, len(str_), 'yaml')
+	return _load(str_)
 
 def import_yaml_file(path, **kwargs):
+	"""
+	Import an object instance from a yaml file.
+	:param path: The path of the yaml file.
+	:return: The imported object instance.
+	"""
 	if not os.path.exists(path):
 		raise Exception("Can't importFromYamlFile, file does not exist! {0}".format(path))
 
 	with open(path, 'r') as fp:
-		data = yaml.load(fp)
-	return core.import_dict(data)
+		data = _load(fp)
+		_emit_size(instrumentation.EVENT_BYTES_READ, fp)
+	return data
+
+def _write_yaml_file(args):
+	data, path, mkdir, skip_None, kwargs = args
+	return export_yaml_file(data, path, mkdir=mkdir, skip_None=skip_None, **kwargs)
+
+def export_yaml_many(values, paths=None, path=None, mkdir=True, skip_None=True, workers=None, **kwargs):
+	"""
+	Export multiple object instances to yaml files, either one file per instance or a single document.
+	The instances are written by the same dumper than export_yaml_file.
+	:param values: An iterable of object instances.
+	:param paths: The path of the yaml file of each instance.
+	:param path: The path of a single yaml file that will contain the list of every instances.
+	:param mkdir: If True, the destination folders will be created if needed.
+	:param skip_None: See export_dict.
+	:param workers: The number of processes used to encode and write the files when using paths.
+	If None, everything is done in the current process. If 0, one process is used for each cpu.
+	Note that the instances are sent to the processes, they need to be picklable.
+	:param kwargs: Any keyword arguments supported by yaml.dump.
+	:return: True on success.
+	"""
+	if (paths is None) == (path is None):
+		raise ValueError("Expected either paths or path.")
+
+	if path is not None:
+		return export_yaml_file(list(values), path, mkdir=mkdir, skip_None=skip_None, **kwargs)
+
+	values = list(values)
+	paths = list(paths)
+	if len(values) != len(paths):
+		raise ValueError("Expected one path for each value, got {0} paths for {1} values.".format(len(paths), len(values)))
+
+	core.map_with_pool(
+		_write_yaml_file,
+		[(value, path, mkdir, skip_None, kwargs) for value, path in zip(values, paths)],
+		workers=workers
+	)
+	return True
+
+def import_yaml_many(paths, workers=None, **kwargs):
+	"""
+	Import multiple yaml files exported by export_yaml_file or export_yaml_many.
+	Each file is read by the same loader than import_yaml_file.
+	:param paths: The path of each yaml file.
+	:param workers: The number of processes used to read and decode the files.
+	If None, everything is done in the current process. If 0, one process is used for each cpu.
+	Note that the imported instances are sent back from the processes, they need to be picklable.
+	:return: A list containing the imported object instance of each file.
+	"""
+	return core.map_with_pool(import_yaml_file, list(paths), workers=workers)
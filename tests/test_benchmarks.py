@@ -0,0 +1,33 @@
+"""
+Smoke test of the benchmarks, maya is not needed.
+"""
+import os
+import imp
+import sys
+import unittest
+
+path_benchmarks_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+if path_benchmarks_dir not in sys.path:
+    sys.path.append(path_benchmarks_dir)
+
+# The benchmarks entry point is loaded from it's path since tests/run.py use the same name.
+benchmarks = imp.load_source('libSerialization_benchmarks', os.path.join(path_benchmarks_dir, 'run.py'))
+
+
+class BenchmarksTests(unittest.TestCase):
+    def test_run(self):
+        results = benchmarks.run(size=50, repeat=1)
+        for name, _, _ in benchmarks.graphs.GRAPHS:
+            self.assertTrue('{0}/export_json'.format(name) in results)
+            self.assertTrue('{0}/import_json'.format(name) in results)
+        for result in results.values():
+            self.assertEqual(result['repeat'], 1)
+            self.assertTrue(result['p50'] >= 0)
+
+    def test_deep_graph_depth(self):
+        graph, num_objects = benchmarks.graphs.create_deep(benchmarks.graphs.MAX_DEPTH * 10)
+        self.assertEqual(num_objects, benchmarks.graphs.MAX_DEPTH + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
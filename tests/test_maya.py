@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 import mayaunittest
 from maya import cmds
@@ -44,6 +45,11 @@ class C(B, A):
     pass
 
 
+class Expensive(A):
+    def __init__(self):
+        raise Exception("The constructor should not be called.")
+
+
 class SampleTests(mayaunittest.TestCase):
 
     @log_execution_time
@@ -69,6 +75,23 @@ class SampleTests(mayaunittest.TestCase):
         self.assertTrue(result['_class'] == 'C')
         self.assertTrue(result['_class_namespace'] == 'A.B.C')
 
+    def test_register_type(self):
+        from libSerialization import core
+
+        inst = A()
+        self.assertTrue(core.get_data_type(inst) == core.TYPE_COMPLEX)
+
+        core.register_type(A, core.TYPE_DAGNODE)
+        try:
+            self.assertTrue(core.get_data_type(inst) == core.TYPE_DAGNODE)
+            self.assertTrue(core.get_data_type(C()) == core.TYPE_DAGNODE)
+        finally:
+            core.unregister_type(A)
+        self.assertTrue(core.get_data_type(inst) == core.TYPE_COMPLEX)
+
+        # pymel datatypes are never considered as complex datatypes.
+        self.assertTrue(core.get_data_type(pymel.createNode('transform')) == core.TYPE_DAGNODE)
+
     def test_export_network(self, epsilon=0.00001):
         pynode_a = pymel.createNode('transform')
         pynode_b = pymel.createNode('transform')
@@ -102,6 +125,102 @@ class SampleTests(mayaunittest.TestCase):
         self.assertTrue(abs(network_ex_float- new_instance.ex_float) < epsilon)
         self.assertTrue(network_ex_str == new_instance.ex_str)
 
+    def test_export_network_batch(self, epsilon=0.00001):
+        pynode_a = pymel.createNode('transform')
+
+        old_instance = A()
+        old_instance.ex_int = 42
+        old_instance.ex_float = 3.14159
+        old_instance.ex_str = 'Hello World'
+        old_instance.ex_list_pynode = [None, pynode_a]
+        old_instance.ex_children = [A(), B()]
+        old_instance.ex_children[1].parent = old_instance
+
+        n = libSerialization.export_network(old_instance, batch=True)
+        self.assertTrue(n.ex_int.get() == old_instance.ex_int)
+        self.assertTrue(n.ex_list_pynode[1].inputs() == [pynode_a])
+        self.assertTrue(old_instance._network == n)
+        self.assertTrue(old_instance.ex_children[1]._network.parent.inputs() == [n])
+
+        new_instance = libSerialization.import_network(n)
+        self.assertTrue(abs(new_instance.ex_float - old_instance.ex_float) < epsilon)
+        self.assertTrue(new_instance.ex_str == old_instance.ex_str)
+        self.assertTrue([type(child) for child in new_instance.ex_children] == [A, B])
+        self.assertTrue(new_instance.ex_children[1].parent is new_instance)
+
+        # A single undo revert the whole export.
+        num_networks = len(pymel.ls(type='network'))
+        libSerialization.export_network(A(), batch=True)
+        self.assertEqual(len(pymel.ls(type='network')), num_networks + 1)
+        cmds.undo()
+        self.assertEqual(len(pymel.ls(type='network')), num_networks)
+
+    def test_import_network_types(self, epsilon=0.00001):
+        pynode_a = pymel.createNode('transform')
+
+        old_instance = A()
+        old_instance.ex_bool = True
+        old_instance.ex_list_int = [None, 1, 2]
+        old_instance.ex_vector = pymel.datatypes.Vector(1.0, 2.0, 3.0)
+        old_instance.ex_attr = pynode_a.translateX
+        old_instance.ex_pynode = pynode_a
+        old_instance.ex_shared = [B(), None]
+        old_instance.ex_shared[1] = old_instance.ex_shared[0]
+
+        n = libSerialization.export_network(old_instance)
+        new_instance = libSerialization.import_network(n)
+        self.assertTrue(new_instance.ex_bool is True)
+        self.assertEqual(new_instance.ex_list_int, [None, 1, 2])
+        self.assertTrue(abs(new_instance.ex_vector.y - 2.0) < epsilon)
+        self.assertEqual(new_instance.ex_attr, pynode_a.translateX)
+        self.assertEqual(new_instance.ex_pynode, pynode_a)
+        self.assertTrue(new_instance.ex_shared[0] is new_instance.ex_shared[1])
+        self.assertEqual(new_instance._network, n)
+        self.assertEqual(libSerialization.import_network(pynode_a), pynode_a)
+
+        # The skipped networks are provided as pymel.PyNode.
+        skipped = []
+        new_instance = libSerialization.import_network(n, fn_skip=lambda network: skipped.append(network) or network != n)
+        self.assertEqual(new_instance.ex_shared, [None, None])
+        self.assertTrue(all(isinstance(network, pymel.nodetypes.Network) for network in skipped))
+
+    def test_export_network_typed_arrays(self, epsilon=0.00001):
+        old_instance = A()
+        old_instance.ex_ints = range(1000)
+        old_instance.ex_floats = [i * 0.5 for i in range(1000)]
+        old_instance.ex_strs = ['a', u'b', 'c']
+        old_instance.ex_mixed = [1, 2.0]
+        old_instance.ex_child = B()
+        old_instance.ex_child.ex_floats = [0.5, 1.5]
+
+        for batch in (False, True):
+            n = libSerialization.export_network(old_instance, batch=batch, typed_arrays=True)
+            self.assertEqual(n.ex_ints.type(), 'Int32Array')
+            self.assertEqual(n.ex_floats.type(), 'doubleArray')
+            self.assertEqual(n.ex_strs.type(), 'stringArray')
+            self.assertTrue(n.ex_mixed.isMulti())
+            self.assertEqual(old_instance.ex_child._network.ex_floats.type(), 'doubleArray')
+
+            new_instance = libSerialization.import_network(n)
+            self.assertEqual(list(new_instance.ex_ints), old_instance.ex_ints)
+            self.assertTrue(all(abs(a - b) < epsilon for a, b in zip(new_instance.ex_floats, old_instance.ex_floats)))
+            self.assertEqual(list(new_instance.ex_strs), old_instance.ex_strs)
+            self.assertEqual(list(new_instance.ex_child.ex_floats), old_instance.ex_child.ex_floats)
+
+    def test_networks_from_class(self):
+        from libSerialization import plugin_maya
+
+        n = libSerialization.export_network(B())
+        self.assertTrue(n in libSerialization.get_networks_from_class('B'))
+        n.attr('_class_namespace').set('C')
+        self.assertTrue(n not in libSerialization.get_networks_from_class('B'))
+
+        # Reloading the module remove the callbacks of the previous index.
+        index = plugin_maya._network_index
+        self.assertTrue(index.callbacks)
+        reload(plugin_maya)
+        self.assertTrue(index.callbacks == [] and index.index is None)
+
     def test_cache_invalidation(self):
         pass
 
@@ -115,6 +234,536 @@ class SampleTests(mayaunittest.TestCase):
         data = libSerialization.export_dict(parent)
         self.assertTrue(isinstance(data, dict))
 
+    def test_deep_graph(self):
+        # Ensure we don't hit the recursion limit on deep graphs.
+        root = node = A()
+        for i in range(sys.getrecursionlimit() * 2):
+            node.child = A()
+            node = node.child
+
+        data = libSerialization.export_dict(root)
+        new_root = libSerialization.import_dict(data)
+
+        depth = 0
+        while hasattr(new_root, 'child'):
+            new_root = new_root.child
+            depth += 1
+        self.assertTrue(depth == sys.getrecursionlimit() * 2)
+
+    def test_deep_graph_json(self):
+        # The json encoders use recursion, deep graphs fallback on the stream writer.
+        root = node = A()
+        for i in range(500):
+            node.child = A()
+            node.child.ex_int = i
+            node = node.child
+
+        for kwargs in ({'indent': None}, {'indent': None, 'references': True}, {'indent': 4}):
+            data = libSerialization.export_json(root, **kwargs)
+            new_root = libSerialization.import_json(data)
+
+            depth = 0
+            while hasattr(new_root, 'child'):
+                new_root = new_root.child
+                depth += 1
+            self.assertTrue(depth == 500)
+            self.assertTrue(new_root.ex_int == 499)
+
+    def test_cyclic_reference_import(self):
+        parent = A()
+        child = A()
+        parent.children = [child]
+        child.parent = parent
+
+        data = libSerialization.export_dict(parent)
+        new_parent = libSerialization.import_dict(data)
+        self.assertTrue(new_parent.children[0].parent is new_parent)
+
+    def test_references(self):
+        shared = A()
+        parent = A()
+        parent.children = [shared, shared]
+        parent.child = A()
+        parent.child.parent = parent
+        parent.child.shared = shared
+
+        data = libSerialization.export_json(parent, references=True)
+        new_parent = libSerialization.import_json(data)
+        self.assertTrue(new_parent.children[0] is new_parent.children[1])
+        self.assertTrue(new_parent.children[0] is new_parent.child.shared)
+        self.assertTrue(new_parent.child.parent is new_parent)
+
+    def test_export_json_stream(self):
+        import json
+        import tempfile
+
+        shared = A()
+        shared.ex_float = 3.14159
+        inst = A()
+        inst.ex_list = [shared, shared, 'Hello World', None, [1, 2]]
+        inst.ex_child = A()
+
+        path_dict = tempfile.mktemp(suffix='.json')
+        path_stream = tempfile.mktemp(suffix='.json')
+        for kwargs in ({}, {'compact': True}):
+            libSerialization.export_json_file(inst, path_dict, sort_keys=True, **kwargs)
+            libSerialization.export_json_file(inst, path_stream, stream=True, sort_keys=True, **kwargs)
+            with open(path_dict) as fp_dict, open(path_stream) as fp_stream:
+                self.assertTrue(fp_dict.read() == fp_stream.read())
+
+        # Uids and class indexes depend on the traversal order, so only validate the result.
+        for kwargs in ({'references': True}, {'references': True, 'class_table': True}):
+            libSerialization.export_json_file(inst, path_stream, stream=True, **kwargs)
+            new_inst = libSerialization.import_json_file(path_stream)
+            self.assertTrue(new_inst.ex_list[0] is new_inst.ex_list[1])
+            self.assertTrue(new_inst.ex_list[2:] == ['Hello World', [1, 2]])
+
+    def test_import_json_lazy(self):
+        import tempfile
+
+        inst = A()
+        inst.ex_int = 42
+        inst.ex_child = A()
+        inst.ex_child.ex_str = 'Hello World'
+        inst.ex_list = [inst.ex_child, B()]
+
+        path = tempfile.mktemp(suffix='.json')
+        libSerialization.export_json_file(inst, path, references=True)
+
+        new_inst = libSerialization.import_json_file(path, lazy=True)
+        self.assertTrue(new_inst.ex_int == 42)
+        self.assertTrue(isinstance(new_inst.ex_child, libSerialization.LazyObject))
+        self.assertTrue(new_inst.ex_child.ex_str == 'Hello World')
+        self.assertTrue(isinstance(new_inst.ex_list[1], B))
+
+        new_inst = libSerialization.materialize(new_inst)
+        self.assertTrue(type(new_inst.ex_child) is A)
+        self.assertTrue(new_inst.ex_list[0] is new_inst.ex_child)
+
+    def test_materialize_eager(self):
+        inst = A()
+        inst.ex_child = A()
+        inst.ex_child.ex_parent = inst
+        inst.ex_list = [inst.ex_child, B()]
+
+        # Nothing but the root is instantiated, the whole document is imported eagerly.
+        new_inst = libSerialization.import_json(libSerialization.export_json(inst, references=True), lazy=True)
+        proxy = new_inst.ex_child
+        self.assertTrue(libSerialization.materialize(new_inst) is new_inst)
+        self.assertTrue(type(new_inst.ex_child) is A)
+        self.assertTrue(new_inst.ex_child.ex_parent is new_inst)
+        self.assertTrue(new_inst.ex_list[0] is new_inst.ex_child)
+        # The proxies given out before still point to the same instances.
+        self.assertTrue(proxy.ex_parent is new_inst)
+
+    def test_binary(self, epsilon=0.00001):
+        import tempfile
+
+        inst = A()
+        inst.ex_int = -42
+        inst.ex_float = 3.14159
+        inst.ex_str = 'Hello World'
+        inst.ex_bool = True
+        inst.ex_child = A()
+        inst.ex_child.parent = inst
+        inst.ex_list = [inst.ex_child, 1, [2, 3]]
+
+        path = tempfile.mktemp(suffix='.bin')
+        libSerialization.export_binary_file(inst, path)
+        new_inst = libSerialization.import_binary_file(path)
+        self.assertTrue(new_inst.ex_int == inst.ex_int)
+        self.assertTrue(abs(new_inst.ex_float - inst.ex_float) < epsilon)
+        self.assertTrue(new_inst.ex_str == inst.ex_str)
+        self.assertTrue(new_inst.ex_bool is True)
+        self.assertTrue(new_inst.ex_child.parent is new_inst)
+        self.assertTrue(new_inst.ex_list[0] is new_inst.ex_child)
+        self.assertTrue(new_inst.ex_list[2] == [2, 3])
+
+        # The in-memory buffers are supported too.
+        data = libSerialization.export_binary(inst)
+        for buf in (data, bytearray(data), memoryview(data)):
+            new_inst = libSerialization.import_binary(buf)
+            self.assertTrue(new_inst.ex_str == inst.ex_str)
+            self.assertTrue(new_inst.ex_child.parent is new_inst)
+
+    def test_class_table(self):
+        inst = A()
+        inst.ex_children = [C(), C(), B()]
+        inst.ex_children[0].parent = inst
+
+        data = libSerialization.export_dict(inst, class_table=True, references=True)
+        self.assertTrue(len(data['_classes']) == 3)
+        self.assertTrue(data['_root']['ex_children'][1]['_class_index'] == 1)
+
+        new_inst = libSerialization.import_dict(data)
+        self.assertTrue([type(child) for child in new_inst.ex_children] == [C, C, B])
+        self.assertTrue(new_inst.ex_children[0].parent is new_inst)
+
+    def test_class_index(self):
+        from libSerialization.cache import ClassIndex
+        index = ClassIndex()
+        self.assertTrue(index.get_class_by_name('C', base_class=B) is C)
+        self.assertTrue(index.get_class_by_name('C', base_class=int) is None)
+        self.assertTrue(index.get_class_by_namespace('A.B.C') is C)
+        self.assertTrue(index.get_class_by_namespace('B.C') is None)
+
+        # A lookup that missed don't scan the classes again until the index change.
+        generation = index.generation
+        scan = index.scan
+        index.scan = lambda *args: self.fail("The classes were scanned again.")
+        self.assertTrue(index.get_class_by_namespace('B.C') is None)
+        self.assertTrue(index.misses[('namespace', 'B.C', None, object)] == 2)
+        index.scan = scan
+        self.assertTrue(index.generation == generation)
+
+        # Classes defined after the index was built are found on the next lookup.
+        class D(C):
+            pass
+        self.assertTrue(index.get_class_by_namespace('A.B.C.D') is D)
+
+    def test_class_index_weak(self):
+        import gc
+        import weakref
+        from libSerialization import cache
+
+        # The shared index don't keep the classes alive.
+        class Temporary(object):
+            pass
+        index = cache.get_class_index()
+        self.assertTrue(index.get_class_by_name('Temporary') is Temporary)
+
+        ref = weakref.ref(Temporary)
+        del Temporary
+        gc.collect()
+        self.assertTrue(ref() is None)
+        self.assertTrue(index.get_class_by_name('Temporary') is None)
+
+    def test_memoized(self):
+        from libSerialization.cache import Cache
+
+        # Each cache instance have it's own bounded memoization.
+        cache_a = Cache()
+        cache_b = Cache()
+        cache_a.get_class_by_name('A')
+        cache_a.get_class_by_name('A')
+        self.assertTrue(cache_a.get_class_by_name.cache_info().hits == 1)
+        self.assertTrue(cache_b.get_class_by_name.cache_info().currsize == 0)
+
+    def test_shared_class_index(self):
+        from libSerialization import cache
+
+        # Every cache use the same class index unless told otherwise.
+        self.assertTrue(cache.Cache().classes is cache.Cache().classes)
+
+        index = cache.get_class_index()
+        generation = index.generation
+        cache.invalidate_class_index(__name__)
+        self.assertTrue(index.generation > generation)
+        self.assertTrue(cache.Cache().get_class_by_name('C', module_name=__name__.split('.')[0]) is C)
+
+    def test_class_plan(self):
+        from libSerialization import core
+
+        # The plan of a class is created once and reused by every export and import.
+        inst = A()
+        inst.ex_int = 42
+        libSerialization.export_dict(inst)
+        plan = core.get_class_plan(A)
+        libSerialization.import_dict(libSerialization.export_dict(inst))
+        libSerialization.export_json(inst)
+        self.assertTrue(core.get_class_plan(A) is plan)
+        self.assertTrue(plan.cls is A)
+
+    def test_class_plan_reload(self):
+        import gc
+        import types
+        import weakref
+        from libSerialization import core
+        from libSerialization.cache import Cache
+
+        # Simulate the reload of a module by defining the same class twice.
+        module = types.ModuleType('libSerialization_test_reload')
+        sys.modules[module.__name__] = module
+        try:
+            exec('class Reloaded(object):\n    pass\n', module.__dict__)
+            old_cls = module.Reloaded
+            libSerialization.export_dict(old_cls())
+            self.assertTrue(old_cls in core._class_plans)
+
+            exec('class Reloaded(object):\n    pass\n', module.__dict__)
+            self.assertTrue(core.get_class_latest_definition(old_cls) is module.Reloaded)
+            self.assertTrue(old_cls not in core._class_plans)
+            self.assertTrue(Cache().get_class_plan(old_cls).cls is module.Reloaded)
+
+            # The plans don't keep the outdated definition alive.
+            ref = weakref.ref(old_cls)
+            del old_cls
+            gc.collect()
+            self.assertTrue(ref() is None)
+        finally:
+            del sys.modules[module.__name__]
+
+    def test_register_construction(self):
+        from libSerialization import core
+
+        inst = A()
+        inst.ex_child = Expensive.__new__(Expensive)
+        inst.ex_child.ex_int = 42
+        inst.ex_child.parent = inst
+        data = libSerialization.export_dict(inst)
+
+        core.register_construction(Expensive, core.CONSTRUCT_NEW)
+        try:
+            new_inst = libSerialization.import_dict(data)
+        finally:
+            core.unregister_construction(Expensive)
+        self.assertTrue(isinstance(new_inst.ex_child, Expensive))
+        self.assertTrue(new_inst.ex_child.ex_int == 42)
+        self.assertTrue(new_inst.ex_child.parent is new_inst)
+
+    def test_export_json_many(self):
+        import tempfile
+
+        values = [A(), B(), C()]
+        for i, value in enumerate(values):
+            value.ex_int = i
+
+        dirname = tempfile.mkdtemp()
+        paths = [os.path.join(dirname, '{0}.json'.format(i)) for i in range(len(values))]
+        libSerialization.export_json_many(values, paths=paths)
+        new_values = libSerialization.import_json_many(paths)
+        self.assertTrue([type(value) for value in new_values] == [A, B, C])
+        self.assertTrue([value.ex_int for value in new_values] == [0, 1, 2])
+
+        # Export everything in a single document.
+        path = os.path.join(dirname, 'all.json')
+        libSerialization.export_json_many(values, path=path)
+        new_values = libSerialization.import_json_file(path)
+        self.assertTrue([value.ex_int for value in new_values] == [0, 1, 2])
+
+        # Each file is an independent document, even if the instances share objects.
+        shared = B()
+        shared.ex_int = 42
+        values[1].ex_shared = values[2].ex_shared = shared
+        libSerialization.export_json_many(values, paths=paths, class_table=True)
+        new_values = libSerialization.import_json_many(paths)
+        self.assertTrue(type(new_values[2].ex_shared) is B)
+        self.assertTrue(new_values[2].ex_shared.ex_int == 42)
+
+    def test_import_json_files(self):
+        import tempfile
+
+        dirname = tempfile.mkdtemp()
+        paths = [os.path.join(dirname, '{0}.json'.format(i)) for i in range(3)]
+        for i, path in enumerate(paths):
+            inst = A()
+            inst.ex_int = i
+            libSerialization.export_json_file(inst, path)
+        paths.insert(1, os.path.join(dirname, 'missing.json'))
+
+        results = libSerialization.import_json_files(paths, workers=2)
+        self.assertTrue([result.path for result in results] == paths)
+        self.assertTrue(results[1].value is None and isinstance(results[1].error, IOError))
+        self.assertTrue([result.value.ex_int for result in results if result.error is None] == [0, 1, 2])
+
+        # The files are either read by threads or by processes.
+        self.assertRaises(ValueError, libSerialization.import_json_files, paths, workers=2, processes=2)
+
+    def test_incremental_export(self):
+        import tempfile
+
+        inst = A()
+        inst.ex_children = [A(), A(), A()]
+        for i, child in enumerate(inst.ex_children):
+            child.ex_int = i
+            child.parent = inst
+
+        dirname = tempfile.mkdtemp()
+        path = os.path.join(dirname, 'document.json')
+        path_delta = os.path.join(dirname, 'document.1.json')
+
+        exporter = libSerialization.IncrementalExporter()
+        exporter.export_json_file(inst, path)
+
+        # Only the changed objects are part of the delta.
+        inst.ex_children[1].ex_int = 42
+        inst.ex_children.pop(2)
+        exporter.export_json_delta_file(inst, path_delta)
+        self.assertTrue(len(exporter.changed) == 2)
+        self.assertTrue(len(exporter.removed) == 1)
+
+        new_inst = libSerialization.import_json_file(path, deltas=[path_delta])
+        self.assertTrue([child.ex_int for child in new_inst.ex_children] == [0, 42])
+        self.assertTrue(new_inst.ex_children[0].parent is new_inst)
+
+        # Only the dirty objects are exported again.
+        inst.ex_children[0].ex_int = 7
+        inst.ex_children[1].ex_int = 8
+        path_delta_dirty = os.path.join(dirname, 'document.2.json')
+        exporter.export_json_delta_file(inst, path_delta_dirty, dirty=[inst.ex_children[0]])
+        self.assertTrue(len(exporter.changed) == 1 and not exporter.removed)
+
+        new_inst = libSerialization.import_json_file(path, deltas=[path_delta, path_delta_dirty])
+        self.assertTrue([child.ex_int for child in new_inst.ex_children] == [7, 42])
+
+        # The change that was not marked as dirty is caught by the next full compare.
+        for _ in range(exporter.verify_interval - 1):
+            exporter.update(inst, dirty=[])
+            self.assertTrue(not exporter.changed)
+        exporter.update(inst, dirty=[])
+        self.assertTrue(len(exporter.changed) == 1)
+
+    def test_incremental_export_list(self):
+        values = [A(), A()]
+        values[0].ex_child = A()
+        exporter = libSerialization.IncrementalExporter()
+        exporter.update(values)
+
+        # The objects referenced by a list root are tracked like the ones referenced by an object.
+        values[0].ex_int = 1
+        exporter.update(values, dirty=[values[0]])
+        self.assertTrue(len(exporter.changed) == 1 and not exporter.removed)
+        exporter.update(values[:1], dirty=[])
+        self.assertTrue(len(exporter.removed) == 1)
+
+        new_values = libSerialization.import_json(exporter.get_document())
+        self.assertTrue([value.ex_int for value in new_values] == [1])
+        self.assertTrue(type(new_values[0].ex_child) is A)
+
+    def test_store(self):
+        import tempfile
+
+        inst = A()
+        inst.ex_children = [A(), A(), B()]
+        for child in inst.ex_children:
+            child.parent = inst
+        inst.ex_shared = inst.ex_children[2]
+
+        dirname = tempfile.mkdtemp()
+        path_v1 = os.path.join(dirname, 'v1.json')
+        path_v2 = os.path.join(dirname, 'v2.json')
+        libSerialization.export_store(inst, path_v1)
+
+        # Only the changed object and the objects containing it are written.
+        inst.ex_children[2].ex_int = 42
+        self.assertTrue(libSerialization.export_store(inst, path_v2) == 2)
+
+        new_inst = libSerialization.import_store(path_v2)
+        self.assertTrue([type(child) for child in new_inst.ex_children] == [A, A, B])
+        self.assertTrue(new_inst.ex_children[0] is not new_inst.ex_children[1])
+        self.assertTrue(new_inst.ex_children[0].parent is new_inst)
+        self.assertTrue(new_inst.ex_shared is new_inst.ex_children[2])
+        self.assertTrue(new_inst.ex_shared.ex_int == 42)
+
+        new_inst = libSerialization.import_store(path_v1)
+        self.assertTrue(not hasattr(new_inst.ex_shared, 'ex_int'))
+
+        # The objects have the same permissions as the manifest.
+        store = os.path.join(dirname, 'objects')
+        path_object = os.path.join(store, os.listdir(store)[0])
+        path_object = os.path.join(path_object, os.listdir(path_object)[0])
+        self.assertTrue(os.stat(path_object).st_mode == os.stat(path_v1).st_mode)
+
+    def test_json_encoder(self):
+        import json
+
+        inst = A()
+        inst.ex_children = [A(), None, B()]
+        inst.ex_children[0].parent = inst
+        inst.ex_none = None
+
+        # The encoder produce the same document than the export_dict result.
+        data = libSerialization.export_dict(inst, references=True)
+        encoder = libSerialization.SerializableJSONEncoder(references=True, sort_keys=True)
+        self.assertTrue(json.loads(encoder.encode(inst)) == json.loads(json.dumps(data, sort_keys=True)))
+
+        new_inst = libSerialization.import_json(libSerialization.export_json(inst, references=True, compact=True))
+        self.assertTrue([type(child) for child in new_inst.ex_children] == [A, B])
+        self.assertTrue(new_inst.ex_children[0].parent is new_inst)
+
+        # The values that are not serializable are passed to the combined encoder.
+        class SetEncoder(json.JSONEncoder):
+            def default(self, o):
+                if isinstance(o, set):
+                    return sorted(o)
+                return super(SetEncoder, self).default(o)
+
+        inst = A()
+        inst.ex_set = set([2, 1])
+        data = json.loads(libSerialization.export_json(inst, compact=True, cls=SetEncoder))
+        self.assertTrue(data['ex_set'] == [1, 2])
+
+    def test_yaml(self):
+        import tempfile
+
+        inst = A()
+        inst.ex_children = [A(), B()]
+        inst.ex_children[0].parent = inst
+        inst.ex_shared = inst.ex_children[1]
+        inst.ex_tuple = (1, 2.5, 'a')
+
+        # The destination folder is created if needed.
+        path = os.path.join(tempfile.mkdtemp(), 'sub', 'document.yml')
+        libSerialization.export_yaml_file(inst, path)
+        new_inst = libSerialization.import_yaml_file(path)
+        self.assertTrue([type(child) for child in new_inst.ex_children] == [A, B])
+        self.assertTrue(new_inst.ex_children[0].parent is new_inst)
+        self.assertTrue(new_inst.ex_shared is new_inst.ex_children[1])
+        self.assertTrue(new_inst.ex_tuple == [1, 2.5, 'a'])
+
+    def test_yaml_many(self):
+        import tempfile
+
+        values = [A(), B(), C()]
+        for i, value in enumerate(values):
+            value.ex_int = i
+        values[2].ex_shared = values[0]
+
+        dirname = tempfile.mkdtemp()
+        paths = [os.path.join(dirname, '{0}.yml'.format(i)) for i in range(len(values))]
+        libSerialization.export_yaml_many(values, paths=paths)
+        new_values = libSerialization.import_yaml_many(paths)
+        self.assertTrue([type(value) for value in new_values] == [A, B, C])
+        self.assertTrue([value.ex_int for value in new_values] == [0, 1, 2])
+
+        # The single document preserve the references between the instances.
+        path = os.path.join(dirname, 'all.yml')
+        libSerialization.export_yaml_many(values, path=path)
+        new_values = libSerialization.import_yaml_file(path)
+        self.assertTrue(new_values[2].ex_shared is new_values[0])
+
+    def test_instrumentation(self):
+        import tempfile
+
+        inst = A()
+        inst.ex_children = [A(), B()]
+        inst.ex_shared = inst.ex_children[1]
+
+        events = []
+        hook = lambda event, value, info: events.append(event)
+        libSerialization.register_hook(hook)
+        try:
+            path = os.path.join(tempfile.mkdtemp(), 'document.json')
+            with libSerialization.collect_stats() as stats:
+                libSerialization.export_json_file(inst, path)
+                libSerialization.import_json_file(path)
+        finally:
+            libSerialization.unregister_hook(hook)
+
+        # The shared object is visited twice when exporting, and since references are not preserved, imported twice.
+        objects = stats.get_objects_by_class_name()
+        self.assertTrue(objects[A.__module__ + '.A'] == 4)
+        self.assertTrue(objects[B.__module__ + '.B'] == 4)
+        self.assertTrue(stats.cache_hits['values'] == 1)
+        self.assertTrue(stats.bytes_written == os.path.getsize(path))
+        self.assertTrue(stats.bytes_read == stats.bytes_written)
+        self.assertTrue(stats.encode_time > 0 and stats.decode_time > 0)
+        self.assertTrue('object' in events)
+
+        # Nothing is collected once the hooks are unregistered.
+        libSerialization.export_json(inst)
+        self.assertTrue(sum(stats.objects.values()) == 8)
+
     def test_cyclic_reference_network(self):
         parent = A()
         child = A()
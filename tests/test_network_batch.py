@@ -0,0 +1,333 @@
+"""
+Test the batched network export against an in-memory stand-in for maya.OpenMaya, maya is not needed.
+"""
+import os
+import sys
+import unittest
+
+path_module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if path_module_dir not in sys.path:
+    sys.path.append(path_module_dir)
+
+from libSerialization import core
+from libSerialization import network_batch
+from libSerialization.cache import Cache
+
+
+class A(object):
+    pass
+
+
+class B(object):
+    pass
+
+
+#
+# In-memory stand-in for the part of maya.OpenMaya used by the NetworkBuilder.
+# The modifier only apply it's operations when doIt is called, like the real one.
+#
+
+class _FakeAttr(object):
+    def __init__(self, name):
+        self.name = name
+        self.nice_name = None
+
+
+class _FakeFnAttribute(object):
+    def __init__(self, attr=None):
+        self.attr = attr
+        self.array = False
+
+    def create(self, name, short_name, *args):
+        self.attr = _FakeAttr(name)
+        return self.attr
+
+    def setArray(self, array):
+        self.array = array
+
+    def setNiceNameOverride(self, name):
+        self.attr.nice_name = name
+
+    def object(self):
+        return self.attr
+
+    def name(self):
+        return self.attr.name
+
+
+class _FakeNode(object):
+    def __init__(self, node_type):
+        self.type = node_type
+        self.name = None
+        self.exists = False
+        self.attrs = {'message': _FakeAttr('message')}
+        self.values = {}
+        self.inputs = {}
+
+
+class _FakePlug(object):
+    def __init__(self, node, attr, indexes=()):
+        assert node.attrs.get(attr.name) is attr, "The attribute {0} was not added yet.".format(attr.name)
+        self.node = node
+        self.attr = attr
+        self.indexes = indexes
+
+    def elementByLogicalIndex(self, index):
+        return _FakePlug(self.node, self.attr, self.indexes + (index,))
+
+    @property
+    def key(self):
+        return (self.attr.name,) + self.indexes
+
+
+class _FakeFnDependencyNode(object):
+    def __init__(self, node):
+        assert node.exists, "The node was not created yet."
+        self.node = node
+
+    def typeName(self):
+        return self.node.type
+
+    def attributeCount(self):
+        return len(self.node.attrs)
+
+    def attribute(self, index):
+        return sorted(self.node.attrs.values(), key=lambda attr: attr.name)[index]
+
+    def findPlug(self, name):
+        return _FakePlug(self.node, self.node.attrs[name])
+
+
+class _FakeModifier(object):
+    instances = []
+
+    def __init__(self):
+        self.queue = []
+        self.done = []
+        self.num_doIt = 0
+        self.instances.append(self)
+
+    def createNode(self, node_type):
+        node = _FakeNode(node_type)
+        self.queue.append(('createNode', node))
+        return node
+
+    def renameNode(self, node, name):
+        self.queue.append(('renameNode', node, name))
+
+    def addAttribute(self, node, attr):
+        self.queue.append(('addAttribute', node, attr))
+
+    def connect(self, source, destination):
+        self.queue.append(('connect', source, destination))
+
+    def _new_plug_value(self, plug, value):
+        self.queue.append(('setValue', plug, value))
+
+    newPlugValueBool = newPlugValueInt = newPlugValueFloat = newPlugValueString = _new_plug_value
+
+    def doIt(self):
+        self.num_doIt += 1
+        for op in self.queue:
+            if op[0] == 'createNode':
+                op[1].exists = True
+                undo = lambda node=op[1]: setattr(node, 'exists', False)
+            elif op[0] == 'renameNode':
+                undo = lambda node=op[1], name=op[1].name: setattr(node, 'name', name)
+                op[1].name = op[2]
+            elif op[0] == 'addAttribute':
+                op[1].attrs[op[2].name] = op[2]
+                undo = lambda node=op[1], name=op[2].name: node.attrs.pop(name)
+            elif op[0] == 'connect':
+                source, destination = op[1], op[2]
+                assert destination.key not in destination.node.inputs, "The plug {0} is already connected.".format(destination.key)
+                destination.node.inputs[destination.key] = source.node
+                undo = lambda plug=destination: plug.node.inputs.pop(plug.key)
+            elif op[0] == 'setValue':
+                op[1].node.values[op[1].key] = op[2]
+                undo = lambda plug=op[1]: plug.node.values.pop(plug.key)
+            self.done.append(undo)
+        self.queue = []
+
+    def undoIt(self):
+        # Like the real one, every operation applied by the modifier is reverted.
+        while self.done:
+            self.done.pop()()
+
+
+class _FakeOpenMaya(object):
+    MDGModifier = _FakeModifier
+    MFnDependencyNode = _FakeFnDependencyNode
+    MFnAttribute = _FakeFnAttribute
+    MPlug = _FakePlug
+
+
+class _FakeBuilder(network_batch.NetworkBuilder):
+    def set_dagnode_value(self, plug, value):
+        self.modifier._new_plug_value(plug, value)
+
+
+def _get_attr_def(name, value):
+    _get_attr_def.calls.append(name)
+    if isinstance(value, list):
+        return network_batch.AttrDef(_FakeFnAttribute, array=True)
+    return network_batch.AttrDef(_FakeFnAttribute)
+
+
+def _create_schemas():
+    _get_attr_def.calls = []
+    return network_batch.AttrSchemas(_get_attr_def)
+
+
+def _create_graph():
+    root = A()
+    root.ex_int = 3
+    root.ex_str = 'root'
+    root.ex_none = None
+    root.ex_empty = []
+    root.ex_children = [A(), B()]
+    root.ex_children[0].ex_sibling = root.ex_children[1]
+    root.ex_children[1].ex_parent = root
+    return root
+
+
+class NetworkBatchTests(unittest.TestCase):
+    def test_plan(self):
+        root = _create_graph()
+        planner = network_batch.NetworkPlanner(Cache())
+        ref = planner.run(root)
+
+        # Each object is planned once, even if it is referenced multiple times.
+        self.assertEqual(len(planner.networks), 3)
+        self.assertTrue(planner.networks[ref.index].data is root)
+        self.assertEqual(sorted(network.name for network in planner.networks), ['A', 'A', 'B'])
+
+        attrs = dict(planner.networks[ref.index].attrs)
+        self.assertEqual(attrs['ex_int'], 3)
+        self.assertEqual(attrs['_class'], 'A')
+        self.assertTrue('ex_none' not in attrs and 'ex_empty' not in attrs and '_uid' not in attrs)
+        first, second = [planner.networks[val.index].data for val in attrs['ex_children']]
+        self.assertTrue(first is root.ex_children[0] and second is root.ex_children[1])
+        self.assertEqual(dict(planner.networks[attrs['ex_children'][1].index].attrs)['ex_parent'].index, ref.index)
+
+    def test_existing_network(self):
+        root = _create_graph()
+        cache = Cache()
+        cache.set_network_by_id(id(root.ex_children[1]), 'existingNetwork')
+
+        planner = network_batch.NetworkPlanner(cache)
+        ref = planner.run(root)
+        self.assertEqual(len(planner.networks), 2)
+        self.assertEqual(dict(planner.networks[ref.index].attrs)['ex_children'][1], 'existingNetwork')
+
+    def test_build(self):
+        root = _create_graph()
+        planner = network_batch.NetworkPlanner(Cache())
+        ref = planner.run(root)
+
+        _FakeModifier.instances = []
+        nodes = _FakeBuilder(_FakeOpenMaya, _create_schemas()).build(planner.networks)
+
+        # Everything is done by the same modifier.
+        self.assertEqual(len(_FakeModifier.instances), 1)
+        self.assertEqual(_FakeModifier.instances[0].num_doIt, 3)
+        self.assertTrue(all(node.exists and node.type == 'network' for node in nodes))
+
+        node = nodes[ref.index]
+        node_first, node_second = nodes[planner.indexes[id(root.ex_children[0])]], nodes[planner.indexes[id(root.ex_children[1])]]
+        self.assertEqual(node.name, 'A')
+        self.assertTrue('_uid' in node.attrs and ('_uid',) not in node.values)
+        self.assertEqual(node.attrs['ex_int'].nice_name, 'ex_int')
+        self.assertEqual(node.values[('ex_int',)], 3)
+        self.assertEqual(node.values[('ex_str',)], 'root')
+        self.assertEqual(node.values[('_class',)], 'A')
+        self.assertTrue('ex_none' not in node.attrs and 'ex_empty' not in node.attrs)
+        self.assertTrue(node.inputs[('ex_children', 0)] is node_first)
+        self.assertTrue(node.inputs[('ex_children', 1)] is node_second)
+        self.assertTrue(node_first.inputs[('ex_sibling',)] is node_second)
+        self.assertTrue(node_second.inputs[('ex_parent',)] is node)
+        self.assertTrue(node.attrs['ex_children'] is not node_first.attrs.get('ex_children'))
+
+    def test_build_undo(self):
+        root = _create_graph()
+        planner = network_batch.NetworkPlanner(Cache())
+        planner.run(root)
+
+        builder = _FakeBuilder(_FakeOpenMaya, _create_schemas())
+        nodes = builder.build(planner.networks)
+        self.assertTrue(all(node.exists for node in nodes))
+
+        # A single undo revert the nodes, the attributes, the values and the connections.
+        builder.modifier.undoIt()
+        for node in nodes:
+            self.assertFalse(node.exists)
+            self.assertEqual(node.name, None)
+            self.assertEqual(sorted(node.attrs), ['message'])
+            self.assertEqual(node.values, {})
+            self.assertEqual(node.inputs, {})
+
+    def test_schema(self):
+        schemas = _create_schemas()
+        children = [A() for _ in range(10)]
+        for i, child in enumerate(children):
+            child.ex_int = i
+            child.ex_float = i * 0.5
+            child.ex_list = [None, i + 1]
+        children[-1].ex_float = 'not a float'
+        root = A()
+        root.ex_children = children
+        planner = network_batch.NetworkPlanner(Cache())
+        planner.run(root)
+
+        nodes = _FakeBuilder(_FakeOpenMaya, schemas).build(planner.networks)
+
+        # The attributes are resolved once by class and type signature.
+        # There's one signature for the root, one for the first nine children and one for the last child.
+        self.assertEqual(len(schemas.schemas), 3)
+        self.assertEqual(sorted(_get_attr_def.calls).count('ex_int'), 2)
+        self.assertEqual(len(schemas.static_attrs), 1)
+
+        # Each node still have it's own attributes.
+        node_first, node_second = nodes[planner.indexes[id(children[0])]], nodes[planner.indexes[id(children[1])]]
+        self.assertTrue(node_first.attrs['ex_int'] is not node_second.attrs['ex_int'])
+        self.assertEqual(node_second.values[('ex_list', 1)], 2)
+        self.assertTrue('message' in node_second.attrs and ('message',) not in node_second.values)
+
+    def test_typed_arrays(self):
+        root = A()
+        root.ex_ints = [1, 2, 3]
+        root.ex_floats = (0.5, 1.5)
+        root.ex_strs = ['a', u'b']
+        root.ex_bools = [True, False]
+        root.ex_mixed = [1, 2.0]
+        root.ex_none = [None, 1]
+        root.ex_children = [B()]
+        planner = network_batch.NetworkPlanner(Cache(), typed_arrays=True)
+        ref = planner.run(root)
+
+        attrs = dict(planner.networks[ref.index].attrs)
+        self.assertEqual((attrs['ex_ints'].item_type, attrs['ex_ints'].values), (int, [1, 2, 3]))
+        self.assertEqual((attrs['ex_floats'].item_type, attrs['ex_floats'].values), (float, [0.5, 1.5]))
+        self.assertEqual(attrs['ex_strs'].item_type, basestring)
+        for key in ('ex_bools', 'ex_mixed', 'ex_none', 'ex_children'):
+            self.assertTrue(isinstance(attrs[key], list), key)
+
+        # The typed arrays are set in a single call.
+        nodes = _FakeBuilder(_FakeOpenMaya, _create_schemas()).build(planner.networks)
+        self.assertTrue(nodes[ref.index].values[('ex_ints',)] is attrs['ex_ints'])
+
+        # The typed arrays are only known by the networks code.
+        self.assertRaises(NotImplementedError, core.get_data_type, attrs['ex_ints'])
+
+    def test_signature(self):
+        schemas = _create_schemas()
+        self.assertEqual(schemas.get_signature(1), int)
+        self.assertEqual(schemas.get_signature([None, 1.0]), (list, float))
+        self.assertEqual(schemas.get_signature([None]), None)
+        self.assertEqual(schemas.get_signature(network_batch.TypedArray(int, [1])), (network_batch.TypedArray, int))
+        schemas.uncached_types = (B,)
+        self.assertEqual(schemas.get_signature([B()]), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
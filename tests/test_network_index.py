@@ -0,0 +1,232 @@
+"""
+Test the scene network index against an in-memory stand-in for maya.OpenMaya, maya is not needed.
+"""
+import os
+import sys
+import unittest
+
+path_module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if path_module_dir not in sys.path:
+    sys.path.append(path_module_dir)
+
+from libSerialization import network_index
+
+
+#
+# In-memory stand-in for the part of maya.OpenMaya used by the SceneNetworkIndex.
+# Setting a node attribute call the attribute changed callbacks like the real one.
+#
+
+class _FakeScene(object):
+    nodes = []
+    callbacks = {}
+    next_id = 0
+
+    @classmethod
+    def reset(cls):
+        cls.nodes = []
+        cls.callbacks = {}
+
+    @classmethod
+    def add_callback(cls, kind, fn, target=None):
+        cls.next_id += 1
+        cls.callbacks[cls.next_id] = (kind, fn, target)
+        return cls.next_id
+
+    @classmethod
+    def call(cls, kind, target, *args):
+        for callback_kind, fn, callback_target in list(cls.callbacks.values()):
+            if callback_kind == kind and callback_target in (None, target):
+                fn(*args)
+
+    @classmethod
+    def create_node(cls, node_type='network', **attrs):
+        node = _FakeNode(node_type)
+        cls.nodes.append(node)
+        if node_type == 'network':
+            cls.call('added', None, node, None)
+        for name, value in attrs.items():
+            node.set_attr(name, value)
+        return node
+
+    @classmethod
+    def delete_node(cls, node):
+        cls.nodes.remove(node)
+        node.alive = False
+        if node.type == 'network':
+            cls.call('removed', None, node, None)
+
+
+class _FakeNode(object):
+    def __init__(self, node_type):
+        self.type = node_type
+        self.attrs = {}
+        self.alive = True
+
+    def set_attr(self, name, value):
+        msg = _FakeMNodeMessage.kAttributeSet if name in self.attrs else _FakeMNodeMessage.kAttributeAdded
+        self.attrs[name] = value
+        _FakeScene.call('attr', self, msg, _FakePlug(self, name), None, None)
+
+
+class _FakePlug(object):
+    def __init__(self, node, name):
+        self._node = node
+        self.name = name
+
+    def partialName(self):
+        return self.name
+
+    def node(self):
+        return self._node
+
+    def asString(self):
+        return self._node.attrs[self.name]
+
+
+class _FakeMFnDependencyNode(object):
+    def __init__(self, node):
+        self.node = node
+
+    def typeName(self):
+        return self.node.type
+
+    def hasAttribute(self, name):
+        return name in self.node.attrs
+
+    def findPlug(self, name):
+        return _FakePlug(self.node, name)
+
+
+class _FakeMObjectHandle(object):
+    def __init__(self, node):
+        self.node = node
+
+    def hashCode(self):
+        return id(self.node)
+
+    def isValid(self):
+        return self.node.alive
+
+    def object(self):
+        return self.node
+
+
+class _FakeMItDependencyNodes(object):
+    def __init__(self):
+        self.nodes = list(_FakeScene.nodes)
+
+    def isDone(self):
+        return not self.nodes
+
+    def thisNode(self):
+        return self.nodes[0]
+
+    def next(self):
+        self.nodes.pop(0)
+
+
+class _FakeMDGMessage(object):
+    @staticmethod
+    def addNodeAddedCallback(fn, node_type):
+        return _FakeScene.add_callback('added', fn)
+
+    @staticmethod
+    def addNodeRemovedCallback(fn, node_type):
+        return _FakeScene.add_callback('removed', fn)
+
+
+class _FakeMNodeMessage(object):
+    kAttributeSet = 1
+    kAttributeAdded = 2
+    kAttributeRemoved = 4
+
+    @staticmethod
+    def addAttributeChangedCallback(node, fn):
+        return _FakeScene.add_callback('attr', fn, node)
+
+
+class _FakeMSceneMessage(object):
+    kBeforeNew = 'beforeNew'
+    kBeforeOpen = 'beforeOpen'
+
+    @staticmethod
+    def addCallback(msg, fn):
+        return _FakeScene.add_callback(msg, fn)
+
+
+class _FakeMMessage(object):
+    @staticmethod
+    def removeCallback(callback):
+        del _FakeScene.callbacks[callback]
+
+
+class _FakeOpenMaya(object):
+    MFnDependencyNode = _FakeMFnDependencyNode
+    MObjectHandle = _FakeMObjectHandle
+    MItDependencyNodes = _FakeMItDependencyNodes
+    MDGMessage = _FakeMDGMessage
+    MNodeMessage = _FakeMNodeMessage
+    MSceneMessage = _FakeMSceneMessage
+    MMessage = _FakeMMessage
+
+
+class NetworkIndexTests(unittest.TestCase):
+    def setUp(self):
+        _FakeScene.reset()
+        self.index = network_index.SceneNetworkIndex(_FakeOpenMaya)
+
+    def test_build(self):
+        rig = _FakeScene.create_node(_class='Rig')
+        old_rig = _FakeScene.create_node(_class='OldRig', _class_namespace='RigElement.Rig')
+        _FakeScene.create_node()
+        _FakeScene.create_node('transform', _class='Rig')
+
+        self.assertEqual(self.index.get('Rig'), [rig, old_rig])
+        self.assertEqual(self.index.get('RigElement'), [old_rig])
+        self.assertEqual(self.index.get('OldRig'), [])
+        self.assertEqual(len(self.index.index), 3)
+
+    def test_callbacks(self):
+        rig = _FakeScene.create_node(_class='Rig')
+        self.assertEqual(self.index.get('Rig'), [rig])
+
+        # The new networks are indexed on the next query, their callback is only registered then.
+        new_rig = _FakeScene.create_node(_class='Rig')
+        self.assertEqual(len(self.index.pending), 1)
+        self.assertEqual(len(self.index.node_callbacks), 1)
+        self.assertEqual(self.index.get('Rig'), [rig, new_rig])
+        self.assertEqual(len(self.index.node_callbacks), 2)
+
+        # The other attributes don't mark the networks as changed.
+        rig.set_attr('ex_int', 42)
+        self.assertEqual(self.index.pending, {})
+
+        # The indexed networks follow their class.
+        rig.set_attr('_class', 'Module')
+        self.assertEqual(len(self.index.pending), 1)
+        self.assertEqual(self.index.get('Rig'), [new_rig])
+        self.assertEqual(self.index.get('Module'), [rig])
+
+        # The deleted networks are removed, even if they were not indexed yet.
+        _FakeScene.delete_node(new_rig)
+        deleted_rig = _FakeScene.create_node(_class='Rig')
+        _FakeScene.delete_node(deleted_rig)
+        self.assertEqual(self.index.get('Rig'), [])
+        self.assertEqual(len(self.index.node_callbacks), 1)
+
+    def test_scene_changed(self):
+        _FakeScene.create_node(_class='Rig')
+        self.index.get('Rig')
+        _FakeScene.call('beforeNew', None, None)
+        self.assertTrue(self.index.index is None)
+        self.assertEqual(_FakeScene.callbacks, {})
+
+        # The index is built again for the new scene.
+        _FakeScene.reset()
+        rig = _FakeScene.create_node(_class='Rig')
+        self.assertEqual(self.index.get('Rig'), [rig])
+
+
+if __name__ == '__main__':
+    unittest.main()